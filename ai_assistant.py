@@ -1,17 +1,48 @@
+import asyncio
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from task_manager import TaskManager, AITaskParser, Task, Priority, TaskStatus
 from memory_store import MemoryStore
-from transcribe_and_respond import generate_llama_response
+from conversation import ConversationHistory, ContextBuilder
+from prioritizer import PrioritizationEngine
+from fuzzy_index import TrigramIndex
+from intent_classifier import IntentClassifier
+from productivity_log import ProductivityLog
+from transcribe_and_respond import (
+    generate_llama_response, agenerate_llama_response, stream_llama_response
+)
 
 
 class MemoryMateAssistant:
-    def __init__(self):
-        self.task_manager = TaskManager()
-        self.memory_store = MemoryStore()
-        self.conversation_history = []
+    # Intents whose response depends on the stored memories, so a batch writes its pending ones first
+    MEMORY_READING_INTENTS = ('general_chat', 'recall_memory')
+    # Appended to a streamed reply that broke off part way
+    STREAM_INTERRUPTED = " ... [Sorry, I lost my train of thought there.]"
+    # Complete/delete only act on a fuzzy title match this long and this far ahead of the runner-up
+    FUZZY_MIN_PHRASE_CHARS = 4
+    FUZZY_MIN_MARGIN = 0.15
+    
+    def __init__(self, semantic_intents: bool = False, db_path: str = "memorymate.db"):
+        self.task_manager = TaskManager(db_path)
+        self.memory_store = MemoryStore(db_path)
+        self.prioritizer = PrioritizationEngine(self.task_manager)
+        self.intent_classifier = IntentClassifier()
+        if semantic_intents:
+            # Embedding prototypes first, keyword rules below the confidence threshold
+            from semantic_intent import SemanticIntentClassifier
+            self.intent_classifier = SemanticIntentClassifier(self.intent_classifier)
+        self.productivity_log = ProductivityLog(db_path)
+        self.productivity_log.attach(self.task_manager)
+        self.conversation_history = ConversationHistory(max_turns=50)
+        self.context_builder = ContextBuilder()
+        # Task ids in the numbering the user last saw, so "task 3" means their task 3
+        self.last_listed_task_ids: List[int] = []
+        self._title_index: Optional[TrigramIndex] = None
+        # One worker keeps task commands from overlapping turns in the order they arrived
+        self._task_executor: Optional[ThreadPoolExecutor] = None
         
     def process_input(self, user_input: str) -> str:
         """Process user input and generate appropriate response"""
@@ -31,35 +62,151 @@ class MemoryMateAssistant:
         
         return response
     
-    def _classify_intent(self, user_input: str) -> str:
-        """Classify user intent from input"""
-        input_lower = user_input.lower()
-        
-        # Task management intents
-        if any(word in input_lower for word in ['add', 'create', 'new', 'remind', 'task']):
-            return 'add_task'
-        elif any(word in input_lower for word in ['list', 'show', 'what', 'tasks', 'todo']):
-            return 'list_tasks'
-        elif any(word in input_lower for word in ['complete', 'done', 'finished', 'mark']):
-            return 'complete_task'
-        elif any(word in input_lower for word in ['delete', 'remove', 'cancel']):
-            return 'delete_task'
-        elif any(word in input_lower for word in ['search', 'find', 'look']):
-            return 'search_tasks'
-        elif any(word in input_lower for word in ['priority', 'urgent', 'important']):
-            return 'prioritize_tasks'
+    def process_input_stream(self, user_input: str) -> Iterator[str]:
+        """process_input as a generator of response pieces.
         
-        # Memory/recall intents
-        elif any(word in input_lower for word in ['remember', 'recall', 'what did', 'promised']):
-            return 'recall_memory'
+        General chat is yielded as the LLM generates it, so a UI or TTS can start
+        before the reply is finished; other intents arrive as a single piece.
+        Memory and history get the full reply once the stream ends.
+        """
+        self.memory_store.add_memory(f"User: {user_input}")
+        self.conversation_history.append({"role": "user", "content": user_input})
         
-        # General chat intents
-        elif any(word in input_lower for word in ['hello', 'hi', 'hey', 'how are you']):
-            return 'greeting'
-        elif any(word in input_lower for word in ['help', 'what can you do']):
-            return 'help'
+        intent = self._classify_intent(user_input)
+        if intent == 'general_chat':
+            pieces = self._stream_general_chat(user_input)
         else:
-            return 'general_chat'
+            pieces = iter([self._handle_intent(intent, user_input)])
+        
+        parts = []
+        try:
+            for piece in pieces:
+                parts.append(piece)
+                yield piece
+        finally:
+            response = "".join(parts).strip()
+            self.memory_store.add_memory(f"Assistant: {response}")
+            self.conversation_history.append({"role": "assistant", "content": response})
+    
+    def _stream_general_chat(self, user_input: str) -> Iterator[str]:
+        streamed = False
+        try:
+            prompt, prefix = self._build_prompt(user_input)
+            for piece in stream_llama_response(prompt, prefix=prefix):
+                streamed = True
+                yield piece
+        except Exception as e:
+            if not streamed:
+                yield "I'm having trouble processing that. Could you try rephrasing or ask me to help with a specific task?"
+            else:
+                # Say so rather than let a cut-off reply pass as a finished one
+                print(f"⚠️ Reply interrupted: {e}")
+                yield self.STREAM_INTERRUPTED
+    
+    async def aprocess_input(self, user_input: str, timeout: Optional[float] = 120.0,
+                             llm_timeout: Optional[float] = 90.0) -> str:
+        """Async process_input, so a voice front-end can keep listening during a turn.
+        
+        Logging the user's input to memory runs alongside the intent handler: task
+        commands run on a worker thread and general chat on the LLaMA worker.
+        After `timeout` (or `llm_timeout` for the LLM) the turn is answered with an
+        apology. Cancelling the call stops waiting; a task command or generation
+        that already started still finishes on its worker.
+        """
+        intent = self._classify_intent(user_input)
+        self.conversation_history.append({"role": "user", "content": user_input})
+        log_user = asyncio.ensure_future(asyncio.to_thread(self.memory_store.add_memory, f"User: {user_input}"))
+        
+        try:
+            response = await asyncio.wait_for(self._ahandle_intent(intent, user_input, llm_timeout), timeout)
+        except asyncio.TimeoutError:
+            response = "Sorry, that took too long. Could you try again?"
+        finally:
+            # The user's input is remembered even if this turn was cancelled
+            await asyncio.shield(log_user)
+        
+        await asyncio.to_thread(self.memory_store.add_memory, f"Assistant: {response}")
+        self.conversation_history.append({"role": "assistant", "content": response})
+        return response
+    
+    async def _ahandle_intent(self, intent: str, user_input: str, llm_timeout: Optional[float]) -> str:
+        if intent == 'general_chat':
+            try:
+                prompt, prefix = await asyncio.to_thread(self._build_prompt, user_input)
+                return await agenerate_llama_response(prompt, timeout=llm_timeout, prefix=prefix)
+            except (asyncio.TimeoutError, TimeoutError):
+                return "Sorry, I'm taking too long to think about that. Could you ask again?"
+            except (OSError, RuntimeError):
+                return f"I'm having trouble processing that. Could you try rephrasing or ask me to help with a specific task?"
+        if intent in ('greeting', 'help'):
+            return self._handle_intent(intent, user_input)
+        
+        if self._task_executor is None:
+            self._task_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memorymate-tasks")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._task_executor, self._handle_intent, intent, user_input)
+    
+    def process_batch(self, inputs: List[str]) -> List[str]:
+        """Process many inputs (e.g. a replayed log) and return the responses in order.
+        
+        Responses, memories and history come out the same as calling
+        process_input on each input in turn. Inputs are classified in one pass,
+        runs of task additions are parsed and inserted together, and memory
+        entries are written in shared transactions, flushed whenever an input
+        is about to read memory.
+        """
+        inputs = list(inputs)
+        intents = self.intent_classifier.classify_many(inputs)
+        
+        responses: List[Optional[str]] = [None] * len(inputs)
+        pending_adds: List[int] = []
+        # Memory entries not yet written, in turn order
+        memories: List[str] = []
+        for i, (user_input, intent) in enumerate(zip(inputs, intents)):
+            if intent == 'add_task':
+                pending_adds.append(i)
+                continue
+            self._add_tasks_batch(inputs, pending_adds, responses, memories)
+            
+            memories.append(f"User: {user_input}")
+            self.conversation_history.append({"role": "user", "content": user_input})
+            if intent in self.MEMORY_READING_INTENTS:
+                self.memory_store.add_memories(memories)
+                memories.clear()
+            responses[i] = self._handle_intent(intent, user_input)
+            memories.append(f"Assistant: {responses[i]}")
+            self.conversation_history.append({"role": "assistant", "content": responses[i]})
+        self._add_tasks_batch(inputs, pending_adds, responses, memories)
+        
+        self.memory_store.add_memories(memories)
+        return responses
+    
+    def _add_tasks_batch(self, inputs: List[str], indices: List[int], responses: List[Optional[str]],
+                         memories: List[str]):
+        """Parse and insert the add-task inputs at `indices` in one transaction, then clear `indices`.
+        
+        Their turns are added to the history and their memory entries to `memories`.
+        """
+        if not indices:
+            return
+        try:
+            tasks = AITaskParser.parse_many([inputs[i] for i in indices])
+            self.task_manager.add_tasks(tasks)
+            for i, task in zip(indices, tasks):
+                responses[i] = self._describe_added_task(task)
+        except Exception as e:
+            for i in indices:
+                responses[i] = f"Sorry, I couldn't add that task. Error: {str(e)}"
+        for i in indices:
+            memories.extend([f"User: {inputs[i]}", f"Assistant: {responses[i]}"])
+            self.conversation_history.append({"role": "user", "content": inputs[i]})
+            self.conversation_history.append({"role": "assistant", "content": responses[i]})
+        indices.clear()
+    
+    def _classify_intent(self, user_input: str) -> str:
+        """Classify user intent from input"""
+        # Keyword rules, or embedding prototypes backed by them when semantic intents are on
+        return self.intent_classifier.classify(user_input)
     
     def _handle_intent(self, intent: str, user_input: str) -> str:
         """Handle specific intent and generate response"""
@@ -91,27 +238,30 @@ class MemoryMateAssistant:
             task = AITaskParser.parse_task_from_text(user_input)
             
             # Add to task manager
-            task_id = self.task_manager.add_task(task)
-            
-            # Generate AI response
-            response = f"I've added the task '{task.title}' to your list. "
+            self.task_manager.add_task(task)
             
-            if task.due_date:
-                response += f"It's due on {task.due_date}. "
-            
-            if task.priority == Priority.URGENT_IMPORTANT:
-                response += "I've marked it as urgent and important. "
-            elif task.priority == Priority.IMPORTANT_NOT_URGENT:
-                response += "I've marked it as important. "
-            
-            if task.tags:
-                response += f"I've tagged it with: {', '.join(task.tags)}. "
-            
-            return response
+            return self._describe_added_task(task)
             
         except Exception as e:
             return f"Sorry, I couldn't add that task. Error: {str(e)}"
     
+    def _describe_added_task(self, task: Task) -> str:
+        """Confirmation message for a newly added task"""
+        response = f"I've added the task '{task.title}' to your list. "
+        
+        if task.due_date:
+            response += f"It's due on {task.due_date}. "
+        
+        if task.priority == Priority.URGENT_IMPORTANT:
+            response += "I've marked it as urgent and important. "
+        elif task.priority == Priority.IMPORTANT_NOT_URGENT:
+            response += "I've marked it as important. "
+        
+        if task.tags:
+            response += f"I've tagged it with: {', '.join(task.tags)}. "
+        
+        return response
+    
     def _handle_list_tasks(self, user_input: str) -> str:
         """Handle listing tasks"""
         try:
@@ -125,15 +275,18 @@ class MemoryMateAssistant:
             elif 'today' in user_input.lower():
                 today = datetime.now().strftime('%Y-%m-%d')
                 all_tasks = self.task_manager.get_all_tasks()
-                tasks = [t for t in all_tasks if t.due_date == today]
+                tasks = [t for t in all_tasks if (t.due_date or '')[:10] == today]
                 response = f"Here are your tasks for today ({today}):\n"
             else:
                 tasks = self.task_manager.get_all_tasks()
                 response = "Here are all your tasks:\n"
             
             if not tasks:
+                # Nothing was numbered, so "task 3" must not point into an older list
+                self.last_listed_task_ids = []
                 response += "No tasks found."
             else:
+                self.last_listed_task_ids = [task.id for task in tasks[:10]]
                 for i, task in enumerate(tasks[:10], 1):  # Limit to 10 tasks
                     priority_emoji = "🔴" if task.priority == Priority.URGENT_IMPORTANT else "🟡" if task.priority == Priority.IMPORTANT_NOT_URGENT else "🟢"
                     status_emoji = "✅" if task.status == TaskStatus.COMPLETED else "⏳" if task.status == TaskStatus.IN_PROGRESS else "📝"
@@ -154,27 +307,12 @@ class MemoryMateAssistant:
     def _handle_complete_task(self, user_input: str) -> str:
         """Handle completing a task"""
         try:
-            # Try to find task by number or title
-            all_tasks = self.task_manager.get_all_tasks()
-            
-            # Check if user mentioned a number
-            number_match = re.search(r'(\d+)', user_input)
-            if number_match:
-                task_num = int(number_match.group(1)) - 1
-                if 0 <= task_num < len(all_tasks):
-                    task = all_tasks[task_num]
-                    task.status = TaskStatus.COMPLETED
-                    task.updated_at = datetime.now().isoformat()
-                    self.task_manager.update_task(task)
-                    return f"Great job! I've marked '{task.title}' as completed. 🎉"
-            
-            # Try to find by title
-            for task in all_tasks:
-                if task.title.lower() in user_input.lower():
-                    task.status = TaskStatus.COMPLETED
-                    task.updated_at = datetime.now().isoformat()
-                    self.task_manager.update_task(task)
-                    return f"Great job! I've marked '{task.title}' as completed. 🎉"
+            task = self._resolve_task(user_input)
+            if task:
+                task.status = TaskStatus.COMPLETED
+                task.updated_at = datetime.now().isoformat()
+                self.task_manager.update_task(task)
+                return f"Great job! I've marked '{task.title}' as completed. 🎉"
             
             return "I couldn't find that task. Could you be more specific?"
             
@@ -184,28 +322,75 @@ class MemoryMateAssistant:
     def _handle_delete_task(self, user_input: str) -> str:
         """Handle deleting a task"""
         try:
-            all_tasks = self.task_manager.get_all_tasks()
-            
-            # Check if user mentioned a number
-            number_match = re.search(r'(\d+)', user_input)
-            if number_match:
-                task_num = int(number_match.group(1)) - 1
-                if 0 <= task_num < len(all_tasks):
-                    task = all_tasks[task_num]
-                    self.task_manager.delete_task(task.id)
-                    return f"I've deleted the task '{task.title}'."
-            
-            # Try to find by title
-            for task in all_tasks:
-                if task.title.lower() in user_input.lower():
-                    self.task_manager.delete_task(task.id)
-                    return f"I've deleted the task '{task.title}'."
+            task = self._resolve_task(user_input)
+            if task:
+                self.task_manager.delete_task(task.id)
+                return f"I've deleted the task '{task.title}'."
             
             return "I couldn't find that task. Could you be more specific?"
             
         except Exception as e:
             return f"Sorry, I couldn't delete that task. Error: {str(e)}"
     
+    def _resolve_task(self, user_input: str) -> Optional[Task]:
+        """Find the task a command refers to, by list number or by title"""
+        # Check if user mentioned a number
+        number_match = re.search(r'(\d+)', user_input)
+        if number_match:
+            task_num = int(number_match.group(1)) - 1
+            if self.last_listed_task_ids:
+                # Numbers refer to the list the user last saw
+                if 0 <= task_num < len(self.last_listed_task_ids):
+                    return self.task_manager.get_task(self.last_listed_task_ids[task_num])
+                return None
+            return self.task_manager.get_task_by_position(task_num)
+        
+        # Try to find by title: exact (indexed) match first, then fuzzy match
+        phrase = self._extract_task_phrase(user_input)
+        if not phrase:
+            return None
+        for candidate in (user_input, phrase):
+            matches = self.task_manager.get_tasks_by_title(candidate)
+            if matches:
+                return matches[0]
+        
+        # Both callers change or remove the task, so a fuzzy match must be unambiguous
+        if len(re.sub(r"\W", "", phrase)) < self.FUZZY_MIN_PHRASE_CHARS:
+            return None
+        fuzzy_matches = self.title_index.search(phrase, k=2, min_score=0.3)
+        if not fuzzy_matches or fuzzy_matches[0][1] < 0.5:
+            return None
+        runner_up = fuzzy_matches[1][1] if len(fuzzy_matches) > 1 else 0.0
+        if fuzzy_matches[0][1] - runner_up < self.FUZZY_MIN_MARGIN:
+            return None
+        return self.task_manager.get_task(fuzzy_matches[0][0])
+    
+    @property
+    def title_index(self) -> TrigramIndex:
+        """Fuzzy task-title index, built on first use and kept current by task writes"""
+        if self._title_index is None:
+            index = TrigramIndex()
+            for task_id, title in self.task_manager.get_task_titles():
+                index.add(task_id, title)
+            self.task_manager.add_listener(self._update_title_index)
+            self._title_index = index
+        return self._title_index
+    
+    def _update_title_index(self, action: str, task_id: int, task: Optional[Task]):
+        if action == 'deleted':
+            self._title_index.remove(task_id)
+        elif task is not None and action in ('added', 'updated'):
+            self._title_index.add(task_id, task.title)
+    
+    def _extract_task_phrase(self, user_input: str) -> str:
+        """Strip command words so only the part naming the task remains"""
+        phrase = re.sub(
+            r"\b(mark|marked|complete|completed|done|finish|finished|delete|remove|cancel|"
+            r"as|the|task|please|my|number)\b|[#?!.,]",
+            " ", user_input.lower()
+        )
+        return " ".join(phrase.split())
+    
     def _handle_search_tasks(self, user_input: str) -> str:
         """Handle searching tasks"""
         try:
@@ -218,12 +403,20 @@ class MemoryMateAssistant:
             if not query:
                 return "What would you like me to search for?"
             
-            tasks = self.task_manager.search_tasks(query)
+            tasks = self.task_manager.search_tasks(query, limit=5)
+            if len(tasks) < 5:
+                # Top up with fuzzy title matches for misheard or misspelled words
+                seen = {task.id for task in tasks}
+                fuzzy_ids = [task_id for task_id, _ in self.title_index.search(query, k=5, min_score=0.4)
+                             if task_id not in seen]
+                tasks += self.task_manager.get_tasks_by_ids(fuzzy_ids)[:5 - len(tasks)]
             
             if not tasks:
+                self.last_listed_task_ids = []
                 return f"I couldn't find any tasks matching '{query}'."
             
             response = f"Here are tasks matching '{query}':\n"
+            self.last_listed_task_ids = [task.id for task in tasks[:5]]
             for i, task in enumerate(tasks[:5], 1):
                 priority_emoji = "🔴" if task.priority == Priority.URGENT_IMPORTANT else "🟡" if task.priority == Priority.IMPORTANT_NOT_URGENT else "🟢"
                 response += f"{i}. {priority_emoji} {task.title}"
@@ -239,25 +432,14 @@ class MemoryMateAssistant:
     def _handle_prioritize_tasks(self, user_input: str) -> str:
         """Handle task prioritization"""
         try:
-            all_tasks = self.task_manager.get_all_tasks()
-            pending_tasks = [t for t in all_tasks if t.status == TaskStatus.PENDING]
+            # Only dirty or time-sensitive tasks are re-scored, and only changed rows are written
+            report = self.prioritizer.run()
             
-            if not pending_tasks:
+            if not report.pending:
                 return "You have no pending tasks to prioritize."
             
-            # Simple prioritization logic
-            for task in pending_tasks:
-                if any(word in task.title.lower() for word in ['urgent', 'asap', 'emergency', 'critical']):
-                    task.priority = Priority.URGENT_IMPORTANT
-                elif any(word in task.title.lower() for word in ['important', 'priority', 'key']):
-                    task.priority = Priority.IMPORTANT_NOT_URGENT
-                else:
-                    task.priority = Priority.OPTIONAL
-                
-                task.updated_at = datetime.now().isoformat()
-                self.task_manager.update_task(task)
-            
-            return "I've updated the priorities of your tasks based on their content and urgency."
+            return (f"I've updated the priorities of your tasks based on their content and urgency. "
+                    f"({report.changed} of {report.scanned} checked tasks changed)")
             
         except Exception as e:
             return f"Sorry, I couldn't prioritize your tasks. Error: {str(e)}"
@@ -265,15 +447,16 @@ class MemoryMateAssistant:
     def _handle_recall_memory(self, user_input: str) -> str:
         """Handle memory recall"""
         try:
-            # Search memory for relevant information
-            memories = self.memory_store.search_memory(user_input, k=3)
+            # Search memory for relevant information, skipping the question itself
+            memories = [memory for memory in self.memory_store.recall_memories(user_input, limit=4)
+                        if memory["text"] != f"User: {user_input}"][:3]
             
             if not memories:
                 return "I don't have any specific memories about that. Could you be more specific?"
             
             response = "Here's what I remember:\n"
             for i, memory in enumerate(memories, 1):
-                response += f"{i}. {memory}\n"
+                response += f"{i}. {memory['text']}\n"
             
             return response
             
@@ -317,19 +500,27 @@ What would you like to try first?"""
     def _handle_general_chat(self, user_input: str) -> str:
         """Handle general chat using LLaMA"""
         try:
-            # Use LLaMA for general conversation
-            response = generate_llama_response(user_input)
+            # Use LLaMA for general conversation, with recent turns and recalled memories as context
+            prompt, prefix = self._build_prompt(user_input)
+            response = generate_llama_response(prompt, prefix=prefix)
             return response
         except Exception as e:
             return f"I'm having trouble processing that. Could you try rephrasing or ask me to help with a specific task?"
     
+    def _build_prompt(self, user_input: str) -> Tuple[str, str]:
+        """LLM prompt for `user_input` within the context builder's token budget, and its reusable prefix"""
+        # One extra memory, since the input itself has usually just been stored
+        memories = self.memory_store.recall_memories(user_input, limit=self.context_builder.top_k + 1)
+        return self.context_builder.build_with_prefix(user_input, self.conversation_history,
+                                                      [memory["text"] for memory in memories])
+    
     def get_daily_summary(self) -> str:
         """Generate a daily summary of tasks and progress"""
         try:
             today = datetime.now().strftime('%Y-%m-%d')
             all_tasks = self.task_manager.get_all_tasks()
             
-            today_tasks = [t for t in all_tasks if t.due_date == today]
+            today_tasks = [t for t in all_tasks if (t.due_date or '')[:10] == today]
             completed_today = [t for t in all_tasks if t.status == TaskStatus.COMPLETED and t.updated_at.startswith(today)]
             urgent_tasks = [t for t in all_tasks if t.priority == Priority.URGENT_IMPORTANT and t.status != TaskStatus.COMPLETED]
             
@@ -365,4 +556,7 @@ What would you like to try first?"""
     
     def close(self):
         """Clean up resources"""
+        if self._task_executor is not None:
+            self._task_executor.shutdown(wait=True)
+            self._task_executor = None
         self.task_manager.close()
@@ -513,15 +513,15 @@ def render_settings():
     with col1:
         speech_rate = st.slider("Speech Rate", 100, 300, 180, help="Words per minute")
         if st.button("Apply Speech Rate"):
-            from tts import tts_engine
-            tts_engine.change_rate(speech_rate)
+            from tts import get_speaker
+            get_speaker().configure(rate=speech_rate)
             st.success("Speech rate updated!")
     
     with col2:
         volume = st.slider("Volume", 0.0, 1.0, 0.9, help="TTS volume level")
         if st.button("Apply Volume"):
-            from tts import tts_engine
-            tts_engine.change_volume(volume)
+            from tts import get_speaker
+            get_speaker().configure(volume=volume)
             st.success("Volume updated!")
     
     st.markdown("### 🗄️ Data Management")
@@ -0,0 +1,154 @@
+from typing import Optional
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated NumPy sample buffer for audio callbacks.
+
+    `append` copies a block in with one slice assignment (two when it wraps)
+    and never allocates while there is room. A full buffer grows by doubling
+    up to `max_capacity`; past that the oldest samples are overwritten, like
+    a ring. `view` returns the contents without copying unless they have
+    wrapped; appending more leaves an earlier view intact, clearing and
+    refilling or wrapping over it does not.
+    """
+
+    def __init__(self, capacity: int, max_capacity: Optional[int] = None, dtype=np.int16):
+        self.max_capacity = max_capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def reserve(self, capacity: int):
+        """Grow to hold at least `capacity` samples, so later appends up to that need not allocate"""
+        if self.max_capacity is not None:
+            capacity = min(capacity, self.max_capacity)
+        if capacity > self.capacity:
+            data = np.zeros(capacity, dtype=self._data.dtype)
+            self.write_into(data)
+            self._data = data
+            self._start = 0
+
+    def append(self, block: np.ndarray):
+        count = len(block)
+        if self._size + count > self.capacity:
+            if self.max_capacity is None or self.capacity < self.max_capacity:
+                self.reserve(max(self.capacity * 2, self._size + count))
+        capacity = self.capacity
+        if count >= capacity:
+            # Only the newest `capacity` samples fit
+            self._data[:] = block[count - capacity:]
+            self._start, self._size = 0, capacity
+            return
+
+        end = (self._start + self._size) % capacity
+        first = min(count, capacity - end)
+        self._data[end:end + first] = block[:first]
+        if first < count:
+            self._data[:count - first] = block[first:]
+        overflow = self._size + count - capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % capacity
+            self._size = capacity
+        else:
+            self._size += count
+
+    def append_from(self, other: "AudioRingBuffer"):
+        """Append another buffer's samples oldest first, without allocating"""
+        end = other._start + other._size
+        if end <= other.capacity:
+            self.append(other._data[other._start:end])
+        else:
+            self.append(other._data[other._start:])
+            self.append(other._data[:end - other.capacity])
+
+    def view(self) -> np.ndarray:
+        """The samples oldest first; a view into the buffer unless they wrap around its end"""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start:end]
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def write_into(self, out: np.ndarray) -> int:
+        """Copy the samples oldest first into the start of `out` without allocating; returns the count"""
+        end = self._start + self._size
+        if end <= self.capacity:
+            out[:self._size] = self._data[self._start:end]
+        else:
+            head = self.capacity - self._start
+            out[:head] = self._data[self._start:]
+            out[head:self._size] = self._data[:end - self.capacity]
+        return self._size
+
+
+class SpeechGate:
+    """Decides frame by frame which audio belongs to the utterance, writing it to `buffer`.
+
+    Until speech starts, frames only go through a `pre_roll_frames` ring, so
+    when `onset_frames` consecutive speech frames arrive the utterance starts
+    with the audio just before them instead of clipping the first syllable.
+    After the last speech frame, `hangover_frames` more are kept as speech,
+    so word endings and short pauses survive; `utterance` leaves out any
+    silence after that. `push` does not allocate once `buffer` has room.
+    """
+
+    def __init__(self, buffer: AudioRingBuffer, frame_size: int, pre_roll_frames: int = 10,
+                 hangover_frames: int = 10, onset_frames: int = 2):
+        self.buffer = buffer
+        self.hangover_frames = hangover_frames
+        self.onset_frames = max(1, onset_frames)
+        self.pre_roll = AudioRingBuffer(frame_size * pre_roll_frames,
+                                        max_capacity=frame_size * pre_roll_frames, dtype=buffer.dtype)
+        self.reset()
+
+    def reset(self):
+        self.buffer.clear()
+        self.pre_roll.clear()
+        self.triggered = False
+        self.silent_frames = 0
+        self._onset = 0
+        self._hangover = 0
+        self._speech_end = 0
+
+    def push(self, frame: np.ndarray, is_speech: bool):
+        if not self.triggered:
+            self.pre_roll.append(frame)
+            self._onset = self._onset + 1 if is_speech else 0
+            if self._onset >= self.onset_frames:
+                self.triggered = True
+                self.buffer.append_from(self.pre_roll)
+                self.pre_roll.clear()
+                self._hangover = self.hangover_frames
+                self._speech_end = len(self.buffer)
+            return
+
+        self.buffer.append(frame)
+        if is_speech:
+            self._hangover = self.hangover_frames
+            self.silent_frames = 0
+        else:
+            self.silent_frames += 1
+            if self._hangover == 0:
+                return
+            self._hangover -= 1
+        self._speech_end = len(self.buffer)
+
+    def utterance(self) -> np.ndarray:
+        """The utterance so far, without trailing silence past the hangover"""
+        return self.buffer.view()[:self._speech_end]
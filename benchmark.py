@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+MemoryMate Microbenchmarks
+Times hot paths of the assistant without touching audio or AI models
+
+Usage: python benchmark.py [name ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+from intent_classifier import IntentClassifier, LABELED_EXAMPLES
+from date_parser import DueDateParser
+from task_manager import AITaskParser
+from audio_buffer import AudioRingBuffer
+from keyword_tagger import get_default_tagger
+from fuzzy_index import TrigramIndex, trigrams
+
+
+def time_per_call(func, inputs, repeat=200):
+    """Average microseconds per call of func over inputs"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            func(item)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(inputs)) * 1e6
+
+
+def legacy_classify(user_input):
+    """The substring-based classifier the compiled one replaced, kept for comparison"""
+    input_lower = user_input.lower()
+    if any(word in input_lower for word in ['add', 'create', 'new', 'remind', 'task']):
+        return 'add_task'
+    elif any(word in input_lower for word in ['list', 'show', 'what', 'tasks', 'todo']):
+        return 'list_tasks'
+    elif any(word in input_lower for word in ['complete', 'done', 'finished', 'mark']):
+        return 'complete_task'
+    elif any(word in input_lower for word in ['delete', 'remove', 'cancel']):
+        return 'delete_task'
+    elif any(word in input_lower for word in ['search', 'find', 'look']):
+        return 'search_tasks'
+    elif any(word in input_lower for word in ['priority', 'urgent', 'important']):
+        return 'prioritize_tasks'
+    elif any(word in input_lower for word in ['remember', 'recall', 'what did', 'promised']):
+        return 'recall_memory'
+    elif any(word in input_lower for word in ['hello', 'hi', 'hey', 'how are you']):
+        return 'greeting'
+    elif any(word in input_lower for word in ['help', 'what can you do']):
+        return 'help'
+    else:
+        return 'general_chat'
+
+
+def bench_intent():
+    """Intent classification: accuracy on the labeled set and time per call"""
+    uncached, memoized = IntentClassifier(cache_size=0), IntentClassifier()
+    texts = [text for text, _ in LABELED_EXAMPLES]
+
+    for name, func in (("legacy substring chain", legacy_classify), ("compiled regex", uncached.classify),
+                       ("compiled regex, memoized", memoized.classify)):
+        correct = sum(func(text) == label for text, label in LABELED_EXAMPLES)
+        per_call = time_per_call(func, texts)
+        print(f"   {name:<24} accuracy {correct}/{len(LABELED_EXAMPLES)}  {per_call:6.2f} µs/call")
+
+
+def legacy_tag(text):
+    """The repeated `in` checks AITaskParser used before the compiled tagger"""
+    text_lower = text.lower()
+    priority = None
+    if any(word in text_lower for word in ['urgent', 'asap', 'emergency', 'critical']):
+        priority = 'urgent_important'
+    elif any(word in text_lower for word in ['important', 'priority', 'key']):
+        priority = 'important_not_urgent'
+    tags = [tag for tag in ('meeting', 'call', 'email', 'study', 'work') if tag in text_lower]
+    return priority, tags
+
+
+def sample_task_texts(count, seed=7):
+    """Synthetic task phrasings mixing priorities, tags, dates and filler"""
+    rng = random.Random(seed)
+    verbs = ["Call", "Email", "Finish", "Book", "Prepare for", "Study for", "Review", "Buy"]
+    objects = ["the client", "mom", "the quarterly report", "a dentist appointment",
+               "the team meeting", "the physics exam", "groceries", "the network upgrade"]
+    extras = ["", "tomorrow", "today", "next week", "asap", "it's important", "urgent",
+              "after work", "before the standup", "if there is time"]
+    return [f"{rng.choice(verbs)} {rng.choice(objects)} {rng.choice(extras)} {rng.choice(extras)}".strip()
+            for _ in range(count)]
+
+
+def bench_tagger():
+    """Task tagging: throughput over 100k synthetic task texts"""
+    texts = sample_task_texts(100_000)
+    tagger = get_default_tagger()
+
+    for name, func in (("legacy in-checks", lambda: [legacy_tag(t) for t in texts]),
+                       ("compiled tagger", lambda: tagger.tag_many(texts)),
+                       ("parse_many (Task objects)", lambda: AITaskParser.parse_many(texts))):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        print(f"   {name:<26} {len(texts) / elapsed:10,.0f} texts/s  {elapsed * 1e6 / len(texts):6.2f} µs/text")
+
+
+def bench_dates():
+    """Due-date parsing: time per call with and without the memo cache"""
+    texts = sample_task_texts(2_000) + [
+        "Finish the report by Friday at 5pm", "Dentist on 14/3 at 10:30", "Pay rent end of month",
+        "Renew passport in 3 weeks", "Call Rohan day after tomorrow", "Submit taxes April 15th",
+    ]
+    for name, parser in (("uncached", DueDateParser(cache_size=0)), ("memoized", DueDateParser())):
+        found = sum(parser.parse(text) is not None for text in texts)
+        per_call = time_per_call(parser.parse, texts, repeat=20)
+        print(f"   {name:<10} {per_call:6.2f} µs/call  ({found}/{len(texts)} texts had a date)")
+
+
+def sample_commands(count, seed=11):
+    """Replayed-log style commands that don't need the LLM: mostly task capture"""
+    rng = random.Random(seed)
+    texts = sample_task_texts(count, seed)
+    others = ["Show my tasks", "Hello", "What can you do?", "Find my report tasks", "Show urgent tasks"]
+    return [f"Add task: {text}" if rng.random() < 0.8 else rng.choice(others) for text in texts]
+
+
+def bench_batch():
+    """Assistant throughput: process_input per item vs process_batch on 1000 commands"""
+    from ai_assistant import MemoryMateAssistant
+
+    commands = sample_commands(1_000)
+    for name in ("process_input", "process_batch"):
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "bench.db"))
+        start = time.perf_counter()
+        if name == "process_batch":
+            assistant.process_batch(commands)
+        else:
+            for command in commands:
+                assistant.process_input(command)
+        elapsed = time.perf_counter() - start
+        assistant.close()
+        print(f"   {name:<14} {len(commands) / elapsed:8,.0f} commands/s")
+
+
+def bench_vad_buffer():
+    """VAD capture buffer: one minute of 30 ms blocks, then the utterance as an array"""
+    sample_rate, frame = 16000, 480
+    blocks = [np.random.default_rng(3).integers(-3000, 3000, frame, dtype=np.int16)] * (60 * sample_rate // frame)
+
+    def with_deque():
+        buffer = deque()
+        for block in blocks:
+            buffer.extend(block)
+        return np.array(list(buffer), dtype=np.int16)
+
+    def with_ring():
+        buffer = AudioRingBuffer(sample_rate * 10)
+        buffer.reserve(60 * sample_rate)
+        for block in blocks:
+            buffer.append(block)
+        return buffer.view()
+
+    for name, func in (("deque of ints", with_deque), ("numpy ring", with_ring)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        per_block = elapsed / len(blocks) * 1e6
+        print(f"   {name:<14} {per_block:6.2f} µs/block  {elapsed * 1000:7.1f} ms total  peak {peak / 1e6:6.1f} MB")
+
+
+def misspell(text, rng):
+    """Drop one letter from each of up to two words, like a misheard reference"""
+    words = text.split()
+    for i in rng.sample(range(len(words)), min(2, len(words))):
+        if len(words[i]) > 3:
+            cut = rng.randrange(1, len(words[i]))
+            words[i] = words[i][:cut - 1] + words[i][cut:]
+    return " ".join(words)
+
+
+def bench_fuzzy():
+    """Fuzzy title lookup: trigram index vs a scan of every title, 100k titles"""
+    rng = random.Random(5)
+    titles = [f"{text} #{i}" for i, text in enumerate(sample_task_texts(100_000))]
+    queries = [misspell(rng.choice(titles).rsplit(" #", 1)[0], rng) for _ in range(50)]
+
+    start = time.perf_counter()
+    index = TrigramIndex()
+    for doc_id, title in enumerate(titles):
+        index.add(doc_id, title)
+    print(f"   build index     {time.perf_counter() - start:8.2f} s for {len(titles):,} titles")
+
+    title_grams = [trigrams(title) for title in titles]
+
+    def scan(query):
+        query_grams = trigrams(query)
+        scored = [(len(query_grams & grams) / len(query_grams), doc_id) for doc_id, grams in enumerate(title_grams)]
+        return [doc_id for _, doc_id in sorted(scored, reverse=True)[:5]]
+
+    for name, func in (("linear scan", scan), ("trigram index", lambda q: index.search(q, k=5))):
+        per_call = time_per_call(func, queries, repeat=1)
+        print(f"   {name:<15} {per_call / 1000:8.2f} ms/query")
+
+
+BENCHMARKS = {
+    "intent": bench_intent,
+    "tagger": bench_tagger,
+    "dates": bench_dates,
+    "batch": bench_batch,
+    "fuzzy": bench_fuzzy,
+    "vad_buffer": bench_vad_buffer,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+
+        print(f"\n⏱️  {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
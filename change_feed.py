@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+# Entries kept when the log is trimmed; consumers further behind than this reload instead of replaying
+CHANGE_LOG_RETENTION = 10000
+
+@dataclass
+class Change:
+    seq: int
+    entity: str
+    entity_id: int
+    op: str
+    changed_at: str
+
+
+def ensure_change_log(cursor, table: str, entity: str):
+    """Create the change_log table and the triggers that feed it from `table`.
+
+    Triggers capture every write to the table, from any connection, in the same
+    transaction as the write itself. AUTOINCREMENT keeps sequence numbers
+    strictly increasing even after old entries are pruned.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_entity ON change_log(entity, seq)")
+
+    for op, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_change_{op} AFTER {op.upper()} ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, entity_id, op) VALUES ('{entity}', {row}.id, '{op}');
+            END
+        """)
+
+
+class ChangeFeed:
+    """Read side of the change log: what changed since a sequence number"""
+
+    def __init__(self, db_path: str = "memorymate.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def latest_seq(self, entity: Optional[str] = None) -> int:
+        """Highest sequence number written so far (0 if none)"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                if entity:
+                    cursor.execute("SELECT MAX(seq) FROM change_log WHERE entity = ?", (entity,))
+                else:
+                    cursor.execute("SELECT MAX(seq) FROM change_log")
+                return cursor.fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                # No table has created the change log yet
+                return 0
+            finally:
+                conn.close()
+
+    def changes_since(self, seq: int, entity: Optional[str] = None, limit: int = 1000) -> List[Change]:
+        """Changes with a sequence number greater than `seq`, oldest first"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                if entity:
+                    cursor.execute(
+                        "SELECT seq, entity, entity_id, op, changed_at FROM change_log "
+                        "WHERE entity = ? AND seq > ? ORDER BY seq LIMIT ?",
+                        (entity, seq, limit)
+                    )
+                else:
+                    cursor.execute(
+                        "SELECT seq, entity, entity_id, op, changed_at FROM change_log "
+                        "WHERE seq > ? ORDER BY seq LIMIT ?",
+                        (seq, limit)
+                    )
+                return [Change(*row) for row in cursor.fetchall()]
+            except sqlite3.OperationalError:
+                return []
+            finally:
+                conn.close()
+
+    def covers(self, seq: int) -> bool:
+        """Whether every change after `seq` is still in the log, i.e. none were pruned"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT MIN(seq) FROM change_log")
+                oldest = cursor.fetchone()[0]
+                return oldest is None or seq >= oldest - 1
+            except sqlite3.OperationalError:
+                return True
+            finally:
+                conn.close()
+
+    def trim(self, keep: Optional[int] = None) -> int:
+        """Prune all but the newest `keep` entries (CHANGE_LOG_RETENTION by default)"""
+        keep = CHANGE_LOG_RETENTION if keep is None else keep
+        return self.prune(self.latest_seq() - keep + 1)
+
+    def prune(self, before_seq: int) -> int:
+        """Drop entries older than `before_seq` once every consumer has read them"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM change_log WHERE seq < ?", (before_seq,))
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+
+
+def collapse_changes(changes: List[Change]) -> Tuple[int, Dict[int, str]]:
+    """Reduce a batch of changes to the last op per entity id, plus the highest seq seen"""
+    last_seq = 0
+    latest_ops = {}
+    for change in changes:
+        last_seq = max(last_seq, change.seq)
+        latest_ops[change.entity_id] = change.op
+    return last_seq, latest_ops
@@ -0,0 +1,165 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+SYSTEM_PROMPT = (
+    "You are MemoryMate, a friendly offline productivity assistant. "
+    "Answer briefly and use what you remember about the user when it helps."
+)
+
+# "User: " / "Assistant: " labels and the line break each turn adds
+TURN_OVERHEAD_TOKENS = 3
+
+
+def approximate_tokens(text: str) -> List[str]:
+    """Words and punctuation marks: close enough to LLaMA token counts for budgeting"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+MEMORY_HEADER = "Relevant memories:"
+
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    tokens: int
+    # Memories shown to the model just before this turn, kept so the turn renders as it was prompted
+    context: str = ""
+
+    def render(self) -> str:
+        line = f"{self.role.capitalize()}: {self.content}"
+        return f"{self.context}\n{line}" if self.context else line
+
+
+class ConversationHistory:
+    """Ring buffer of the last `max_turns` messages.
+
+    Each message is tokenized once, when it is appended, so building a context
+    window never re-tokenizes old turns. Iterates as {"role", "content"} dicts
+    like the list it replaces.
+    """
+
+    def __init__(self, max_turns: int = 50,
+                 tokenizer: Callable[[str], Sequence] = approximate_tokens):
+        self.max_turns = max_turns
+        self.tokenizer = tokenizer
+        self._turns: deque = deque(maxlen=max_turns)
+
+    def append(self, message: Dict[str, str]):
+        content = message["content"]
+        self._turns.append(Turn(message["role"], content, len(self.tokenizer(content)) + TURN_OVERHEAD_TOKENS))
+
+    def set_context(self, index: int, context: str):
+        """Record the memories the model was shown with a turn (counted in its tokens)"""
+        turn = self._turns[index]
+        tokens = len(self.tokenizer(turn.content)) + TURN_OVERHEAD_TOKENS
+        if context:
+            tokens += len(self.tokenizer(context))
+        self._turns[index] = Turn(turn.role, turn.content, tokens, context)
+
+    def turns(self) -> List[Turn]:
+        return list(self._turns)
+
+    def clear(self):
+        self._turns.clear()
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return ({"role": turn.role, "content": turn.content} for turn in list(self._turns))
+
+    def __getitem__(self, index: int) -> Dict[str, str]:
+        turn = self._turns[index]
+        return {"role": turn.role, "content": turn.content}
+
+
+class ContextBuilder:
+    """Assemble an LLM prompt from recalled memories and recent turns within a token budget.
+
+    The system prompt is tokenized once and memory texts through an LRU, so a
+    turn only tokenizes text it has not seen before. Memories get at most
+    `memory_tokens` (and `top_k` entries); the most recent turns fill the rest,
+    oldest dropped first.
+
+    The memories for a turn go right before its "User:" line and are recorded
+    with that turn in the history, so later prompts render the turn exactly as
+    the model saw it: each prompt starts with the previous prompt and reply,
+    which the LLM worker keeps evaluated between turns.
+    """
+
+    def __init__(self, budget_tokens: int = 1024, memory_tokens: int = 256, top_k: int = 3,
+                 system_prompt: str = SYSTEM_PROMPT,
+                 tokenizer: Callable[[str], Sequence] = approximate_tokens):
+        self.budget_tokens = budget_tokens
+        self.memory_tokens = memory_tokens
+        self.top_k = top_k
+        self.system_prompt = system_prompt
+        self.tokenizer = tokenizer
+        self._system_tokens = len(tokenizer(system_prompt))
+        self._count_tokens = lru_cache(maxsize=1024)(lambda text: len(tokenizer(text)))
+
+    def build(self, user_input: str, history: Optional[ConversationHistory] = None,
+              memories: Sequence[str] = ()) -> str:
+        return self.build_with_prefix(user_input, history, memories)[0]
+
+    def build_with_prefix(self, user_input: str, history: Optional[ConversationHistory] = None,
+                          memories: Sequence[str] = ()) -> Tuple[str, str]:
+        """The prompt and its reusable prefix (system prompt and earlier turns).
+
+        If `history` already ends with this input, the memories used are
+        recorded with it (see ConversationHistory.set_context).
+        """
+        turns = history.turns() if history is not None else []
+        input_recorded = bool(turns) and turns[-1].role == "user" and turns[-1].content == user_input
+        if input_recorded:
+            # process_input records the input before answering it
+            turns.pop()
+
+        remaining = (self.budget_tokens - self._system_tokens
+                     - self._count_tokens(user_input) - 2 * TURN_OVERHEAD_TOKENS)
+
+        # Memories are logged as "User: ..." / "Assistant: ..."; skip the turns already shown
+        shown = {f"{turn.role.capitalize()}: {turn.content}" for turn in turns}
+        shown.add(f"User: {user_input}")
+        # ... and the memories earlier turns were already shown with
+        shown.update(line[2:] for turn in turns for line in turn.context.splitlines()[1:])
+        memory_lines = []
+        memory_budget = min(self.memory_tokens, remaining)
+        for memory in memories:
+            if len(memory_lines) == self.top_k:
+                break
+            if memory in shown:
+                continue
+            # "- " marker, plus the header line for the first memory
+            cost = self._count_tokens(memory) + 1
+            if not memory_lines:
+                cost += self._count_tokens(MEMORY_HEADER)
+            if cost > memory_budget:
+                break
+            memory_lines.append(f"- {memory}")
+            memory_budget -= cost
+            remaining -= cost
+
+        kept: List[Turn] = []
+        for turn in reversed(turns):
+            if turn.tokens > remaining:
+                break
+            kept.append(turn)
+            remaining -= turn.tokens
+
+        context = "\n".join([MEMORY_HEADER] + memory_lines) if memory_lines else ""
+        if input_recorded:
+            history.set_context(-1, context)
+
+        dialogue = [turn.render() for turn in reversed(kept)]
+        prefix = self.system_prompt + ("\n\n" + "\n".join(dialogue) if dialogue else "")
+        current = Turn("user", user_input, 0, context).render()
+        prompt = self.system_prompt + "\n\n" + "\n".join(dialogue + [current, "Assistant:"])
+        return prompt, prefix
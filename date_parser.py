@@ -0,0 +1,214 @@
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from intent_classifier import phrase_pattern
+
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "tues": 1, "wednesday": 2, "thursday": 3, "thurs": 3,
+    "friday": 4, "fri": 4, "saturday": 5, "sunday": 6,
+}
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+_WEEKDAY = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+# "may" is only a month when a day number follows it ("May 5", not "5 may be late")
+_MONTH_AFTER_DAY = "|".join(sorted((name for name in MONTHS if name != "may"), key=len, reverse=True))
+_COUNT = r"\d{1,3}|" + "|".join(NUMBER_WORDS)
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+# One alternation; the outer group name says which rule matched (m.lastgroup)
+DATE_PATTERN = re.compile(rf"""\b(?:
+    (?P<iso>(?P<iso_y>\d{{4}})-(?P<iso_m>\d{{1,2}})-(?P<iso_d>\d{{1,2}}))
+  | (?P<numeric>(?P<num_a>\d{{1,2}})/(?P<num_b>\d{{1,2}})(?:/(?P<num_y>\d{{4}}|\d{{2}}))?)
+  | (?P<month_day>(?P<md_m>{_MONTH})\.?\s+(?P<md_d>\d{{1,2}}){_ORDINAL}(?:,?\s+(?P<md_y>\d{{4}}))?)
+  | (?P<day_month>(?P<dm_d>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?(?P<dm_m>{_MONTH_AFTER_DAY})\.?(?:,?\s+(?P<dm_y>\d{{4}}))?)
+  | (?P<day_after>day\s+after\s+tomorrow)
+  | (?P<tomorrow>tomorrow|tmrw)
+  | (?P<today>today|tonight|this\s+(?:morning|afternoon|evening)|end\s+of\s+(?:the\s+)?day|eod)
+  | (?P<relative>in\s+(?P<rel_n>{_COUNT})\s+(?P<rel_unit>day|week|month)s?)
+  | (?P<end_of>end\s+of\s+(?:the\s+)?(?P<end_unit>week|month|year))
+  | (?P<next_unit>next\s+(?P<next_u>week|month|year))
+  | (?P<weekend>(?:this\s+|next\s+)?weekend)
+  | (?P<weekday>(?:(?P<wd_mod>this|next|coming)\s+)?(?P<wd>{_WEEKDAY}))
+)\b""", re.VERBOSE)
+
+TIME_PATTERN = re.compile(r"""\b(?:
+    (?P<clock>(?:at\s+)?(?P<c_h>\d{1,2}):(?P<c_m>\d{2})\s*(?P<c_mer>[ap]\.?m\.?)?)
+  | (?P<meridiem>(?:at\s+)?(?P<m_h>\d{1,2})\s*(?P<m_mer>[ap]\.?m\.?))
+  | (?P<at_hour>at\s+(?P<a_h>\d{1,2})(?![\d/.:-]))
+  | (?P<noon>noon|midday)
+  | (?P<midnight>midnight)
+)(?!\w)""", re.VERBOSE)
+
+# Every rule above starts with a digit or one of these words. Scanning for them
+# and anchoring the full patterns there is several times faster than searching
+# the whole alternation at every position.
+TRIGGER_WORDS = ["today", "tonight", "this", "end", "eod", "tomorrow", "tmrw", "day", "in", "next",
+                 "coming", "weekend", "at", "noon", "midday", "midnight", *WEEKDAYS, *MONTHS]
+TRIGGER_PATTERN = re.compile(rf"\b(?:\d|(?:{phrase_pattern(TRIGGER_WORDS)})\b)")
+
+
+@dataclass(frozen=True)
+class DueDate:
+    date: date
+    time: Optional[time] = None
+
+    def isoformat(self) -> str:
+        """'YYYY-MM-DD', or 'YYYY-MM-DDTHH:MM' when a time was given"""
+        if self.time is None:
+            return self.date.isoformat()
+        return f"{self.date.isoformat()}T{self.time.strftime('%H:%M')}"
+
+
+class DueDateParser:
+    """Rule-based parser for due dates in task text ("by Friday at 5pm", "in 3 days").
+
+    Patterns are compiled once at import, and results are memoized per
+    (lowercased text, reference date), so repeated phrases cost a dict lookup.
+    A weekday means the coming one ("friday" on a Friday is today) and "next
+    friday" the one a week after that; numeric dates are day-first unless `day_first`
+    is False, and dates without a year roll over to next year once past.
+    """
+
+    def __init__(self, day_first: bool = True, cache_size: int = 4096):
+        self.day_first = day_first
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, text: str, reference: Optional[date] = None) -> Optional[DueDate]:
+        """First date/time expression in `text` relative to `reference` (default today)"""
+        if reference is None:
+            reference = date.today()
+        elif isinstance(reference, datetime):
+            reference = reference.date()
+        return self._parse_cached(text.lower(), reference)
+
+    def cache_info(self):
+        return self._parse_cached.cache_info()
+
+    def _parse(self, text: str, reference: date) -> Optional[DueDate]:
+        date_match = time_match = None
+        for trigger in TRIGGER_PATTERN.finditer(text):
+            start = trigger.start()
+            if date_match is None:
+                date_match = DATE_PATTERN.match(text, start)
+            if time_match is None:
+                time_match = TIME_PATTERN.match(text, start)
+            if date_match is not None and time_match is not None:
+                break
+
+        due_time = _resolve_time(time_match) if time_match else None
+
+        due_date = None
+        if date_match:
+            try:
+                due_date = self._resolve_date(date_match, reference)
+            except ValueError:
+                # Impossible dates such as 31/02
+                due_date = None
+        if due_date is None:
+            if due_time is None:
+                return None
+            due_date = reference
+        return DueDate(due_date, due_time)
+
+    def _resolve_date(self, m, ref: date) -> Optional[date]:
+        rule = m.lastgroup
+        if rule == "iso":
+            return date(int(m["iso_y"]), int(m["iso_m"]), int(m["iso_d"]))
+        if rule == "numeric":
+            a, b = int(m["num_a"]), int(m["num_b"])
+            day, month = (a, b) if self.day_first else (b, a)
+            if month > 12 and day <= 12:
+                day, month = month, day
+            return _with_year(ref, month, day, m["num_y"])
+        if rule == "month_day":
+            return _with_year(ref, MONTHS[m["md_m"]], int(m["md_d"]), m["md_y"])
+        if rule == "day_month":
+            return _with_year(ref, MONTHS[m["dm_m"]], int(m["dm_d"]), m["dm_y"])
+        if rule == "day_after":
+            return ref + timedelta(days=2)
+        if rule == "tomorrow":
+            return ref + timedelta(days=1)
+        if rule == "today":
+            return ref
+        if rule == "relative":
+            count = m["rel_n"]
+            count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+            unit = m["rel_unit"]
+            if unit == "month":
+                return _add_months(ref, count)
+            return ref + timedelta(days=count * (7 if unit == "week" else 1))
+        if rule == "end_of":
+            unit = m["end_unit"]
+            if unit == "week":
+                return ref + timedelta(days=(4 - ref.weekday()) % 7)
+            if unit == "month":
+                return ref.replace(day=calendar.monthrange(ref.year, ref.month)[1])
+            return ref.replace(month=12, day=31)
+        if rule == "next_unit":
+            unit = m["next_u"]
+            if unit == "week":
+                return ref + timedelta(days=7)
+            return _add_months(ref, 1 if unit == "month" else 12)
+        if rule == "weekend":
+            return ref + timedelta(days=(5 - ref.weekday()) % 7)
+        if rule == "weekday":
+            days_ahead = (WEEKDAYS[m["wd"]] - ref.weekday()) % 7
+            if m["wd_mod"] == "next":
+                days_ahead += 7
+            return ref + timedelta(days=days_ahead)
+        return None
+
+
+def _resolve_time(m) -> Optional[time]:
+    rule = m.lastgroup
+    if rule == "noon":
+        return time(12, 0)
+    if rule == "midnight":
+        return time(0, 0)
+    if rule == "clock":
+        hour, minute, meridiem = int(m["c_h"]), int(m["c_m"]), m["c_mer"]
+        # "07:30" is written 24-hour style, so only an unpadded hour gets the afternoon rule
+        afternoon_rule = not meridiem and not m["c_h"].startswith("0")
+    elif rule == "meridiem":
+        hour, minute, meridiem = int(m["m_h"]), 0, m["m_mer"]
+        afternoon_rule = False
+    else:
+        hour, minute, meridiem = int(m["a_h"]), 0, None
+        afternoon_rule = True
+    # "at 5" or "3:30" with no am/pm: office hours, so 1-7 mean the afternoon
+    if afternoon_rule and 1 <= hour <= 7:
+        hour += 12
+
+    if meridiem:
+        if hour > 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def _with_year(ref: date, month: int, day: int, year: Optional[str]) -> date:
+    if year:
+        year_number = int(year)
+        return date(year_number + 2000 if year_number < 100 else year_number, month, day)
+    candidate = date(ref.year, month, day)
+    return candidate if candidate >= ref else date(ref.year + 1, month, day)
+
+
+def _add_months(ref: date, months: int) -> date:
+    month_index = ref.month - 1 + months
+    year, month = ref.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(ref.day, calendar.monthrange(year, month)[1]))
@@ -0,0 +1,105 @@
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from engine_server import EngineUnavailable
+
+
+class EngineError(RuntimeError):
+    """An engine command ran but exited with an error"""
+
+    def __init__(self, argv: List[str], returncode: int, stderr: str):
+        self.argv = argv
+        self.returncode = returncode
+        self.stderr = stderr
+        tail = " | ".join(stderr.strip().splitlines()[-3:]) or "no error output"
+        super().__init__(f"{argv[0]} exited with code {returncode}: {tail}")
+
+
+@dataclass
+class EngineResult:
+    argv: List[str]
+    returncode: int
+    stdout: bytes
+    stderr: str
+    seconds: float
+
+    @property
+    def text(self) -> str:
+        return self.stdout.decode("utf-8", "replace").strip()
+
+
+class EngineRunner:
+    """Runs one-shot engine commands (whisper.cpp, llama.cpp, system TTS) as child processes.
+
+    Commands are argument lists, never shell strings, so text with quotes or
+    `$` reaches the engine unchanged. Input goes in on stdin and output comes
+    back on pipes instead of temp files. At most `max_concurrent` commands run
+    at once; the rest wait their turn.
+    """
+
+    def __init__(self, max_concurrent: int = 2, timeout: float = 120.0):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def run(self, argv: List[str], input: Optional[bytes] = None, timeout: Optional[float] = None,
+            check: bool = True) -> EngineResult:
+        """Run `argv` to completion and return its output.
+
+        Raises EngineUnavailable if the program cannot be started, TimeoutError
+        if it runs (or waits to run) past `timeout`, and EngineError if it exits
+        non-zero and `check` is set.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"{argv[0]} did not get to run within {timeout:.0f}s")
+        try:
+            started = time.monotonic()
+            completed = subprocess.run(
+                argv, input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                stdin=None if input is not None else subprocess.DEVNULL,
+                timeout=max(deadline - started, 0.001),
+            )
+        except subprocess.TimeoutExpired:
+            # subprocess.run has already killed the process
+            raise TimeoutError(f"{argv[0]} timed out after {timeout:.0f}s") from None
+        except OSError as e:
+            raise EngineUnavailable(f"Could not run {argv[0]}: {e}") from e
+        finally:
+            self._slots.release()
+
+        stderr = completed.stderr.decode("utf-8", "replace")
+        if check and completed.returncode != 0:
+            raise EngineError(list(argv), completed.returncode, stderr)
+        return EngineResult(list(argv), completed.returncode, completed.stdout, stderr,
+                            time.monotonic() - started)
+
+
+_default_runner: Optional[EngineRunner] = None
+_default_runner_lock = threading.Lock()
+
+
+def get_engine_runner() -> EngineRunner:
+    """The process-wide runner, so all engines share one concurrency limit"""
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = EngineRunner()
+        return _default_runner
+
+
+def run_engine(argv: List[str], input: Optional[bytes] = None, timeout: Optional[float] = None,
+               check: bool = True) -> EngineResult:
+    return get_engine_runner().run(argv, input=input, timeout=timeout, check=check)
+
+
+def supports_option(program: str, option: str, timeout: float = 10.0) -> bool:
+    """Whether `program --help` lists `option`; False if the program cannot be run"""
+    try:
+        result = run_engine([program, "--help"], timeout=timeout, check=False)
+    except (EngineUnavailable, TimeoutError):
+        return False
+    return option in result.text or option in result.stderr
@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Iterator, List, Optional
+
+
+class EngineUnavailable(RuntimeError):
+    """The engine server could not be started or stopped answering"""
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class ManagedServer:
+    """An inference engine's HTTP server (llama.cpp, whisper.cpp) run as a local child process.
+
+    The process is started on first use and keeps its model loaded between
+    requests. If it exits, the next request restarts it, up to `max_restarts`
+    times within `restart_window` seconds. Its output goes to a log file whose
+    tail is included in startup errors.
+    """
+
+    def __init__(self, name: str, argv: List[str], host: str = "127.0.0.1",
+                 port: Optional[int] = None, health_path: str = "/health",
+                 startup_timeout: float = 120.0, max_restarts: int = 3,
+                 restart_window: float = 300.0, log_path: Optional[str] = None):
+        self.name = name
+        self.argv = list(argv)
+        self.host = host
+        self.port = port
+        self.health_path = health_path
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.log_path = log_path or os.path.join(tempfile.gettempdir(), f"memorymate-{name}.log")
+        self._process: Optional[subprocess.Popen] = None
+        self._restarts: List[float] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Process id of the running server; changes when it is restarted"""
+        return self._process.pid if self.running else None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start the server if it is not running and wait until it is ready"""
+        with self._lock:
+            if self.running:
+                return
+            if self._process is not None:
+                self._note_restart()
+            self._spawn()
+
+    def stop(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def request(self, path: str, payload: Optional[Dict] = None, timeout: Optional[float] = None,
+                data: Optional[bytes] = None, content_type: str = "application/json") -> Dict:
+        """POST `payload` (or raw `data`) to the server and return the decoded JSON reply"""
+        with self._open(path, payload, timeout, data, content_type) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def stream(self, path: str, payload: Dict, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """POST `payload` and yield each server-sent event's JSON data.
+
+        Closing the generator closes the connection, which makes the server
+        stop the request.
+        """
+        with self._open(path, payload, timeout) as response:
+            for raw_line in response:
+                line = raw_line.decode("utf-8").strip()
+                if line.startswith("data:"):
+                    line = line[len("data:"):].strip()
+                    if line and line != "[DONE]":
+                        yield json.loads(line)
+
+    def _open(self, path, payload, timeout, data=None, content_type="application/json"):
+        self.start()
+        body = data if data is not None else json.dumps(payload or {}).encode("utf-8")
+        request = urllib.request.Request(self.base_url + path, data=body,
+                                         headers={"Content-Type": content_type})
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", "replace")[:500]
+            raise EngineUnavailable(f"{self.name} returned HTTP {e.code}: {detail}") from e
+        except (urllib.error.URLError, ConnectionError) as e:
+            if not self._exited():
+                raise EngineUnavailable(f"{self.name} did not answer: {e}") from e
+            # The process died: restart it and try the request once more
+            self.start()
+            try:
+                return urllib.request.urlopen(request, timeout=timeout)
+            except (urllib.error.URLError, ConnectionError) as retry_error:
+                raise EngineUnavailable(f"{self.name} did not answer: {retry_error}") from retry_error
+
+    def _exited(self, grace: float = 0.5) -> bool:
+        """Whether the process has exited, giving one that just dropped a connection `grace` seconds to go"""
+        process = self._process
+        if process is None:
+            return True
+        try:
+            process.wait(timeout=grace)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def _note_restart(self):
+        now = time.monotonic()
+        self._restarts = [t for t in self._restarts if now - t < self.restart_window] + [now]
+        if len(self._restarts) > self.max_restarts:
+            raise EngineUnavailable(
+                f"{self.name} crashed {len(self._restarts)} times in {self.restart_window:.0f}s; "
+                f"see {self.log_path}"
+            )
+        print(f"⚠️  {self.name} exited (code {self._process.returncode}), restarting...")
+
+    def _spawn(self):
+        if self.port is None:
+            self.port = free_port(self.host)
+        argv = self.argv + ["--host", self.host, "--port", str(self.port)]
+        try:
+            with open(self.log_path, "ab") as log:
+                self._process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=log,
+                                                 stderr=subprocess.STDOUT)
+        except OSError as e:
+            self._process = None
+            raise EngineUnavailable(f"Could not start {self.name} ({argv[0]}): {e}") from e
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise EngineUnavailable(f"{self.name} exited during startup: {self._log_tail()}")
+            try:
+                with urllib.request.urlopen(self.base_url + self.health_path, timeout=2):
+                    return
+            except (urllib.error.URLError, ConnectionError, OSError):
+                # Not listening yet, or still loading the model (HTTP 503)
+                time.sleep(0.2)
+
+        self._process.kill()
+        self._process.wait()
+        raise EngineUnavailable(f"{self.name} was not ready after {self.startup_timeout:.0f}s: {self._log_tail()}")
+
+    def _log_tail(self, lines: int = 5) -> str:
+        try:
+            with open(self.log_path, "r", errors="replace") as f:
+                return " | ".join(line.strip() for line in f.readlines()[-lines:])
+        except OSError:
+            return "no log output"
@@ -0,0 +1,231 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from scheduler import DeadlineScheduler
+
+
+POMODORO_MINUTES = 25
+BREAK_MINUTES = 5
+SNOOZE_MINUTES = 60
+
+COMPLETION_MESSAGES = {
+    "pomodoro": "Time's up! Take a break or continue working.",
+    "break": "Break time is over! Let's get back to work.",
+    "snooze": "Snooze is over. Time to get back to {label}.",
+}
+
+
+@dataclass
+class FocusSession:
+    id: int
+    kind: str
+    label: str
+    task_id: Optional[int]
+    duration_seconds: float
+    remaining_seconds: float
+    state: str
+    ends_at: Optional[float]
+    started_at: str
+
+    def seconds_left(self) -> float:
+        """Seconds until the session ends, accounting for pauses"""
+        if self.state == "running" and self.ends_at is not None:
+            return max(0.0, self.ends_at - time.time())
+        return self.remaining_seconds
+
+
+def default_announce(session: FocusSession, message: str):
+    """Print and speak a timer completion"""
+    print(f"\n⏰ {message}")
+    try:
+        from tts import speak_text
+        # Queued for the speaker thread, so the shared scheduler thread is not held up
+        speak_text(message, block=False)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+
+
+class FocusTimerService:
+    """Pomodoro, break and snooze timers that run alongside the menu.
+
+    Timers fire from a shared DeadlineScheduler thread, so starting one never
+    blocks input. Session state is stored in SQLite and restored on start.
+    """
+
+    def __init__(self, db_path: str = "memorymate.db",
+                 scheduler: Optional[DeadlineScheduler] = None,
+                 announce: Callable[[FocusSession, str], None] = default_announce,
+                 on_start: Optional[Callable[[FocusSession], None]] = None,
+                 on_complete: Optional[Callable[[FocusSession], None]] = None):
+        self.db_path = db_path
+        self.scheduler = scheduler or DeadlineScheduler("memorymate-timers")
+        self.announce = announce
+        self.on_start = on_start
+        self.on_complete = on_complete
+        self._owns_scheduler = scheduler is None
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS focus_sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        label TEXT,
+                        task_id INTEGER,
+                        duration_seconds REAL NOT NULL,
+                        remaining_seconds REAL NOT NULL,
+                        state TEXT NOT NULL,
+                        ends_at REAL,
+                        started_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_focus_sessions_state ON focus_sessions(state)")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def start(self):
+        """Restore unfinished sessions and start the scheduler thread"""
+        for session in self.active_sessions():
+            if session.state == "running":
+                self._arm(session)
+        self.scheduler.start()
+
+    def stop(self):
+        """Stop firing timers; running sessions resume on the next start()"""
+        for session in self.active_sessions():
+            self.scheduler.cancel(('focus', session.id))
+        if self._owns_scheduler:
+            self.scheduler.stop()
+
+    def start_session(self, kind: str, minutes: float, label: str = "",
+                      task_id: Optional[int] = None) -> FocusSession:
+        """Start a timer of `minutes` and return immediately"""
+        duration = minutes * 60
+        ends_at = time.time() + duration
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """INSERT INTO focus_sessions
+                       (kind, label, task_id, duration_seconds, remaining_seconds, state, ends_at, started_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, 'running', ?, ?, ?)""",
+                    (kind, label, task_id, duration, duration, ends_at, now, now)
+                )
+                conn.commit()
+                session_id = cursor.lastrowid
+            finally:
+                conn.close()
+
+        session = FocusSession(session_id, kind, label, task_id, duration, duration, "running", ends_at, now)
+        self._arm(session)
+        if self.on_start:
+            self.on_start(session)
+        return session
+
+    def start_pomodoro(self, label: str = "", task_id: Optional[int] = None) -> FocusSession:
+        return self.start_session("pomodoro", POMODORO_MINUTES, label, task_id)
+
+    def start_break(self) -> FocusSession:
+        return self.start_session("break", BREAK_MINUTES, "break")
+
+    def snooze_task(self, label: str, task_id: Optional[int] = None,
+                    minutes: float = SNOOZE_MINUTES) -> FocusSession:
+        """Remind about a task again after `minutes`"""
+        return self.start_session("snooze", minutes, label, task_id)
+
+    def pause(self, session_id: int) -> bool:
+        session = self.get_session(session_id)
+        if not session or session.state != "running":
+            return False
+
+        self.scheduler.cancel(('focus', session_id))
+        self._update_state(session_id, "paused", session.seconds_left(), None)
+        return True
+
+    def resume(self, session_id: int) -> bool:
+        session = self.get_session(session_id)
+        if not session or session.state != "paused":
+            return False
+
+        session.ends_at = time.time() + session.remaining_seconds
+        session.state = "running"
+        self._update_state(session_id, "running", session.remaining_seconds, session.ends_at)
+        self._arm(session)
+        return True
+
+    def cancel(self, session_id: int) -> bool:
+        session = self.get_session(session_id)
+        if not session or session.state not in ("running", "paused"):
+            return False
+
+        self.scheduler.cancel(('focus', session_id))
+        self._update_state(session_id, "cancelled", session.seconds_left(), None)
+        return True
+
+    def get_session(self, session_id: int) -> Optional[FocusSession]:
+        rows = self._query("WHERE id = ?", (session_id,))
+        return rows[0] if rows else None
+
+    def active_sessions(self) -> List[FocusSession]:
+        """Running and paused sessions, oldest first"""
+        return self._query("WHERE state IN ('running', 'paused') ORDER BY id", ())
+
+    def _arm(self, session: FocusSession):
+        self.scheduler.schedule(('focus', session.id), session.ends_at,
+                                lambda: self._complete(session.id))
+
+    def _complete(self, session_id: int):
+        session = self.get_session(session_id)
+        if not session or session.state != "running":
+            return
+
+        self._update_state(session_id, "completed", 0.0, session.ends_at)
+        session.state = "completed"
+        session.remaining_seconds = 0.0
+
+        message = COMPLETION_MESSAGES.get(session.kind, "Timer complete!").format(label=session.label)
+        self.announce(session, message)
+        if self.on_complete:
+            self.on_complete(session)
+
+    def _update_state(self, session_id: int, state: str, remaining: float, ends_at: Optional[float]):
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                conn.execute(
+                    "UPDATE focus_sessions SET state = ?, remaining_seconds = ?, ends_at = ?, updated_at = ? WHERE id = ?",
+                    (state, remaining, ends_at, datetime.now().isoformat(), session_id)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _query(self, where: str, params: tuple) -> List[FocusSession]:
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, kind, label, task_id, duration_seconds, remaining_seconds, state, ends_at, started_at "
+                    f"FROM focus_sessions {where}",
+                    params
+                )
+                return [FocusSession(*row) for row in cursor.fetchall()]
+            finally:
+                conn.close()
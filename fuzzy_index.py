@@ -0,0 +1,126 @@
+import heapq
+import math
+import re
+import threading
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Word-padded character trigrams, so short words and word boundaries still match"""
+    grams = set()
+    for word in _WORD_PATTERN.findall(text.lower()):
+        # One leading space only: "  x" grams would have huge posting lists
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """Inverted trigram index for fuzzy matching of short texts such as task titles.
+
+    Scores favour how much of the query is found in a document (spoken
+    references are usually a fragment of the title), with Dice similarity as a
+    tie-breaker. Only the rarest query trigrams gather candidates: a document
+    covering `min_score` of the query must contain at least one of them.
+
+    When those trigrams are so common that they would gather more than
+    `max_candidates` documents, candidates are instead narrowed to documents
+    sharing the query's rarer trigrams, intersecting postings rarest first
+    while at least `k` documents remain. That keeps a lookup bounded on large
+    indexes at the cost of exactness: a document missing one of the
+    narrowing trigrams is not considered.
+    """
+
+    def __init__(self, max_candidates: int = 128):
+        self.max_candidates = max_candidates
+        self._postings: Dict[str, Set[int]] = {}
+        self._docs: Dict[int, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._docs
+
+    def add(self, doc_id: int, text: str):
+        """Index `text` under `doc_id`, replacing any previous text"""
+        grams = trigrams(text)
+        with self._lock:
+            self._remove(doc_id)
+            self._docs[doc_id] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._remove(doc_id)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.5) -> List[Tuple[int, float]]:
+        """Best `k` (doc_id, score) pairs covering at least `min_score` of the query, best first"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        query_size = len(query_grams)
+        needed = max(1, math.ceil(min_score * query_size))
+        with self._lock:
+            postings = sorted((self._postings.get(gram, ()) for gram in query_grams), key=len)
+            split = query_size - needed + 1
+            if sum(len(posting) for posting in postings[:split]) <= self.max_candidates:
+                candidates = set().union(*postings[:split])
+            else:
+                candidates = self._narrow(query, k)
+
+            scored = []
+            docs = self._docs
+            for doc_id in candidates:
+                doc_grams = docs[doc_id]
+                # Frozenset intersection counts the overlap in C
+                overlap = len(query_grams & doc_grams)
+                if overlap < needed:
+                    continue
+                dice = 2 * overlap / (query_size + len(doc_grams))
+                scored.append((0.8 * overlap / query_size + 0.2 * dice, doc_id))
+
+        return [(doc_id, score) for score, doc_id in heapq.nlargest(k, scored)]
+
+    def _narrow(self, query: str, k: int) -> Set[int]:
+        """Documents sharing the query words' rarest trigrams, while at least `k` remain; at most max_candidates"""
+        # A word's trigrams mostly share their postings, so one per word is enough to narrow with
+        word_postings = []
+        for word in set(_WORD_PATTERN.findall(query.lower())):
+            postings = [self._postings.get(gram, ()) for gram in trigrams(word)]
+            rarest = min((posting for posting in postings if posting), key=len, default=None)
+            if rarest is not None:
+                word_postings.append(rarest)
+        word_postings.sort(key=len)
+
+        candidates: Set[int] = set()
+        for posting in word_postings:
+            if not candidates:
+                candidates = posting
+            elif len(candidates) <= self.max_candidates:
+                break
+            else:
+                narrowed = candidates & posting
+                if len(narrowed) >= k:
+                    candidates = narrowed
+        if len(candidates) > self.max_candidates:
+            candidates = set(heapq.nsmallest(self.max_candidates, candidates))
+        return candidates
+
+    def _remove(self, doc_id: int):
+        grams = self._docs.pop(doc_id, None)
+        if not grams:
+            return
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
@@ -0,0 +1,234 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# (intent, weight, phrases) in precedence order: ties go to the earlier rule.
+# Phrases match on word boundaries and the longest phrase wins where they overlap,
+# so "what did" counts for recall_memory and not also "what" for list_tasks.
+INTENT_RULES: List[Tuple[str, float, List[str]]] = [
+    ("add_task", 1.0, ["add", "create", "new", "remind", "need to", "have to", "don't forget"]),
+    ("add_task", 0.5, ["task"]),
+    ("list_tasks", 1.0, ["list", "show", "what", "todo", "to do", "on my plate"]),
+    ("list_tasks", 0.5, ["tasks"]),
+    ("complete_task", 2.0, ["complete", "completed", "done", "finished", "mark"]),
+    ("delete_task", 2.0, ["delete", "remove", "cancel"]),
+    ("search_tasks", 1.5, ["search", "find", "look", "look for"]),
+    ("prioritize_tasks", 1.0, ["priority", "prioritize", "prioritise", "urgent", "important"]),
+    ("recall_memory", 2.0, ["remember", "recall", "what did", "promised", "promise"]),
+    ("greeting", 1.0, ["hello", "hi", "hey", "how are you", "good morning", "good evening"]),
+    ("help", 2.0, ["help", "what can you do"]),
+]
+
+# Phrases that open a new task. One of these wins over any command verb after it, so
+# "remind me to cancel the dentist" adds a task instead of deleting one; only a
+# greeting may come before it ("hi, remind me to ...").
+ADD_TASK_OPENERS = ["remind me to", "remind me", "add a task", "add task", "add a new task",
+                    "create a task", "create a new task", "new task", "need to", "have to",
+                    "don't forget", "do not forget"]
+
+DEFAULT_INTENT = "general_chat"
+
+
+class IntentClassifier:
+    """Keyword intent classifier compiled into a single word-boundary regex.
+
+    Phrases are folded into a character trie before compiling, so the regex
+    branches on one character at a time instead of retrying every keyword at
+    every position. One `findall` pass collects every phrase hit; each hit adds
+    its rule weight to the intent's score and the highest score wins. An
+    opener (ADD_TASK_OPENERS with the default rules) decides the intent
+    outright when nothing but a greeting precedes it. Results are memoized
+    per lowercased text.
+    """
+
+    def __init__(self, rules: Optional[Sequence[Tuple[str, float, List[str]]]] = None,
+                 default_intent: str = DEFAULT_INTENT,
+                 openers: Optional[Sequence[str]] = None, opener_intent: str = "add_task",
+                 preamble_intents: Sequence[str] = ("greeting",), cache_size: int = 4096):
+        self.rules = list(rules if rules is not None else INTENT_RULES)
+        self.default_intent = default_intent
+        self.opener_intent = opener_intent
+        phrase_weights: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        self._precedence: Dict[str, int] = {}
+
+        for intent, weight, phrases in self.rules:
+            self._precedence.setdefault(intent, len(self._precedence))
+            for phrase in phrases:
+                phrase_weights[self._normalize(phrase)].append((intent, weight))
+
+        self._openers = {self._normalize(phrase)
+                         for phrase in (openers if openers is not None else
+                                        ADD_TASK_OPENERS if rules is None else ())}
+        for phrase in self._openers:
+            phrase_weights.setdefault(phrase, [])
+        self._preamble = set(preamble_intents)
+        self._phrase_weights = dict(phrase_weights)
+        # Text is lowercased before matching; a case-insensitive regex is slower
+        self._pattern = re.compile(rf"\b(?:{phrase_pattern(self._phrase_weights)})\b")
+        # Commands repeat a lot ("show my tasks"), so results are memoized per lowercased text
+        self._classify_cached = lru_cache(maxsize=cache_size)(self._classify)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Weighted keyword score per intent"""
+        scores: Dict[str, float] = {}
+        weights = self._phrase_weights
+        for phrase in self._pattern.findall(text.lower()):
+            for intent, weight in weights.get(phrase) or weights[self._normalize(phrase)]:
+                scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+    def classify(self, text: str) -> str:
+        return self._classify_cached(text.lower())
+
+    def cache_info(self):
+        return self._classify_cached.cache_info()
+
+    def _classify(self, text: str) -> str:
+        scores: Dict[str, float] = {}
+        weights, openers, preamble = self._phrase_weights, self._openers, self._preamble
+        for phrase in self._pattern.findall(text):
+            hits = weights.get(phrase)
+            if hits is None:
+                phrase = self._normalize(phrase)
+                hits = weights[phrase]
+            if phrase in openers and preamble.issuperset(scores):
+                return self.opener_intent
+            for intent, weight in hits:
+                scores[intent] = scores.get(intent, 0.0) + weight
+        if not scores:
+            return self.default_intent
+        best, best_key = self.default_intent, None
+        for intent, score in scores.items():
+            key = (score, -self._precedence[intent])
+            if best_key is None or key > best_key:
+                best, best_key = intent, key
+        return best
+
+    def classify_many(self, texts: Sequence[str]) -> List[str]:
+        return [self.classify(text) for text in texts]
+
+    @staticmethod
+    def _normalize(phrase: str) -> str:
+        return " ".join(phrase.lower().split())
+
+
+def phrase_pattern(phrases) -> str:
+    """Regex matching any of `phrases`, preferring the longest at each position"""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: take the longer phrase, backtrack to the shorter one
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# Utterances the semantic classifier builds its intent prototypes from
+PROTOTYPE_EXAMPLES: List[Tuple[str, str]] = [
+    ("Remind me to pay the electricity bill", "add_task"),
+    ("Add task: pick up the dry cleaning", "add_task"),
+    ("Create a task to book flights", "add_task"),
+    ("I need to submit the form by Monday", "add_task"),
+    ("Don't forget to feed the cat", "add_task"),
+    ("Schedule a call with the bank next week", "add_task"),
+    ("What's on my list?", "list_tasks"),
+    ("Show me my todo list", "list_tasks"),
+    ("List my tasks for today", "list_tasks"),
+    ("What do I have to do this week", "list_tasks"),
+    ("Show all my pending tasks", "list_tasks"),
+    ("Mark the laundry task as done", "complete_task"),
+    ("I finished the presentation", "complete_task"),
+    ("Task 2 is completed", "complete_task"),
+    ("Mark task 4 done", "complete_task"),
+    ("Delete the gym task", "delete_task"),
+    ("Remove task 5", "delete_task"),
+    ("Cancel the plumber task", "delete_task"),
+    ("Get rid of the old meeting task", "delete_task"),
+    ("Search my tasks for invoices", "search_tasks"),
+    ("Find tasks about the project", "search_tasks"),
+    ("Look for tasks mentioning mom", "search_tasks"),
+    ("Prioritize my todo list", "prioritize_tasks"),
+    ("Which tasks are most important", "prioritize_tasks"),
+    ("What should I focus on first", "prioritize_tasks"),
+    ("What did I tell you about the car?", "recall_memory"),
+    ("Do you remember what I said yesterday", "recall_memory"),
+    ("Recall what I promised my boss", "recall_memory"),
+    ("What did we talk about last time?", "recall_memory"),
+    ("Hello there", "greeting"),
+    ("Hi MemoryMate", "greeting"),
+    ("Hey, good evening", "greeting"),
+    ("Good afternoon, how are you doing?", "greeting"),
+    ("Help", "help"),
+    ("What can you help me with?", "help"),
+    ("How do I use you?", "help"),
+    ("Can you help me understand your features", "help"),
+    ("Tell me something interesting", "general_chat"),
+    ("What's the capital of France?", "general_chat"),
+    ("I had a long day", "general_chat"),
+    ("Explain how rainbows form", "general_chat"),
+    ("Thank you so much", "general_chat"),
+]
+
+# Held-out labeled utterances for the accuracy tests and the benchmark; never used as prototypes
+LABELED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Remind me to call mom tomorrow", "add_task"),
+    ("Add task: Buy groceries tomorrow", "add_task"),
+    ("Create a new task to email the landlord", "add_task"),
+    ("I need to finish the report by Friday", "add_task"),
+    ("Don't forget to water the plants", "add_task"),
+    ("Add a meeting with Rohan next week", "add_task"),
+    ("Remind me to cancel the dentist appointment", "add_task"),
+    ("Add a task to remove the old files", "add_task"),
+    ("Add a task to mark the exam papers", "add_task"),
+    ("Remind me to find my passport", "add_task"),
+    ("I need to delete the old photos from my phone", "add_task"),
+    ("Hey, don't forget to show Rohan the slides", "add_task"),
+    ("What's on my plate today?", "list_tasks"),
+    ("Show my tasks", "list_tasks"),
+    ("List everything on my todo", "list_tasks"),
+    ("Show urgent tasks", "list_tasks"),
+    ("What do I have today", "list_tasks"),
+    ("Mark task 1 as done", "complete_task"),
+    ("I finished the report", "complete_task"),
+    ("Mark the dentist call as completed", "complete_task"),
+    ("Task 3 is done", "complete_task"),
+    ("Delete task 2", "delete_task"),
+    ("Remove the meeting task", "delete_task"),
+    ("Cancel my dentist appointment task", "delete_task"),
+    ("Find my study tasks", "search_tasks"),
+    ("Search for grocery tasks", "search_tasks"),
+    ("Look for anything about taxes", "search_tasks"),
+    ("Prioritize my tasks", "prioritize_tasks"),
+    ("Which things are important", "prioritize_tasks"),
+    ("What did I promise Rohan?", "recall_memory"),
+    ("What did I promise Rohan last week?", "recall_memory"),
+    ("Do you remember my sister's birthday", "recall_memory"),
+    ("Recall our last conversation", "recall_memory"),
+    ("Hello, how are you?", "greeting"),
+    ("Hi there", "greeting"),
+    ("Hey MemoryMate", "greeting"),
+    ("Good morning", "greeting"),
+    ("Help me understand what you can do", "help"),
+    ("What can you do?", "help"),
+    ("I need help", "help"),
+    ("Tell me a joke", "general_chat"),
+    ("Please address the envelope", "general_chat"),
+    ("Whatever, never mind", "general_chat"),
+    ("This weather is nice", "general_chat"),
+    ("Explain quantum computing simply", "general_chat"),
+    ("Thanks", "general_chat"),
+]
@@ -0,0 +1,114 @@
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from intent_classifier import phrase_pattern
+
+
+# kind -> value -> phrases. Priority values are listed highest first; the
+# first priority found in that order wins when a text mentions several.
+DEFAULT_VOCABULARY: Dict[str, Dict[str, List[str]]] = {
+    "priority": {
+        "urgent_important": ["urgent", "asap", "emergency", "critical"],
+        "important_not_urgent": ["important", "priority", "key"],
+    },
+    # The original keywords, plus the inflections their substring checks used to match
+    "tag": {
+        "meeting": ["meeting", "meetings"],
+        "call": ["call", "calls", "calling"],
+        "email": ["email", "emails"],
+        "study": ["study", "studying"],
+        "work": ["work", "working"],
+    },
+}
+
+VOCABULARY_PATH = "tag_vocabulary.json"
+
+
+@dataclass
+class TextTags:
+    priority: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+
+
+class KeywordTagger:
+    """Priority and tag extraction in one compiled regex scan.
+
+    The vocabulary is compiled into a single word-boundary pattern, so "call"
+    no longer matches inside "recall" and "work" not inside "homework". Add
+    terms with `add_terms` or a JSON file in the DEFAULT_VOCABULARY layout.
+    """
+
+    def __init__(self, vocabulary: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.vocabulary: Dict[str, Dict[str, List[str]]] = {}
+        for kind, values in (vocabulary if vocabulary is not None else DEFAULT_VOCABULARY).items():
+            for value, phrases in values.items():
+                self.vocabulary.setdefault(kind, {}).setdefault(value, []).extend(phrases)
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path: str = VOCABULARY_PATH) -> "KeywordTagger":
+        """Default vocabulary extended with the user's terms from `path`, if it exists"""
+        tagger = cls()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for kind, values in json.load(f).items():
+                        for value, phrases in values.items():
+                            tagger.add_terms(kind, value, phrases, recompile=False)
+                tagger._compile()
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠️  Ignoring tag vocabulary {path}: {e}")
+        return tagger
+
+    def add_terms(self, kind: str, value: str, phrases: Sequence[str], recompile: bool = True):
+        """Teach the tagger more phrases for `value`, e.g. add_terms("tag", "health", ["doctor"])"""
+        self.vocabulary.setdefault(kind, {}).setdefault(value, []).extend(phrases)
+        if recompile:
+            self._compile()
+
+    def tag(self, text: str) -> TextTags:
+        result = TextTags()
+        best_rank = None
+        lookup = self._lookup
+        # Lowercasing up front is cheaper than a case-insensitive scan
+        for phrase in self._pattern.findall(text.lower()):
+            hits = lookup.get(phrase) or lookup.get(" ".join(phrase.split()), ())
+            for kind, value, rank in hits:
+                if kind == "priority":
+                    if best_rank is None or rank < best_rank:
+                        best_rank, result.priority = rank, value
+                elif kind == "tag":
+                    if value not in result.tags:
+                        result.tags.append(value)
+        return result
+
+    def tag_many(self, texts: Sequence[str]) -> List[TextTags]:
+        return [self.tag(text) for text in texts]
+
+    def _compile(self):
+        lookup: Dict[str, List[Tuple[str, str, int]]] = {}
+        for kind, values in self.vocabulary.items():
+            for rank, (value, phrases) in enumerate(values.items()):
+                for phrase in phrases:
+                    key = " ".join(phrase.lower().split())
+                    if key and (kind, value, rank) not in lookup.get(key, ()):
+                        lookup.setdefault(key, []).append((kind, value, rank))
+        self._lookup = lookup
+        self._pattern = re.compile(rf"(?<![\w-])(?:{phrase_pattern(lookup)})(?![\w-])")
+
+
+_default_tagger: Optional[KeywordTagger] = None
+_default_tagger_lock = threading.Lock()
+
+
+def get_default_tagger() -> KeywordTagger:
+    """The default vocabulary plus the user's tag_vocabulary.json, loaded on first use"""
+    global _default_tagger
+    with _default_tagger_lock:
+        if _default_tagger is None:
+            _default_tagger = KeywordTagger.from_file()
+        return _default_tagger
@@ -0,0 +1,326 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from engine_runner import run_engine, supports_option
+from engine_server import EngineUnavailable, ManagedServer
+
+
+LLAMA_SERVER = "./llama/server"
+LLAMA_CLI = "./llama/main"
+LLAMA_MODEL = "./models/7B/ggml-model-q4_0.bin"
+LLAMA_SESSION_DIR = "./llm_sessions"
+
+
+@dataclass(frozen=True)
+class SamplingParams:
+    n_predict: int = 200
+    temperature: float = 0.7
+    top_k: int = 40
+    top_p: float = 0.95
+    repeat_penalty: float = 1.1
+    seed: int = -1
+    stop: Tuple[str, ...] = ("\nUser:",)
+
+    @property
+    def deterministic(self) -> bool:
+        """Whether the same prompt always produces the same text"""
+        return self.temperature <= 0 or self.seed >= 0
+
+    def to_payload(self) -> dict:
+        payload = asdict(self)
+        payload["stop"] = list(self.stop)
+        return payload
+
+
+def generate_with_cli(prompt: str, sampling: SamplingParams = SamplingParams(), model_path: str = LLAMA_MODEL,
+                      cli_path: str = LLAMA_CLI, timeout: float = 300.0) -> str:
+    """One-shot completion with the llama.cpp command-line program, for when the server cannot run.
+
+    The model is loaded for every call, and the reply is read from stdout.
+    """
+    argv = [cli_path, "-m", model_path, "-p", prompt, "-n", str(sampling.n_predict),
+            "--temp", str(sampling.temperature), "--top-k", str(sampling.top_k),
+            "--top-p", str(sampling.top_p), "--repeat-penalty", str(sampling.repeat_penalty),
+            "-s", str(sampling.seed)]
+    output = run_engine(argv, timeout=timeout).stdout.decode("utf-8", "replace")
+    # The program echoes the prompt before the completion
+    output = output.lstrip()
+    if output.startswith(prompt.strip()):
+        output = output[len(prompt.strip()):]
+    for stop in sampling.stop:
+        output = output.split(stop, 1)[0]
+    return output.strip()
+
+
+class PromptSessionCache:
+    """llama.cpp slot states saved on disk, named by the length and hash of the prompt prefix they hold.
+
+    A file is touched whenever it is used; the least recently used files are
+    deleted once there are more than `max_files` or they take more than
+    `max_bytes`.
+    """
+
+    SUFFIX = ".bin"
+
+    def __init__(self, directory: str = LLAMA_SESSION_DIR, max_files: int = 8,
+                 max_bytes: int = 2 * 1024 ** 3):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def filename(cls, prefix: str) -> str:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]
+        return f"{len(prefix)}-{digest}{cls.SUFFIX}"
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.directory, name))
+
+    def longest_prefix(self, prompt: str) -> Optional[str]:
+        """Name of the saved state covering the longest prefix of `prompt`, if any"""
+        lengths = []
+        for name in self._names():
+            length = name.split("-", 1)[0]
+            if length.isdigit() and int(length) <= len(prompt):
+                lengths.append((int(length), name))
+        for length, name in sorted(lengths, reverse=True):
+            if self.filename(prompt[:length]) == name:
+                return name
+        return None
+
+    def touch(self, name: str):
+        try:
+            os.utime(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in self._names():
+                try:
+                    entries.append((os.stat(os.path.join(self.directory, name)), name))
+                except OSError:
+                    continue
+            entries.sort(key=lambda entry: entry[0].st_mtime, reverse=True)
+            kept, total = 0, 0
+            for stat, name in entries:
+                if kept < self.max_files and total + stat.st_size <= self.max_bytes:
+                    kept += 1
+                    total += stat.st_size
+                    continue
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _names(self) -> List[str]:
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(self.SUFFIX)]
+        except OSError:
+            return []
+
+
+class LLMWorker:
+    """A llama.cpp server kept running with the model loaded, fed over a local socket.
+
+    Requests queue in FIFO order for `parallel` slots, each with its own
+    timeout that includes time spent queued. A crashed server is restarted
+    by the next request.
+
+    Callers can pass the part of the prompt that later prompts will start with
+    (system prompt and earlier turns) as `prefix`. Its evaluated state stays in
+    the server's slot, so the next turn only processes new tokens; when a slot
+    moves to a different prefix, or the worker stops, the state is saved to
+    `session_dir` and restored the next time a prompt starts with it. Session
+    files are only used if the server binary lists --slot-save-path in its
+    --help; otherwise the in-slot prompt cache is all there is.
+    """
+
+    def __init__(self, model_path: str = LLAMA_MODEL, server_path: str = LLAMA_SERVER,
+                 context_size: int = 2048, parallel: int = 1,
+                 sampling: SamplingParams = SamplingParams(), timeout: float = 120.0,
+                 session_dir: Optional[str] = LLAMA_SESSION_DIR, max_sessions: int = 8,
+                 extra_args: Optional[List[str]] = None):
+        self.model_path = model_path
+        self.sampling = sampling
+        self.timeout = timeout
+        argv = [server_path, "-m", model_path, "-c", str(context_size), "-np", str(parallel)]
+        self.sessions: Optional[PromptSessionCache] = None
+        # Builds without slot persistence refuse to start with the flag, so ask the binary first
+        if session_dir and supports_option(server_path, "--slot-save-path"):
+            self.sessions = PromptSessionCache(session_dir, max_files=max_sessions)
+            argv += ["--slot-save-path", session_dir]
+        self.server = ManagedServer("llama-server", argv + (extra_args or []))
+        self._queue = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="memorymate-llm")
+        # Streams run on the caller's thread but still take one of the server's slots
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(parallel):
+            self._free_slots.put(slot)
+        # slot -> (server pid, prefix whose state the slot holds)
+        self._slot_prefix: Dict[int, Tuple[Optional[int], str]] = {}
+
+    def start(self):
+        """Load the model now instead of on the first request"""
+        self.server.start()
+
+    def stop(self):
+        self._queue.shutdown(wait=False, cancel_futures=True)
+        # Keep each slot's evaluated prefix for the next run
+        for slot in list(self._slot_prefix):
+            self._save_slot(slot)
+        self.server.stop()
+
+    def submit(self, prompt: str, sampling: Optional[SamplingParams] = None,
+               timeout: Optional[float] = None, prefix: Optional[str] = None) -> Future:
+        """Queue a completion; the future resolves to the generated text"""
+        return self._queue.submit(self._complete, prompt, sampling or self.sampling,
+                                  timeout or self.timeout, prefix)
+
+    def generate(self, prompt: str, sampling: Optional[SamplingParams] = None,
+                 timeout: Optional[float] = None, prefix: Optional[str] = None) -> str:
+        timeout = timeout or self.timeout
+        future = self.submit(prompt, sampling, timeout, prefix)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise TimeoutError(f"LLM request timed out after {timeout:.0f}s") from None
+
+    def generate_many(self, prompts: List[str], sampling: Optional[SamplingParams] = None,
+                      timeout: Optional[float] = None,
+                      prefixes: Optional[List[Optional[str]]] = None) -> List[str]:
+        """Generate for every prompt within one overall `timeout`"""
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        prefixes = prefixes or [None] * len(prompts)
+        futures = [self.submit(prompt, sampling, timeout, prefix) for prompt, prefix in zip(prompts, prefixes)]
+        try:
+            return [future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures]
+        except FutureTimeout:
+            for future in futures:
+                future.cancel()
+            raise TimeoutError(f"LLM requests timed out after {timeout:.0f}s") from None
+
+    def stream(self, prompt: str, sampling: Optional[SamplingParams] = None,
+               timeout: Optional[float] = None, prefix: Optional[str] = None) -> Iterator[str]:
+        """Yield generated text piece by piece as the server produces it.
+        
+        Stopping iteration early (or closing the generator) closes the
+        connection, and the server stops generating.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        slot = self._acquire_slot(timeout)
+        payload = {"prompt": prompt, "cache_prompt": True, "id_slot": slot, "stream": True,
+                   **(sampling or self.sampling).to_payload()}
+        try:
+            self._prepare_slot(slot, prompt, prefix)
+            events = self.server.stream("/completion", payload, timeout=timeout)
+            stopped = False
+            try:
+                for event in events:
+                    content = event.get("content", "")
+                    if content:
+                        yield content
+                    stopped = bool(event.get("stop"))
+                    if stopped or time.monotonic() > deadline:
+                        break
+            finally:
+                events.close()
+            if not stopped and time.monotonic() <= deadline:
+                # The connection closed before the final event: the server died mid-reply
+                raise EngineUnavailable(f"{self.server.name} stopped in the middle of a reply")
+        except TimeoutError:
+            raise TimeoutError(f"LLM request timed out after {timeout:.0f}s") from None
+        finally:
+            self._free_slots.put(slot)
+
+    def _complete(self, prompt: str, sampling: SamplingParams, timeout: float,
+                  prefix: Optional[str] = None) -> str:
+        slot = self._acquire_slot(timeout)
+        payload = {"prompt": prompt, "cache_prompt": True, "id_slot": slot, **sampling.to_payload()}
+        try:
+            self._prepare_slot(slot, prompt, prefix)
+            reply = self.server.request("/completion", payload, timeout=timeout)
+        except TimeoutError:
+            raise TimeoutError(f"LLM request timed out after {timeout:.0f}s") from None
+        finally:
+            self._free_slots.put(slot)
+        return reply.get("content", "").strip()
+
+    def _acquire_slot(self, timeout: float) -> int:
+        try:
+            return self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"LLM request timed out after {timeout:.0f}s waiting for a slot") from None
+
+    def _prepare_slot(self, slot: int, prompt: str, prefix: Optional[str]):
+        """Make sure `slot` holds as much of `prompt`'s prefix as is saved anywhere"""
+        if self.sessions is None:
+            return
+        if not prefix:
+            # The slot is about to be overwritten by an unrelated prompt
+            self._save_slot(slot)
+            return
+        self.server.start()
+        pid, loaded = self._slot_prefix.get(slot, (None, ""))
+        if pid == self.server.pid and prompt.startswith(loaded):
+            # Same conversation as the slot's last request: its KV cache already covers the prefix
+            self._slot_prefix[slot] = (pid, prefix)
+            return
+
+        self._save_slot(slot)
+        name = self.sessions.longest_prefix(prompt)
+        if name is not None and self._slot_action(slot, "restore", name):
+            self.sessions.touch(name)
+        self._slot_prefix[slot] = (self.server.pid, prefix)
+
+    def _save_slot(self, slot: int):
+        pid, prefix = self._slot_prefix.pop(slot, (None, ""))
+        if self.sessions is None or not prefix or pid != self.server.pid:
+            return
+        name = self.sessions.filename(prefix)
+        if name in self.sessions:
+            self.sessions.touch(name)
+        elif self._slot_action(slot, "save", name):
+            self.sessions.evict()
+
+    def _slot_action(self, slot: int, action: str, name: str) -> bool:
+        try:
+            self.server.request(f"/slots/{slot}?action={action}", {"filename": name}, timeout=self.timeout)
+            return True
+        except (EngineUnavailable, OSError) as e:
+            # Servers built without slot persistence: keep the in-slot prompt cache only
+            print(f"⚠️  Could not {action} LLM session state, disabling session files: {e}")
+            self.sessions = None
+            return False
+
+
+_default_worker: Optional[LLMWorker] = None
+_default_worker_lock = threading.Lock()
+
+
+def get_llm_worker() -> LLMWorker:
+    """The process-wide worker, created on first use"""
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is None:
+            _default_worker = LLMWorker()
+        return _default_worker
+
+
+def shutdown_llm_worker():
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is not None:
+            _default_worker.stop()
+            _default_worker = None
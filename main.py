@@ -1,13 +1,17 @@
 import os
 import time
 import sys
-from vad_module import record_with_vad, record_simple
-from transcribe_and_respond import transcribe_with_whisper, generate_llama_response
-from tts import speak_text
+from datetime import datetime
+from vad_module import listen_and_transcribe, capture_simple, save_wav, DEBUG_AUDIO_FILE
+from transcribe_and_respond import transcribe_audio, generate_llama_response
+from llm_worker import shutdown_llm_worker
+from whisper_worker import shutdown_whisper_worker
+from engine_server import EngineUnavailable
+from tts import speak_text, speak_stream
 from ai_assistant import MemoryMateAssistant
 from task_manager import Task, Priority, TaskStatus, AITaskParser
-
-AUDIO_FILE = "my_voice.wav"
+from scheduler import DeadlineScheduler, ReminderScheduler, console_hook, tts_hook
+from focus_timer import FocusTimerService, POMODORO_MINUTES, BREAK_MINUTES, SNOOZE_MINUTES
 
 
 def print_banner():
@@ -42,42 +46,51 @@ def voice_input_mode(assistant):
     print("💡 Speak clearly when prompted. Stay silent to stop recording.")
     
     try:
-        # Try VAD recording first
+        # Try VAD recording first, transcribing while the user speaks
         print("🎙️ Starting voice activity detection...")
-        record_with_vad(AUDIO_FILE)
+        transcript = listen_and_transcribe(
+            on_partial=lambda text: print(f"\r📝 {text}", end="", flush=True),
+            debug_wav=DEBUG_AUDIO_FILE,
+        )
+        print()
+    except (EngineUnavailable, TimeoutError) as e:
+        print(f"\n❌ Transcription failed: {e}")
+        print("💡 Make sure Whisper.cpp is properly set up")
+        return
     except Exception as e:
         print(f"⚠️ VAD recording failed: {e}")
         print("🔄 Falling back to simple recording...")
         try:
-            record_simple(AUDIO_FILE, 10)
+            samples = capture_simple(10)
+            if DEBUG_AUDIO_FILE:
+                save_wav(DEBUG_AUDIO_FILE, samples)
         except Exception as e2:
             print(f"❌ Simple recording also failed: {e2}")
             print("💡 Please check your microphone and audio settings")
             return
+        try:
+            transcript = transcribe_audio(samples)
+        except Exception as e3:
+            print(f"❌ Transcription failed: {e3}")
+            print("💡 Make sure Whisper.cpp is properly set up")
+            return
     
-    print(f"✅ Recording saved as '{AUDIO_FILE}'")
-    
-    # Transcribe
-    print("🧠 Transcribing with Whisper.cpp...")
     try:
-        transcript = transcribe_with_whisper(AUDIO_FILE)
         print(f"📝 You said: {transcript}")
         
         if transcript.strip():
             # Process with AI assistant
+            # Speech starts with the first complete sentence while the rest streams in
             print("🤖 Processing with AI...")
-            response = assistant.process_input(transcript)
-            print(f"🧠 MemoryMate: {response}")
-            
-            # Speak response
-            print("🔊 Speaking response...")
-            speak_text(response)
+            print("🧠 MemoryMate: ", end="", flush=True)
+            speak_stream(assistant.process_input_stream(transcript),
+                         on_chunk=lambda chunk: print(chunk, end="", flush=True))
+            print()
         else:
             print("⚠️ No speech detected. Please try again.")
             
     except Exception as e:
-        print(f"❌ Transcription failed: {e}")
-        print("💡 Make sure Whisper.cpp is properly set up")
+        print(f"❌ Processing failed: {e}")
 
 
 def text_input_mode(assistant):
@@ -92,9 +105,12 @@ def text_input_mode(assistant):
             break
         
         if user_input:
-            print("🤖 Processing...")
-            response = assistant.process_input(user_input)
-            print(f"🧠 MemoryMate: {response}")
+            print("🧠 MemoryMate: ", end="", flush=True)
+            response = ""
+            for chunk in assistant.process_input_stream(user_input):
+                response += chunk
+                print(chunk, end="", flush=True)
+            print()
             
             # Ask if user wants to hear it spoken
             speak_choice = input("🔊 Would you like me to speak this? (y/n): ").lower()
@@ -161,7 +177,15 @@ def view_tasks(assistant):
     print("\n" + "=" * 50)
 
 
-def focus_mode(assistant):
+def print_timer_status(timers):
+    """Show running and paused focus timers"""
+    for session in timers.active_sessions():
+        minutes, seconds = divmod(int(session.seconds_left()), 60)
+        state_emoji = "▶️" if session.state == "running" else "⏸️"
+        print(f"{state_emoji} {session.kind.title()} timer: {minutes:02d}:{seconds:02d} left")
+
+
+def focus_mode(assistant, timers):
     """Focus mode for working on one task"""
     print("\n🎯 Focus Mode")
     print("💡 Focus on one task at a time for maximum productivity")
@@ -189,7 +213,7 @@ def focus_mode(assistant):
                 if 0 <= task_num < len(pending_tasks):
                     selected_task = pending_tasks[task_num]
                     selected_task.status = TaskStatus.IN_PROGRESS
-                    selected_task.updated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+                    selected_task.updated_at = datetime.now().isoformat()
                     assistant.task_manager.update_task(selected_task)
                     print(f"🎯 Now focusing on: {selected_task.title}")
                     focus_tasks = [selected_task]
@@ -212,6 +236,7 @@ def focus_mode(assistant):
     if focus_task.due_date:
         print(f"📅 Due: {focus_task.due_date}")
     print(f"🔴 Priority: {focus_task.priority.value.replace('_', ' ').title()}")
+    print_timer_status(timers)
     
     print("\n⏰ Focus Session Options:")
     print("1. 🍅 Start 25-minute Pomodoro")
@@ -220,35 +245,35 @@ def focus_mode(assistant):
     print("4. ⏸️ Snooze task (1 hour)")
     print("5. 🔄 Switch to different task")
     print("6. 🚪 Exit focus mode")
+    print("7. ⏯️ Pause/resume timer")
     
     while True:
-        choice = input("\n🎯 Choose an option (1-6): ")
+        choice = input("\n🎯 Choose an option (1-7): ")
         
         if choice == '1':
-            print("🍅 Starting 25-minute Pomodoro session...")
-            print("⏰ Focus on your task. I'll notify you when time's up.")
-            time.sleep(25 * 60)  # 25 minutes
-            speak_text("Time's up! Take a break or continue working.")
-            print("⏰ Pomodoro session complete!")
+            timers.start_pomodoro(focus_task.title, focus_task.id)
+            print(f"🍅 Started {POMODORO_MINUTES}-minute Pomodoro session...")
+            print("⏰ Focus on your task. I'll notify you when time's up - the menu stays available.")
             
         elif choice == '2':
-            print("☕ Taking a 5-minute break...")
+            timers.start_break()
+            print(f"☕ Taking a {BREAK_MINUTES}-minute break...")
             print("🛌 Relax and recharge. I'll notify you when break is over.")
-            time.sleep(5 * 60)  # 5 minutes
-            speak_text("Break time is over! Let's get back to work.")
-            print("☕ Break complete!")
             
         elif choice == '3':
             focus_task.status = TaskStatus.COMPLETED
-            focus_task.updated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+            focus_task.updated_at = datetime.now().isoformat()
             assistant.task_manager.update_task(focus_task)
             print("✅ Task completed! Great job!")
             speak_text("Congratulations! Task completed successfully.")
             break
             
         elif choice == '4':
-            print("⏸️ Task snoozed for 1 hour")
-            # Add snooze logic here
+            focus_task.status = TaskStatus.PENDING
+            focus_task.updated_at = datetime.now().isoformat()
+            assistant.task_manager.update_task(focus_task)
+            timers.snooze_task(focus_task.title, focus_task.id)
+            print(f"⏸️ Task snoozed for {SNOOZE_MINUTES // 60} hour. I'll remind you when it's time.")
             break
             
         elif choice == '5':
@@ -259,8 +284,20 @@ def focus_mode(assistant):
             print("🚪 Exiting focus mode...")
             break
             
+        elif choice == '7':
+            sessions = [s for s in timers.active_sessions() if s.kind != 'snooze']
+            if not sessions:
+                print("⏰ No timer is running.")
+            elif sessions[-1].state == "running":
+                timers.pause(sessions[-1].id)
+                print("⏸️ Timer paused.")
+            else:
+                timers.resume(sessions[-1].id)
+                print("▶️ Timer resumed.")
+            print_timer_status(timers)
+            
         else:
-            print("❌ Invalid choice. Please select 1-6.")
+            print("❌ Invalid choice. Please select 1-7.")
 
 
 def search_tasks(assistant):
@@ -400,6 +437,16 @@ def main():
     try:
         print("🤖 Initializing MemoryMate...")
         assistant = MemoryMateAssistant()
+        # Reminders and focus timers share one scheduler thread
+        scheduler = DeadlineScheduler()
+        reminders = ReminderScheduler(assistant.task_manager, hooks=[console_hook, tts_hook],
+                                      scheduler=scheduler)
+        reminders.start()
+        timers = FocusTimerService(scheduler=scheduler,
+                                   on_start=assistant.productivity_log.record_focus_started,
+                                   on_complete=assistant.productivity_log.record_focus_ended)
+        timers.start()
+        print(f"⏰ {reminders.upcoming_count()} upcoming reminders scheduled")
         print("✅ MemoryMate ready!")
     except Exception as e:
         print(f"❌ Failed to initialize MemoryMate: {e}")
@@ -419,7 +466,7 @@ def main():
             elif choice == '3':
                 view_tasks(assistant)
             elif choice == '4':
-                focus_mode(assistant)
+                focus_mode(assistant, timers)
             elif choice == '5':
                 search_tasks(assistant)
             elif choice == '6':
@@ -447,7 +494,12 @@ def main():
     
     # Cleanup
     try:
+        reminders.stop()
+        timers.stop()
+        scheduler.stop()
         assistant.close()
+        shutdown_llm_worker()
+        shutdown_whisper_worker()
     except:
         pass
 
@@ -2,10 +2,23 @@
 import sqlite3
 import json
 import os
+import re
 from datetime import datetime
 from typing import List, Optional
 import threading
 
+from change_feed import ChangeFeed, Change, ensure_change_log
+
+# Words too common to say anything about which memories are relevant
+RECALL_STOPWORDS = {
+    "the", "and", "for", "you", "your", "did", "what", "who", "when", "where", "how", "can",
+    "are", "was", "were", "have", "has", "had", "about", "that", "this", "with", "from",
+    "user", "assistant", "tell", "remember", "recall", "please", "just", "all", "any",
+}
+
+# Recall searches only this many of the newest memories, so its cost does not grow with the table
+RECALL_WINDOW = 5000
+
 class MemoryStore:
     """Thread-safe memory store using SQLite with connection per operation"""
     
@@ -13,6 +26,7 @@ class MemoryStore:
         self.db_path = db_path
         self._lock = threading.Lock()
         self._init_db()
+        self.change_feed = ChangeFeed(db_path)
     
     def _get_connection(self):
         """Get a fresh connection for each operation to avoid threading issues"""
@@ -48,6 +62,7 @@ class MemoryStore:
                         # Add embedding column to existing table
                         cursor.execute("ALTER TABLE memory ADD COLUMN embedding BLOB")
                 
+                ensure_change_log(cursor, "memory", "memory")
                 conn.commit()
             finally:
                 conn.close()
@@ -80,6 +95,23 @@ class MemoryStore:
             finally:
                 conn.close()
     
+    def add_memories(self, texts: List[str]) -> List[int]:
+        """Add many memory entries in a single transaction and return their ids"""
+        if not texts:
+            return []
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                memory_ids = []
+                for text in texts:
+                    cursor.execute("INSERT INTO memory (text) VALUES (?)", (text,))
+                    memory_ids.append(cursor.lastrowid)
+                conn.commit()
+                return memory_ids
+            finally:
+                conn.close()
+    
     def get_memory(self, memory_id: int) -> Optional[dict]:
         """Get a specific memory by ID"""
         with self._lock:
@@ -165,6 +197,38 @@ class MemoryStore:
             finally:
                 conn.close()
     
+    def recall_memories(self, query: str, limit: int = 3, exclude_ids: Optional[List[int]] = None,
+                        window: int = RECALL_WINDOW) -> List[dict]:
+        """Memories sharing the most words with `query`, most recent first among equals.
+        
+        Only the newest `window` memories are searched (an id range on the primary key).
+        """
+        terms = sorted({word for word in re.findall(r"\w+", query.lower())
+                        if len(word) > 2 and word not in RECALL_STOPWORDS})[:8]
+        if not terms:
+            return []
+        
+        hits_sql = " + ".join("(text LIKE ?)" for _ in terms)
+        params = [f"%{term}%" for term in terms]
+        exclude_ids = exclude_ids or []
+        exclude_sql = f"AND id NOT IN ({', '.join('?' for _ in exclude_ids)})" if exclude_ids else ""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""SELECT id, text, timestamp, {hits_sql} AS hits FROM memory
+                        WHERE id > (SELECT COALESCE(MAX(id), 0) FROM memory) - ?
+                        AND hits > 0 {exclude_sql} ORDER BY hits DESC, id DESC LIMIT ?""",
+                    params + [window] + exclude_ids + [limit]
+                )
+                return [
+                    {"id": row[0], "text": row[1], "timestamp": row[2]}
+                    for row in cursor.fetchall()
+                ]
+            finally:
+                conn.close()
+    
     def get_recent_memories(self, limit: int = 20) -> List[dict]:
         """Get recent memories"""
         with self._lock:
@@ -233,6 +297,10 @@ class MemoryStore:
             finally:
                 conn.close()
     
+    def changes_since(self, seq: int, limit: int = 1000) -> List[Change]:
+        """Memory inserts, updates and deletes recorded after sequence number `seq`"""
+        return self.change_feed.changes_since(seq, entity="memory", limit=limit)
+    
     def get_memory_count(self) -> int:
         """Get total number of memories"""
         with self._lock:
@@ -0,0 +1,211 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from task_manager import TaskManager, Priority, TaskStatus
+
+
+PRIORITY_RANK = {
+    Priority.URGENT_IMPORTANT: 2,
+    Priority.IMPORTANT_NOT_URGENT: 1,
+    Priority.OPTIONAL: 0,
+}
+
+
+def _words_sql(column: str, separators: str = ".,;:!?()'\"-/") -> str:
+    """SQL for the lowercased column with separators as spaces, padded by a space on each side.
+
+    Each separator adds a nested replace(); SQLite's parser limits how deep that can go.
+    """
+    expr = f"lower({column})"
+    for char in separators:
+        expr = f"replace({expr}, '{char.replace(chr(39), chr(39) * 2)}', ' ')"
+    expr = f"replace({expr}, char(9), ' ')"
+    return f"(' ' || {expr} || ' ')"
+
+
+_TITLE_WORDS_SQL = _words_sql("title")
+
+
+@dataclass
+class PriorityRule:
+    """A task gets `priority` when every condition set on the rule holds"""
+    name: str
+    priority: Priority
+    keywords: List[str] = field(default_factory=list)
+    due_within_days: Optional[int] = None
+    min_age_days: Optional[int] = None
+
+    def to_sql(self, now: datetime) -> Tuple[str, list]:
+        """Compile the rule into a SQL predicate over the tasks table"""
+        clauses = []
+        params = []
+
+        if self.keywords:
+            # Whole words only, so "key" does not match "keyboard" or "monkey"
+            clauses.append("(" + " OR ".join(f"{_TITLE_WORDS_SQL} LIKE ?" for _ in self.keywords) + ")")
+            params.extend(f"% {keyword.lower()} %" for keyword in self.keywords)
+
+        if self.due_within_days is not None:
+            # Dates are stored as ISO strings, so overdue tasks also fall under the bound
+            clauses.append("(due_date IS NOT NULL AND due_date != '' AND due_date < ?)")
+            params.append(_day_after(now, self.due_within_days))
+
+        if self.min_age_days is not None:
+            clauses.append("created_at <= ?")
+            params.append((now - timedelta(days=self.min_age_days)).isoformat())
+
+        return " AND ".join(clauses) or "1", params
+
+
+DEFAULT_RULES = [
+    PriorityRule("urgent_keywords", Priority.URGENT_IMPORTANT,
+                 keywords=['urgent', 'asap', 'emergency', 'critical']),
+    PriorityRule("due_soon", Priority.URGENT_IMPORTANT, due_within_days=1),
+    PriorityRule("important_keywords", Priority.IMPORTANT_NOT_URGENT,
+                 keywords=['important', 'priority', 'key']),
+    PriorityRule("due_this_week", Priority.IMPORTANT_NOT_URGENT, due_within_days=7),
+    PriorityRule("stale", Priority.IMPORTANT_NOT_URGENT, min_age_days=14),
+]
+
+
+@dataclass
+class PrioritizationReport:
+    pending: int
+    scanned: int
+    changed: int
+    full_scan: bool
+    elapsed_ms: float
+
+
+class PrioritizationEngine:
+    """Re-scores pending tasks with a single UPDATE that only touches changed rows.
+
+    After the first full pass, only dirty tasks (edited since the last run) and
+    time-sensitive ones (due soon, or crossing an age threshold) are re-scored.
+    """
+
+    def __init__(self, task_manager: TaskManager, rules: Optional[List[PriorityRule]] = None):
+        self.task_manager = task_manager
+        # Highest priority first, so the CASE expression picks the strongest match
+        self.rules = sorted(rules or DEFAULT_RULES, key=lambda rule: -PRIORITY_RANK[rule.priority])
+        self.last_run: Optional[datetime] = None
+        self.last_report: Optional[PrioritizationReport] = None
+        self._stop_event = threading.Event()
+        self._job_thread: Optional[threading.Thread] = None
+
+    def mark_all_dirty(self):
+        """Force the next run to re-score every pending task"""
+        self.last_run = None
+
+    def run(self, full: bool = False) -> PrioritizationReport:
+        """Re-score pending tasks and write only the rows whose priority changed"""
+        start = time.perf_counter()
+        now = datetime.now()
+        full_scan = full or self.last_run is None
+
+        case_sql, case_params = self._compile_case(now)
+        scope_sql, scope_params = self._compile_scope(now, full_scan)
+
+        conn = self.task_manager.conn
+        with self.task_manager.lock, conn:
+            pending = conn.execute("SELECT COUNT(*) FROM tasks WHERE status=?",
+                                   (TaskStatus.PENDING.value,)).fetchone()[0]
+            scanned = conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {scope_sql}",
+                                   scope_params).fetchone()[0]
+            cursor = conn.execute(
+                f"UPDATE tasks SET priority = ({case_sql}), updated_at = ? "
+                f"WHERE {scope_sql} AND priority != ({case_sql})",
+                case_params + [now.isoformat()] + scope_params + case_params)
+            changed = cursor.rowcount
+
+        self.last_run = now
+        self.last_report = PrioritizationReport(
+            pending=pending,
+            scanned=scanned,
+            changed=changed,
+            full_scan=full_scan,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+        return self.last_report
+
+    def start_background(self, interval_seconds: float = 300,
+                         on_report: Optional[Callable[[PrioritizationReport], None]] = None):
+        """Run the engine every `interval_seconds` on a daemon thread"""
+        if self._job_thread and self._job_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._job_thread = threading.Thread(
+            target=self._background_loop,
+            args=(interval_seconds, on_report),
+            daemon=True
+        )
+        self._job_thread.start()
+
+    def stop_background(self):
+        """Stop the background job and wait for it to exit"""
+        self._stop_event.set()
+        if self._job_thread:
+            self._job_thread.join()
+            self._job_thread = None
+
+    def _background_loop(self, interval_seconds: float, on_report):
+        # SQLite connections are tied to the thread that opened them
+        job_manager = TaskManager(self.task_manager.db_path)
+        job_engine = PrioritizationEngine(job_manager, self.rules)
+        try:
+            while not self._stop_event.wait(interval_seconds):
+                try:
+                    report = job_engine.run()
+                except Exception as e:
+                    print(f"Background prioritization failed: {e}")
+                    continue
+
+                self.last_report = report
+                if on_report:
+                    on_report(report)
+        finally:
+            job_manager.close()
+
+    def _compile_case(self, now: datetime) -> Tuple[str, list]:
+        whens = []
+        params = []
+        for rule in self.rules:
+            predicate, rule_params = rule.to_sql(now)
+            whens.append(f"WHEN {predicate} THEN ?")
+            params.extend(rule_params)
+            params.append(rule.priority.value)
+
+        params.append(Priority.OPTIONAL.value)
+        return "CASE " + " ".join(whens) + " ELSE ? END", params
+
+    def _compile_scope(self, now: datetime, full_scan: bool) -> Tuple[str, list]:
+        scope = "status = ?"
+        params = [TaskStatus.PENDING.value]
+        if full_scan:
+            return scope, params
+
+        # Dirty tasks; some callers store updated_at with a space instead of 'T'
+        conditions = ["replace(updated_at, ' ', 'T') > ?"]
+        params.append(self.last_run.isoformat())
+
+        due_windows = [rule.due_within_days for rule in self.rules if rule.due_within_days is not None]
+        if due_windows:
+            conditions.append("(due_date IS NOT NULL AND due_date != '' AND due_date < ?)")
+            params.append(_day_after(now, max(due_windows)))
+
+        for age in {rule.min_age_days for rule in self.rules if rule.min_age_days is not None}:
+            # Tasks that crossed the age threshold since the previous run
+            conditions.append("(created_at <= ? AND created_at > ?)")
+            params.append((now - timedelta(days=age)).isoformat())
+            params.append((self.last_run - timedelta(days=age)).isoformat())
+
+        return f"{scope} AND ({' OR '.join(conditions)})", params
+
+
+def _day_after(now: datetime, days: int) -> str:
+    """ISO date of the day following `now + days`, used as an exclusive upper bound"""
+    return (now.date() + timedelta(days=days + 1)).isoformat()
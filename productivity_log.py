@@ -0,0 +1,289 @@
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from task_manager import TaskManager, Task, TaskStatus
+
+
+COUNTERS = (
+    "tasks_created",
+    "tasks_completed",
+    "focus_sessions",
+    "focus_minutes",
+    "current_streak",
+    "longest_streak",
+    "last_active_day",
+)
+
+
+class ProductivityLog:
+    """Append-only productivity events with incrementally maintained counters.
+
+    Every event updates its counters in the same transaction, so streaks and
+    scores are constant-time reads that survive restarts.
+    """
+
+    def __init__(self, db_path: str = "memorymate.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._task_manager: Optional[TaskManager] = None
+        self._init_db()
+
+    def _get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='productivity_counters'")
+                counters_exist = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS productivity_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        event_type TEXT NOT NULL,
+                        task_id INTEGER,
+                        session_id INTEGER,
+                        value REAL,
+                        occurred_at TEXT NOT NULL,
+                        day TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_productivity_events_occurred_at ON productivity_events(occurred_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_productivity_events_day ON productivity_events(day)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_productivity_events_task ON productivity_events(task_id)")
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS productivity_counters (
+                        name TEXT PRIMARY KEY,
+                        value REAL NOT NULL DEFAULT 0
+                    )
+                """)
+                cursor.executemany("INSERT OR IGNORE INTO productivity_counters (name, value) VALUES (?, 0)",
+                                   [(name,) for name in COUNTERS])
+
+                if not counters_exist:
+                    self._seed_from_tasks(cursor)
+
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _seed_from_tasks(self, cursor):
+        """Start the task counters from tasks created before the log existed"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'")
+        if cursor.fetchone() is None:
+            return
+
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(status = ?), 0) FROM tasks", (TaskStatus.COMPLETED.value,))
+        created, completed = cursor.fetchone()
+        cursor.execute("UPDATE productivity_counters SET value = ? WHERE name = 'tasks_created'", (created,))
+        cursor.execute("UPDATE productivity_counters SET value = ? WHERE name = 'tasks_completed'", (completed,))
+
+    def attach(self, task_manager: TaskManager):
+        """Record task events from every write made through `task_manager`"""
+        self._task_manager = task_manager
+        # Batch listener: a bulk task write is logged in one transaction
+        task_manager.add_batch_listener(self._on_task_changes)
+
+    def record_task_created(self, task_id: int, completed: bool = False):
+        self.record_tasks_created([(task_id, completed)])
+
+    def record_tasks_created(self, tasks: List[Tuple[int, bool]]):
+        """Record (task_id, completed) creations in a single transaction"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                for task_id, completed in tasks:
+                    self._append(cursor, "task_created", task_id=task_id)
+                    if completed:
+                        self._complete(cursor, task_id)
+                self._increment(cursor, "tasks_created", len(tasks))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record_task_status(self, task_id: int, status: TaskStatus):
+        """Record a completion, or a reopening of a previously completed task"""
+        self.record_task_statuses([(task_id, status)])
+
+    def record_task_statuses(self, statuses: List[Tuple[int, TaskStatus]]):
+        """record_task_status for many (task_id, status) pairs in a single transaction"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                for task_id, status in statuses:
+                    cursor.execute(
+                        """SELECT event_type FROM productivity_events
+                           WHERE task_id = ? AND event_type IN ('task_completed', 'task_reopened')
+                           ORDER BY id DESC LIMIT 1""",
+                        (task_id,)
+                    )
+                    row = cursor.fetchone()
+                    is_completed = row is not None and row[0] == "task_completed"
+
+                    if status == TaskStatus.COMPLETED and not is_completed:
+                        self._complete(cursor, task_id)
+                    elif status != TaskStatus.COMPLETED and is_completed:
+                        self._append(cursor, "task_reopened", task_id=task_id)
+                        self._increment(cursor, "tasks_completed", -1)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record_focus_started(self, session):
+        if session.kind != "pomodoro":
+            return
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                self._append(conn.cursor(), "focus_started", task_id=session.task_id, session_id=session.id)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record_focus_ended(self, session):
+        if session.kind != "pomodoro":
+            return
+        minutes = session.duration_seconds / 60
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                self._append(cursor, "focus_ended", task_id=session.task_id, session_id=session.id, value=minutes)
+                self._increment(cursor, "focus_sessions", 1)
+                self._increment(cursor, "focus_minutes", minutes)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Counters plus the derived streak and productivity score"""
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name, value FROM productivity_counters")
+                counters = dict(cursor.fetchall())
+            finally:
+                conn.close()
+
+        # A streak only survives if something was completed today or yesterday
+        last_active = int(counters.get("last_active_day", 0))
+        current_streak = int(counters.get("current_streak", 0))
+        if date.today().toordinal() - last_active > 1:
+            current_streak = 0
+
+        created = int(counters.get("tasks_created", 0))
+        completed = int(counters.get("tasks_completed", 0))
+        focus_sessions = int(counters.get("focus_sessions", 0))
+        completion_rate = completed / created if created else 0.0
+        score = round(60 * completion_rate + 25 * min(current_streak, 7) / 7 + 15 * min(focus_sessions, 10) / 10)
+
+        return {
+            "tasks_created": created,
+            "tasks_completed": completed,
+            "focus_sessions": focus_sessions,
+            "focus_minutes": counters.get("focus_minutes", 0.0),
+            "current_streak": current_streak,
+            "longest_streak": int(counters.get("longest_streak", 0)),
+            "productivity_score": min(100, score),
+        }
+
+    def get_events(self, since: Optional[str] = None, until: Optional[str] = None,
+                   event_type: Optional[str] = None, limit: int = 1000) -> List[dict]:
+        """Events in time order, filtered on the indexed occurred_at column"""
+        clauses = []
+        params = []
+        if since:
+            clauses.append("occurred_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("occurred_at < ?")
+            params.append(until)
+        if event_type:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, event_type, task_id, session_id, value, occurred_at "
+                    f"FROM productivity_events {where} ORDER BY occurred_at ASC LIMIT ?",
+                    params
+                )
+                return [
+                    {
+                        "id": row[0],
+                        "event_type": row[1],
+                        "task_id": row[2],
+                        "session_id": row[3],
+                        "value": row[4],
+                        "occurred_at": row[5]
+                    }
+                    for row in cursor.fetchall()
+                ]
+            finally:
+                conn.close()
+
+    def _on_task_changes(self, action: str, items: List[Tuple[int, Optional[Task]]]):
+        if action == 'added':
+            self.record_tasks_created([
+                (task_id, task is not None and task.status == TaskStatus.COMPLETED)
+                for task_id, task in items
+            ])
+        elif action in ('updated', 'status_changed'):
+            statuses = []
+            for task_id, task in items:
+                if task is None:
+                    task = self._task_manager.get_task(task_id)
+                    if task is None:
+                        continue
+                statuses.append((task_id, task.status))
+            if statuses:
+                self.record_task_statuses(statuses)
+
+    def _append(self, cursor, event_type: str, task_id: Optional[int] = None,
+                session_id: Optional[int] = None, value: Optional[float] = None):
+        now = datetime.now()
+        cursor.execute(
+            """INSERT INTO productivity_events (event_type, task_id, session_id, value, occurred_at, day)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (event_type, task_id, session_id, value, now.isoformat(), now.strftime('%Y-%m-%d'))
+        )
+
+    def _increment(self, cursor, name: str, amount: float):
+        cursor.execute("UPDATE productivity_counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _complete(self, cursor, task_id: int):
+        self._append(cursor, "task_completed", task_id=task_id)
+        self._increment(cursor, "tasks_completed", 1)
+
+        cursor.execute(
+            "SELECT name, value FROM productivity_counters WHERE name IN ('current_streak', 'longest_streak', 'last_active_day')"
+        )
+        counters = dict(cursor.fetchall())
+        today = date.today().toordinal()
+        last_active = int(counters.get("last_active_day", 0))
+        streak = int(counters.get("current_streak", 0))
+
+        if last_active == today:
+            return
+        streak = streak + 1 if last_active == today - 1 else 1
+
+        cursor.executemany(
+            "UPDATE productivity_counters SET value = ? WHERE name = ?",
+            [
+                (streak, "current_streak"),
+                (max(streak, int(counters.get("longest_streak", 0))), "longest_streak"),
+                (today, "last_active_day"),
+            ]
+        )
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from llm_worker import SamplingParams
+
+
+RESPONSE_CACHE_PATH = "llm_cache.db"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt, so trivially different inputs share an entry"""
+    return _WHITESPACE.sub(" ", prompt).strip().casefold()
+
+
+class ResponseCache:
+    """LLM replies stored in SQLite, keyed by normalized prompt, model and sampling parameters.
+
+    Entries expire after `ttl` seconds and only the `max_entries` most recently
+    used are kept. Replies are only cached for deterministic sampling; with a
+    random seed and a non-zero temperature the same prompt is meant to get a
+    different reply, so `get` misses and `put` does nothing.
+    """
+
+    # Seconds between last-used updates for one entry, so hits rarely pay for a commit
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, db_path: str = RESPONSE_CACHE_PATH, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 5000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # One connection kept open: a lookup costs microseconds instead of a reconnect
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)")
+
+    @staticmethod
+    def key(prompt: str, model: str, sampling: SamplingParams) -> str:
+        material = json.dumps([normalize_prompt(prompt), model, sampling.to_payload()], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, prompt: str, model: str, sampling: SamplingParams) -> Optional[str]:
+        if not sampling.deterministic:
+            return None
+        now = time.time()
+        key = self.key(prompt, model, sampling)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, last_used FROM llm_responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.TOUCH_INTERVAL:
+                with self._conn:
+                    self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, prompt: str, model: str, sampling: SamplingParams, response: str):
+        if not sampling.deterministic or not response:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (self.key(prompt, model, sampling), response, now, now),
+            )
+            self._conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN "
+                "(SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide response cache, opened on first use"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
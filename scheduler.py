@@ -0,0 +1,295 @@
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from task_manager import TaskManager, Task, TaskStatus
+
+
+class DeadlineScheduler:
+    """Runs callbacks at their deadlines from a single shared thread.
+
+    Deadlines live in a heap; rescheduling or cancelling a key is O(log n) and
+    superseded heap entries are dropped lazily. The thread sleeps on a condition
+    variable until the earliest deadline instead of polling.
+    """
+
+    def __init__(self, name: str = "memorymate-scheduler"):
+        self.name = name
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[float, int, Callable[[], None]]] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def schedule(self, key: Hashable, when: float, callback: Callable[[], None]):
+        """Run `callback` at epoch time `when`, replacing any deadline already set for `key`"""
+        with self._cond:
+            seq = next(self._counter)
+            self._entries[key] = (when, seq, callback)
+            heapq.heappush(self._heap, (when, seq, key))
+            if self._heap[0][1] == seq:
+                # New earliest deadline: wake the thread so it re-arms its wait
+                self._cond.notify()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the deadline for `key`; returns False if none was set"""
+        with self._cond:
+            if self._entries.pop(key, None) is None:
+                return False
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._compact()
+            return True
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """Epoch time at which `key` fires, or None if it is not scheduled"""
+        with self._cond:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def next_deadline(self) -> Optional[float]:
+        with self._cond:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def keys(self) -> List[Hashable]:
+        """Keys with a pending deadline"""
+        with self._cond:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def start(self):
+        """Start the scheduler thread"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread; pending deadlines are kept"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                callback = None
+                while self._running and callback is None:
+                    self._discard_stale()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+
+                    when, _, key = self._heap[0]
+                    delay = when - time.time()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+
+                    heapq.heappop(self._heap)
+                    callback = self._entries.pop(key)[2]
+
+                if not self._running:
+                    return
+
+            try:
+                callback()
+            except Exception as e:
+                print(f"Scheduled callback failed: {e}")
+
+    def _discard_stale(self):
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [(when, seq, key) for key, (when, seq, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+
+@dataclass
+class Reminder:
+    task_id: int
+    title: str
+    due_at: datetime
+
+
+def console_hook(reminder: Reminder):
+    """Print a reminder to the terminal"""
+    print(f"\n⏰ Reminder: '{reminder.title}' is due {reminder.due_at.strftime('%Y-%m-%d %H:%M')}")
+
+
+def tts_hook(reminder: Reminder):
+    """Speak a reminder out loud.
+
+    The speech is queued for the TTS speaker thread instead of holding up the
+    scheduler thread that other reminders and timers share.
+    """
+    from tts import speak_text
+    speak_text(f"Reminder: {reminder.title} is due now.", block=False)
+
+
+ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+
+
+class ReminderScheduler:
+    """Fires reminder hooks when tasks reach their due date.
+
+    A task due today with no time is reminded at `default_time`, or right away
+    if that has already passed; each due date is only reminded once. Fired
+    reminders are stored in the task database, so a restart does not repeat
+    them.
+    """
+
+    def __init__(self, task_manager: TaskManager,
+                 hooks: Optional[List[Callable[[Reminder], None]]] = None,
+                 default_time: str = "09:00",
+                 scheduler: Optional[DeadlineScheduler] = None):
+        self.task_manager = task_manager
+        self.hooks = list(hooks) if hooks is not None else [console_hook]
+        # Date-only due dates are reminded at this time of day
+        self.default_time = datetime.strptime(default_time, "%H:%M").time()
+        self.scheduler = scheduler or DeadlineScheduler("memorymate-reminders")
+        self._owns_scheduler = scheduler is None
+        # (task id, due time) of reminders already fired, mirrored in the fired_reminders table
+        self._fired: Set[Tuple[int, datetime]] = set()
+        self._db_lock = threading.Lock()
+        self._init_db()
+
+    def _get_connection(self):
+        return sqlite3.connect(self.task_manager.db_path)
+
+    def _init_db(self):
+        with self._db_lock:
+            conn = self._get_connection()
+            try:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS fired_reminders (
+                        task_id INTEGER NOT NULL,
+                        due_at TEXT NOT NULL,
+                        fired_at TEXT NOT NULL,
+                        PRIMARY KEY (task_id, due_at)
+                    )
+                """)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _load_fired(self):
+        """Forget reminders for past days and load the rest"""
+        since = (datetime.now() - timedelta(days=1)).date().isoformat()
+        with self._db_lock:
+            conn = self._get_connection()
+            try:
+                conn.execute("DELETE FROM fired_reminders WHERE due_at < ?", (since,))
+                conn.commit()
+                rows = conn.execute("SELECT task_id, due_at FROM fired_reminders").fetchall()
+            finally:
+                conn.close()
+        self._fired.update((task_id, datetime.fromisoformat(due_at)) for task_id, due_at in rows)
+
+    def start(self):
+        """Load upcoming due tasks and begin firing reminders"""
+        self._load_fired()
+        self._load_upcoming()
+        self.task_manager.add_listener(self._on_task_change)
+        self.scheduler.start()
+
+    def stop(self):
+        self.task_manager.remove_listener(self._on_task_change)
+        if self._owns_scheduler:
+            self.scheduler.stop()
+
+    def add_hook(self, hook: Callable[[Reminder], None]):
+        self.hooks.append(hook)
+
+    def schedule_task(self, task: Task) -> bool:
+        """Schedule (or reschedule) the reminder for a task; returns True if one is pending"""
+        key = ('task', task.id)
+        due_at = self._due_at(task.due_date)
+        now = datetime.now()
+        if due_at is None or task.status not in ACTIVE_STATUSES or (task.id, due_at) in self._fired:
+            self.scheduler.cancel(key)
+            return False
+        when = due_at
+        if due_at <= now:
+            if len(task.due_date) != 10 or due_at.date() != now.date():
+                self.scheduler.cancel(key)
+                return False
+            # Due today but the default time has passed: remind now rather than never
+            when = now
+
+        reminder = Reminder(task_id=task.id, title=task.title, due_at=due_at)
+        self.scheduler.schedule(key, when.timestamp(), lambda: self._fire(reminder))
+        return True
+
+    def upcoming_count(self) -> int:
+        """Pending task reminders (focus timers may share the scheduler)"""
+        return sum(1 for key in self.scheduler.keys() if isinstance(key, tuple) and key[0] == 'task')
+
+    def _load_upcoming(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        for task in self.task_manager.get_tasks_due_from(today, list(ACTIVE_STATUSES)):
+            self.schedule_task(task)
+
+    def _on_task_change(self, action: str, task_id: int, task: Optional[Task]):
+        if action == 'deleted':
+            self.scheduler.cancel(('task', task_id))
+        elif action == 'priority_changed':
+            return
+        else:
+            if task is None:
+                task = self.task_manager.get_task(task_id)
+                if task is None:
+                    self.scheduler.cancel(('task', task_id))
+                    return
+            elif task.id is None:
+                task = replace(task, id=task_id)
+            self.schedule_task(task)
+
+    def _fire(self, reminder: Reminder):
+        self._fired.add((reminder.task_id, reminder.due_at))
+        with self._db_lock:
+            conn = self._get_connection()
+            try:
+                conn.execute("INSERT OR IGNORE INTO fired_reminders (task_id, due_at, fired_at) VALUES (?, ?, ?)",
+                             (reminder.task_id, reminder.due_at.isoformat(), datetime.now().isoformat()))
+                conn.commit()
+            finally:
+                conn.close()
+        for hook in self.hooks:
+            try:
+                hook(reminder)
+            except Exception as e:
+                print(f"Reminder hook failed: {e}")
+
+    def _due_at(self, due_date: Optional[str]) -> Optional[datetime]:
+        if not due_date:
+            return None
+        try:
+            if len(due_date) == 10:
+                return datetime.combine(datetime.strptime(due_date, '%Y-%m-%d').date(), self.default_time)
+            return datetime.fromisoformat(due_date)
+        except ValueError:
+            return None
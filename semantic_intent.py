@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from intent_classifier import IntentClassifier, PROTOTYPE_EXAMPLES
+
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+PROTOTYPE_PATH = "intent_prototypes.npz"
+
+
+def load_sentence_encoder(model_name: str = DEFAULT_MODEL) -> Optional[Callable[[List[str]], np.ndarray]]:
+    """Batch encoder backed by sentence-transformers, or None if it is not installed"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(texts, normalize_embeddings=True)
+
+
+class SemanticIntentClassifier:
+    """Nearest-prototype intent classifier over sentence embeddings.
+
+    Each intent's prototype is the normalized mean embedding of its example
+    utterances. Prototypes are saved next to a fingerprint of the model and
+    examples, so they are only recomputed when either changes. Inputs whose best
+    cosine similarity is below `threshold`, or any input when no encoder is
+    available, go to the keyword rules instead. Recent input embeddings are kept
+    in an LRU so repeated commands never reach the encoder.
+    """
+
+    def __init__(self, keyword_classifier: Optional[IntentClassifier] = None,
+                 examples: Sequence[Tuple[str, str]] = PROTOTYPE_EXAMPLES,
+                 model_name: str = DEFAULT_MODEL,
+                 prototype_path: str = PROTOTYPE_PATH,
+                 threshold: float = 0.55,
+                 cache_size: int = 256,
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None):
+        self.keyword_classifier = keyword_classifier or IntentClassifier()
+        self.examples = list(examples)
+        self.model_name = model_name
+        self.prototype_path = prototype_path
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._encoder = encoder
+        self._encoder_loaded = encoder is not None
+        self._intents: List[str] = []
+        self._prototypes: Optional[np.ndarray] = None
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether an encoder could be loaded; otherwise every call uses the keyword rules"""
+        return self._get_encoder() is not None
+
+    def classify(self, text: str) -> str:
+        intent, _ = self.classify_with_score(text)
+        return intent
+
+    def classify_with_score(self, text: str) -> Tuple[str, Optional[float]]:
+        """Intent plus the cosine similarity behind it (None when the keyword rules decided)"""
+        if not self._ensure_prototypes():
+            return self.keyword_classifier.classify(text), None
+
+        similarities = self._prototypes @ self._embed(text)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return self.keyword_classifier.classify(text), None
+        return self._intents[best], float(similarities[best])
+
+    def classify_many(self, texts: Sequence[str]) -> List[str]:
+        return [self.classify(text) for text in texts]
+
+    def _get_encoder(self):
+        if not self._encoder_loaded:
+            self._encoder_loaded = True
+            try:
+                self._encoder = load_sentence_encoder(self.model_name)
+            except Exception as e:
+                print(f"⚠️  Semantic intents disabled, could not load {self.model_name}: {e}")
+                self._encoder = None
+        return self._encoder
+
+    def _embed(self, text: str) -> np.ndarray:
+        key = " ".join(text.lower().split())
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return vector
+            self.cache_misses += 1
+
+        vector = _normalize(np.asarray(self._encoder([key]), dtype=np.float32))[0]
+        with self._lock:
+            self._cache[key] = vector
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def _ensure_prototypes(self) -> bool:
+        if self._prototypes is not None:
+            return True
+        if self._get_encoder() is None:
+            return False
+
+        fingerprint = self._fingerprint()
+        if not self._load_prototypes(fingerprint):
+            self._build_prototypes()
+            self._save_prototypes(fingerprint)
+        return True
+
+    def _build_prototypes(self):
+        by_intent: Dict[str, List[str]] = {}
+        for text, intent in self.examples:
+            by_intent.setdefault(intent, []).append(text)
+
+        self._intents = list(by_intent)
+        vectors = _normalize(np.asarray(self._encoder([t for i in self._intents for t in by_intent[i]]),
+                                        dtype=np.float32))
+        prototypes, offset = [], 0
+        for intent in self._intents:
+            count = len(by_intent[intent])
+            prototypes.append(vectors[offset:offset + count].mean(axis=0))
+            offset += count
+        self._prototypes = _normalize(np.stack(prototypes))
+
+    def _fingerprint(self) -> str:
+        payload = json.dumps([self.model_name, self.examples], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_prototypes(self, fingerprint: str) -> bool:
+        if not os.path.exists(self.prototype_path):
+            return False
+        try:
+            with np.load(self.prototype_path) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return False
+                self._intents = [str(intent) for intent in data["intents"]]
+                self._prototypes = data["prototypes"].astype(np.float32)
+            return True
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable intent prototypes {self.prototype_path}: {e}")
+            return False
+
+    def _save_prototypes(self, fingerprint: str):
+        try:
+            # A file object stops numpy from appending ".npz" to custom paths
+            with open(self.prototype_path, "wb") as f:
+                np.savez(f, fingerprint=fingerprint, intents=np.array(self._intents),
+                         prototypes=self._prototypes)
+        except OSError as e:
+            print(f"⚠️  Could not save intent prototypes: {e}")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
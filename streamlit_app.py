@@ -4,12 +4,16 @@ from datetime import datetime, timedelta
 import pandas as pd
 from ai_assistant import MemoryMateAssistant
 from task_manager import Task, Priority, TaskStatus
+from change_feed import collapse_changes
 from tts import speak_text
 import plotly.express as px
 import plotly.graph_objects as go
 import random
 import json
 
+# Changes replayed into the task cache per rerun; a cache further behind than this reloads
+TASK_REPLAY_LIMIT = 1000
+
 # Page configuration
 st.set_page_config(
     page_title="🧠 MemoryMate - AI Productivity Assistant",
@@ -502,10 +506,6 @@ def initialize_session_state():
         st.session_state.onboarding_complete = False
     if 'onboarding_step' not in st.session_state:
         st.session_state.onboarding_step = 0
-    if 'streak_count' not in st.session_state:
-        st.session_state.streak_count = 0
-    if 'productivity_score' not in st.session_state:
-        st.session_state.productivity_score = 85
     if 'badges' not in st.session_state:
         st.session_state.badges = ["🚀 First Task", "🎯 Focus Master"]
     if 'last_completion_date' not in st.session_state:
@@ -518,6 +518,48 @@ def initialize_session_state():
         st.session_state.page = "Dashboard" # Default page
 
 
+def get_cached_tasks():
+    """All tasks, refreshed from the change feed instead of re-querying on every rerun"""
+    task_manager = st.session_state.assistant.task_manager
+    
+    if 'task_cache' in st.session_state:
+        seq = st.session_state.task_cache_seq
+        changes = task_manager.changes_since(seq, limit=TASK_REPLAY_LIMIT)
+        if len(changes) >= TASK_REPLAY_LIMIT or not task_manager.change_feed.covers(seq):
+            # Too far behind to replay cheaply, or past the trimmed part of the log; reload below
+            del st.session_state.task_cache
+        elif changes:
+            last_seq, latest_ops = collapse_changes(changes)
+            cache = st.session_state.task_cache
+            for task_id, op in latest_ops.items():
+                task = task_manager.get_task(task_id) if op != 'delete' else None
+                if task:
+                    cache[task_id] = task
+                else:
+                    cache.pop(task_id, None)
+            st.session_state.task_cache_seq = last_seq
+            st.session_state.task_cache_sorted = sort_tasks(cache.values())
+    
+    if 'task_cache' not in st.session_state:
+        # Read the sequence first so writes racing the reload are replayed next time
+        st.session_state.task_cache_seq = task_manager.change_feed.latest_seq("task")
+        st.session_state.task_cache = {task.id: task for task in task_manager.get_all_tasks()}
+        st.session_state.task_cache_sorted = sort_tasks(st.session_state.task_cache.values())
+    
+    return list(st.session_state.task_cache_sorted)
+
+
+def sort_tasks(tasks):
+    """Same order as TaskManager.get_all_tasks: priority DESC, then due date ASC"""
+    tasks = sorted(tasks, key=lambda t: (t.due_date is not None, t.due_date or ""))
+    return sorted(tasks, key=lambda t: t.priority.value, reverse=True)
+
+
+def get_productivity_stats():
+    """Read persisted streak, score and task counters"""
+    return st.session_state.assistant.productivity_log.get_stats()
+
+
 def get_motivational_quote():
     """Get a random motivational quote"""
     quotes = [
@@ -616,7 +658,7 @@ def render_kanban_board():
     """Render Kanban board view"""
     st.markdown("### 📋 Kanban Board View")
     
-    all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
+    all_tasks = get_cached_tasks()
     
     # Group tasks by status
     pending_tasks = [t for t in all_tasks if t.status == TaskStatus.PENDING]
@@ -720,36 +762,35 @@ def render_kanban_board():
 
 def check_achievements():
     """Check and award achievements"""
-    all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
-    completed_tasks = [t for t in all_tasks if t.status == TaskStatus.COMPLETED]
+    stats = get_productivity_stats()
     
     new_achievements = []
     
     # First task achievement
-    if len(all_tasks) >= 1 and "🚀 First Task" not in st.session_state.achievements:
+    if stats["tasks_created"] >= 1 and "🚀 First Task" not in st.session_state.achievements:
         new_achievements.append("🚀 First Task")
         st.session_state.achievements.append("🚀 First Task")
     
     # Task completion achievements
-    if len(completed_tasks) >= 5 and "🎯 Task Master" not in st.session_state.achievements:
+    if stats["tasks_completed"] >= 5 and "🎯 Task Master" not in st.session_state.achievements:
         new_achievements.append("🎯 Task Master")
         st.session_state.achievements.append("🎯 Task Master")
     
-    if len(completed_tasks) >= 10 and "🏆 Productivity Champion" not in st.session_state.achievements:
+    if stats["tasks_completed"] >= 10 and "🏆 Productivity Champion" not in st.session_state.achievements:
         new_achievements.append("🏆 Productivity Champion")
         st.session_state.achievements.append("🏆 Productivity Champion")
     
     # Streak achievements
-    if st.session_state.streak_count >= 3 and "🔥 Streak Master" not in st.session_state.achievements:
+    if stats["current_streak"] >= 3 and "🔥 Streak Master" not in st.session_state.achievements:
         new_achievements.append("🔥 Streak Master")
         st.session_state.achievements.append("🔥 Streak Master")
     
-    if st.session_state.streak_count >= 7 and "🔥 Week Warrior" not in st.session_state.achievements:
+    if stats["current_streak"] >= 7 and "🔥 Week Warrior" not in st.session_state.achievements:
         new_achievements.append("🔥 Week Warrior")
         st.session_state.achievements.append("🔥 Week Warrior")
     
     # Score achievements
-    if st.session_state.productivity_score >= 90 and "⭐ High Performer" not in st.session_state.achievements:
+    if stats["productivity_score"] >= 90 and "⭐ High Performer" not in st.session_state.achievements:
         new_achievements.append("⭐ High Performer")
         st.session_state.achievements.append("⭐ High Performer")
     
@@ -779,13 +820,14 @@ def render_achievements():
 
 def render_gamification():
     """Render gamification elements"""
+    stats = get_productivity_stats()
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.markdown(f"""
         <div class="streak-card">
             <h2>🔥 Streak</h2>
-            <h1 style="font-size: 3rem; margin: 0;">{st.session_state.streak_count}</h1>
+            <h1 style="font-size: 3rem; margin: 0;">{stats["current_streak"]}</h1>
             <p>days of productivity</p>
         </div>
         """, unsafe_allow_html=True)
@@ -794,7 +836,7 @@ def render_gamification():
         st.markdown(f"""
         <div class="productivity-score">
             <h2>📊 Score</h2>
-            <h1 style="font-size: 3rem; margin: 0;">{st.session_state.productivity_score}</h1>
+            <h1 style="font-size: 3rem; margin: 0;">{stats["productivity_score"]}</h1>
             <p>productivity points</p>
         </div>
         """, unsafe_allow_html=True)
@@ -825,7 +867,7 @@ def render_ai_coach():
     
     # Get AI recommendations
     try:
-        all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
+        all_tasks = get_cached_tasks()
         urgent_tasks = [t for t in all_tasks if t.priority == Priority.URGENT_IMPORTANT and t.status != TaskStatus.COMPLETED]
         
         if urgent_tasks:
@@ -881,7 +923,7 @@ def render_dashboard():
     """, unsafe_allow_html=True)
     
     # Quick stats with enhanced styling
-    all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
+    all_tasks = get_cached_tasks()
     pending_tasks = [t for t in all_tasks if t.status == TaskStatus.PENDING]
     completed_tasks = [t for t in all_tasks if t.status == TaskStatus.COMPLETED]
     urgent_tasks = [t for t in all_tasks if t.priority == Priority.URGENT_IMPORTANT and t.status != TaskStatus.COMPLETED]
@@ -952,10 +994,7 @@ def render_dashboard():
                 )
                 st.session_state.assistant.task_manager.add_task(task)
                 
-                # Update gamification
-                st.session_state.productivity_score = min(100, st.session_state.productivity_score + 5)
-                
-                st.success("🎉 Task added successfully! +5 productivity points")
+                st.success("🎉 Task added successfully!")
                 st.rerun()
     
     # Task lists with enhanced styling
@@ -1041,11 +1080,7 @@ def render_dashboard():
                             task.updated_at = datetime.now().isoformat()
                             st.session_state.assistant.task_manager.update_task(task)
                             
-                            # Update gamification
-                            st.session_state.productivity_score = min(100, st.session_state.productivity_score + 10)
-                            st.session_state.streak_count += 1
-                            
-                            st.success("🎉 Task completed! +10 productivity points, +1 streak!")
+                            st.success("🎉 Task completed! Your streak and score are updated.")
                             st.rerun()
                     
                     with col2:
@@ -1155,8 +1190,13 @@ def render_chat():
     
     if st.button("🚀 Send", key="send_chat"):
         if user_input.strip():
-            # Process with AI assistant
-            response = st.session_state.assistant.process_input(user_input.strip())
+            # Process with AI assistant, showing the reply as it streams in
+            placeholder = st.empty()
+            response = ""
+            for chunk in st.session_state.assistant.process_input_stream(user_input.strip()):
+                response += chunk
+                placeholder.markdown(response + "▌")
+            placeholder.markdown(response)
             
             # Add to chat history
             st.session_state.chat_history.append({"role": "user", "content": user_input.strip()})
@@ -1214,7 +1254,7 @@ def render_focus_mode():
     st.markdown("### Single-task focus for maximum productivity • 100% Offline")
     
     # Get current focus task
-    all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
+    all_tasks = get_cached_tasks()
     focus_tasks = [t for t in all_tasks if t.status == TaskStatus.IN_PROGRESS]
     
     if not focus_tasks:
@@ -1296,11 +1336,7 @@ def render_focus_mode():
             focus_task.updated_at = datetime.now().isoformat()
             st.session_state.assistant.task_manager.update_task(focus_task)
             
-            # Update gamification
-            st.session_state.productivity_score = min(100, st.session_state.productivity_score + 15)
-            st.session_state.streak_count += 1
-            
-            st.success("🎉 Task completed! +15 productivity points, +1 streak!")
+            st.success("🎉 Task completed! Your streak and score are updated.")
             st.rerun()
     
     with col2:
@@ -1331,7 +1367,7 @@ def render_analytics():
     st.markdown("### Your productivity insights • 100% Private Data")
     
     try:
-        all_tasks = st.session_state.assistant.task_manager.get_all_tasks()
+        all_tasks = get_cached_tasks()
         
         if all_tasks:
             # Task completion over time
@@ -1391,8 +1427,9 @@ def render_analytics():
                 st.info(f"🚨 **Urgent Task Management**: {len(completed_urgent)}/{len(urgent_tasks)} urgent tasks completed")
             
             # Streak information
-            st.info(f"🔥 **Current Streak**: {st.session_state.streak_count} days of productivity")
-            st.info(f"📊 **Productivity Score**: {st.session_state.productivity_score}/100 points")
+            stats = get_productivity_stats()
+            st.info(f"🔥 **Current Streak**: {stats['current_streak']} days of productivity")
+            st.info(f"📊 **Productivity Score**: {stats['productivity_score']}/100 points")
             
         else:
             st.info("📝 No tasks yet. Start adding tasks to see your analytics!")
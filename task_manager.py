@@ -1,10 +1,16 @@
 import sqlite3
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import threading
+from functools import wraps
+from datetime import date, datetime
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from change_feed import ChangeFeed, Change, ensure_change_log
+from date_parser import DueDateParser
+from keyword_tagger import TextTags, get_default_tagger
+
 
 class Priority(Enum):
     URGENT_IMPORTANT = "urgent_important"
@@ -33,12 +39,28 @@ class Task:
     ai_notes: Optional[str] = None
 
 
+def _synchronized(method):
+    """Run a TaskManager method while holding its lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class TaskManager:
     def __init__(self, db_path="memorymate.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # Shared across threads (e.g. the async pipeline's worker); `lock` serializes use
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self.lock = threading.RLock()
+        self._listeners: List[Callable[[str, int, Optional[Task]], None]] = []
+        self._batch_listeners: List[Callable[[str, List[Tuple[int, Optional[Task]]]], None]] = []
         self._create_tables()
+        self.change_feed = ChangeFeed(db_path)
+        # Keep the log bounded; consumers that fall behind the trim point reload (see ChangeFeed.covers)
+        self.change_feed.trim()
     
     def _create_tables(self):
         self.cursor.execute('''CREATE TABLE IF NOT EXISTS tasks (
@@ -53,8 +75,56 @@ class TaskManager:
             updated_at TEXT NOT NULL,
             ai_notes TEXT
         )''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_title_nocase ON tasks(title COLLATE NOCASE)")
+        ensure_change_log(self.cursor, "tasks", "task")
         self.conn.commit()
     
+    def changes_since(self, seq: int, limit: int = 1000) -> List[Change]:
+        """Task inserts, updates and deletes recorded after sequence number `seq`"""
+        return self.change_feed.changes_since(seq, entity="task", limit=limit)
+    
+    def add_listener(self, callback: Callable[[str, int, Optional[Task]], None]):
+        """Register a callback invoked as callback(action, task_id, task) after each committed write.
+        
+        Actions are 'added', 'updated', 'deleted', 'status_changed' and 'priority_changed';
+        `task` is None when only the id is known.
+        """
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str, int, Optional[Task]], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def add_batch_listener(self, callback: Callable[[str, List[Tuple[int, Optional[Task]]]], None]):
+        """Register a callback invoked as callback(action, [(task_id, task), ...]) once per write.
+        
+        Batch writes such as add_tasks() arrive as one call, so a listener that
+        persists something can do it in a single transaction.
+        """
+        self._batch_listeners.append(callback)
+    
+    def remove_batch_listener(self, callback: Callable[[str, List[Tuple[int, Optional[Task]]]], None]):
+        if callback in self._batch_listeners:
+            self._batch_listeners.remove(callback)
+    
+    def _notify(self, action: str, task_id: int, task: Optional[Task] = None):
+        self._notify_many(action, [(task_id, task)])
+    
+    def _notify_many(self, action: str, items: List[Tuple[int, Optional[Task]]]):
+        for callback in list(self._batch_listeners):
+            try:
+                callback(action, items)
+            except Exception as e:
+                print(f"Task listener error: {e}")
+        for callback in list(self._listeners):
+            for task_id, task in items:
+                try:
+                    callback(action, task_id, task)
+                except Exception as e:
+                    print(f"Task listener error: {e}")
+    
+    @_synchronized
     def add_task(self, task: Task) -> int:
         tags_json = json.dumps(task.tags)
         self.cursor.execute('''INSERT INTO tasks 
@@ -63,8 +133,26 @@ class TaskManager:
             (task.title, task.description, task.due_date, task.priority.value,
              task.status.value, tags_json, task.created_at, task.updated_at, task.ai_notes))
         self.conn.commit()
-        return self.cursor.lastrowid
+        task_id = self.cursor.lastrowid
+        self._notify('added', task_id, task)
+        return task_id
+    
+    @_synchronized
+    def add_tasks(self, tasks: List[Task]) -> List[int]:
+        """Insert many tasks in a single transaction and return their ids"""
+        task_ids = []
+        with self.conn:
+            # Inserts go row by row so every new id is known, but they share one commit
+            for task in tasks:
+                self.cursor.execute('''INSERT INTO tasks 
+                    (title, description, due_date, priority, status, tags, created_at, updated_at, ai_notes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                    self._task_to_params(task))
+                task_ids.append(self.cursor.lastrowid)
+        self._notify_many('added', list(zip(task_ids, tasks)))
+        return task_ids
     
+    @_synchronized
     def update_task(self, task: Task) -> bool:
         if not task.id:
             return False
@@ -76,8 +164,43 @@ class TaskManager:
             (task.title, task.description, task.due_date, task.priority.value,
              task.status.value, tags_json, task.updated_at, task.ai_notes, task.id))
         self.conn.commit()
+        self._notify('updated', task.id, task)
         return True
     
+    @_synchronized
+    def update_tasks(self, tasks: List[Task]) -> int:
+        """Update many tasks with one executemany call and a single commit"""
+        rows = [self._task_to_params(task, with_created_at=False) + (task.id,)
+                for task in tasks if task.id]
+        if not rows:
+            return 0
+        with self.conn:
+            self.cursor.executemany('''UPDATE tasks SET 
+                title=?, description=?, due_date=?, priority=?, status=?, tags=?, updated_at=?, ai_notes=?
+                WHERE id=?''', rows)
+        self._notify_many('updated', [(task.id, task) for task in tasks if task.id])
+        return len(rows)
+    
+    def bulk_set_status(self, task_ids: List[int], status: TaskStatus) -> int:
+        """Set the status of many tasks in a single transaction"""
+        return self._bulk_set_column("status", status.value, task_ids)
+    
+    def bulk_set_priority(self, task_ids: List[int], priority: Priority) -> int:
+        """Set the priority of many tasks in a single transaction"""
+        return self._bulk_set_column("priority", priority.value, task_ids)
+    
+    @_synchronized
+    def _bulk_set_column(self, column: str, value: str, task_ids: List[int]) -> int:
+        if not task_ids:
+            return 0
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.cursor.executemany(f"UPDATE tasks SET {column}=?, updated_at=? WHERE id=?",
+                                    [(value, now, task_id) for task_id in task_ids])
+        self._notify_many(f'{column}_changed', [(task_id, None) for task_id in task_ids])
+        return len(task_ids)
+    
+    @_synchronized
     def get_task(self, task_id: int) -> Optional[Task]:
         self.cursor.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
         row = self.cursor.fetchone()
@@ -85,30 +208,97 @@ class TaskManager:
             return self._row_to_task(row)
         return None
     
+    @_synchronized
+    def get_task_by_position(self, position: int) -> Optional[Task]:
+        """Get the task at a 0-based position in get_all_tasks() order without loading the others"""
+        if position < 0:
+            return None
+        self.cursor.execute("SELECT * FROM tasks ORDER BY priority DESC, due_date ASC LIMIT 1 OFFSET ?", (position,))
+        row = self.cursor.fetchone()
+        if row:
+            return self._row_to_task(row)
+        return None
+    
+    @_synchronized
+    def get_tasks_by_title(self, title: str) -> List[Task]:
+        """Case-insensitive exact title lookup (served by the title index)"""
+        self.cursor.execute("SELECT * FROM tasks WHERE title = ? COLLATE NOCASE", (title.strip(),))
+        return [self._row_to_task(row) for row in self.cursor.fetchall()]
+    
+    @_synchronized
+    def get_tasks_by_ids(self, task_ids: List[int]) -> List[Task]:
+        """Fetch several tasks by primary key, keeping the order of `task_ids`"""
+        if not task_ids:
+            return []
+        placeholders = ", ".join("?" for _ in task_ids)
+        self.cursor.execute(f"SELECT * FROM tasks WHERE id IN ({placeholders})", list(task_ids))
+        tasks = {row[0]: self._row_to_task(row) for row in self.cursor.fetchall()}
+        return [tasks[task_id] for task_id in task_ids if task_id in tasks]
+    
+    @_synchronized
+    def get_task_titles(self) -> List[tuple]:
+        """(id, title) pairs for every task, without decoding full rows"""
+        self.cursor.execute("SELECT id, title FROM tasks")
+        return self.cursor.fetchall()
+    
+    @_synchronized
     def get_tasks_by_priority(self, priority: Priority) -> List[Task]:
         self.cursor.execute("SELECT * FROM tasks WHERE priority=? ORDER BY due_date ASC", (priority.value,))
         return [self._row_to_task(row) for row in self.cursor.fetchall()]
     
+    @_synchronized
     def get_tasks_by_status(self, status: TaskStatus) -> List[Task]:
         self.cursor.execute("SELECT * FROM tasks WHERE status=? ORDER BY due_date ASC", (status.value,))
         return [self._row_to_task(row) for row in self.cursor.fetchall()]
     
+    @_synchronized
     def get_all_tasks(self) -> List[Task]:
         self.cursor.execute("SELECT * FROM tasks ORDER BY priority DESC, due_date ASC")
         return [self._row_to_task(row) for row in self.cursor.fetchall()]
     
-    def search_tasks(self, query: str) -> List[Task]:
+    @_synchronized
+    def get_tasks_due_from(self, due_date: str, statuses: Optional[List[TaskStatus]] = None) -> List[Task]:
+        """Get tasks due on or after `due_date`, in due order (served by the due_date index)"""
+        statuses = statuses or [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
+        placeholders = ", ".join("?" for _ in statuses)
+        self.cursor.execute(f"""SELECT * FROM tasks 
+            WHERE due_date >= ? AND status IN ({placeholders})
+            ORDER BY due_date ASC""", [due_date] + [status.value for status in statuses])
+        return [self._row_to_task(row) for row in self.cursor.fetchall()]
+    
+    @_synchronized
+    def search_tasks(self, query: str, limit: int = -1) -> List[Task]:
         search_term = f"%{query}%"
         self.cursor.execute("""SELECT * FROM tasks 
             WHERE title LIKE ? OR description LIKE ? OR tags LIKE ?
-            ORDER BY priority DESC, due_date ASC""", (search_term, search_term, search_term))
+            ORDER BY priority DESC, due_date ASC LIMIT ?""", (search_term, search_term, search_term, limit))
         return [self._row_to_task(row) for row in self.cursor.fetchall()]
     
+    @_synchronized
     def delete_task(self, task_id: int) -> bool:
         self.cursor.execute("DELETE FROM tasks WHERE id=?", (task_id,))
         self.conn.commit()
+        self._notify('deleted', task_id)
         return True
     
+    @_synchronized
+    def delete_tasks(self, task_ids: List[int]) -> int:
+        """Delete many tasks with one executemany call and a single commit"""
+        if not task_ids:
+            return 0
+        with self.conn:
+            self.cursor.executemany("DELETE FROM tasks WHERE id=?", [(task_id,) for task_id in task_ids])
+        self._notify_many('deleted', [(task_id, None) for task_id in task_ids])
+        return len(task_ids)
+    
+    def _task_to_params(self, task: Task, with_created_at: bool = True) -> tuple:
+        tags_json = json.dumps(task.tags)
+        if with_created_at:
+            return (task.title, task.description, task.due_date, task.priority.value,
+                    task.status.value, tags_json, task.created_at, task.updated_at, task.ai_notes)
+        return (task.title, task.description, task.due_date, task.priority.value,
+                task.status.value, tags_json, task.updated_at, task.ai_notes)
+    
     def _row_to_task(self, row) -> Task:
         tags = json.loads(row[6]) if row[6] else []
         return Task(
@@ -124,6 +314,7 @@ class TaskManager:
             ai_notes=row[9]
         )
     
+    @_synchronized
     def close(self):
         self.conn.close()
 
@@ -131,55 +322,36 @@ class TaskManager:
 class AITaskParser:
     """AI-powered task parsing from natural language"""
     
+    date_parser = DueDateParser()
+    
     @staticmethod
     def parse_task_from_text(text: str) -> Task:
         """Parse natural language into a structured task"""
-        now = datetime.now().isoformat()
-        
-        # Default values
-        title = text.strip()
-        description = ""
-        due_date = None
-        priority = Priority.OPTIONAL
-        tags = []
-        
+        return AITaskParser.parse_many([text])[0]
+    
+    @staticmethod
+    def parse_many(texts: List[str]) -> List[Task]:
+        """Parse a batch of texts, e.g. a bulk import, sharing one timestamp"""
+        now = datetime.now()
+        timestamp = now.isoformat()
+        return [AITaskParser._build_task(text, tags, timestamp, now.date())
+                for text, tags in zip(texts, get_default_tagger().tag_many(texts))]
+    
+    @staticmethod
+    def _build_task(text: str, tags: TextTags, timestamp: str, today: date) -> Task:
         # Simple keyword-based parsing (can be enhanced with LLaMA)
-        text_lower = text.lower()
-        
-        # Priority detection
-        if any(word in text_lower for word in ['urgent', 'asap', 'emergency', 'critical']):
-            priority = Priority.URGENT_IMPORTANT
-        elif any(word in text_lower for word in ['important', 'priority', 'key']):
-            priority = Priority.IMPORTANT_NOT_URGENT
-        
-        # Due date detection
-        if 'tomorrow' in text_lower:
-            due_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-        elif 'next week' in text_lower:
-            due_date = (datetime.now() + timedelta(weeks=1)).strftime('%Y-%m-%d')
-        elif 'today' in text_lower:
-            due_date = datetime.now().strftime('%Y-%m-%d')
-        
-        # Tag extraction
-        if 'meeting' in text_lower:
-            tags.append('meeting')
-        if 'call' in text_lower:
-            tags.append('call')
-        if 'email' in text_lower:
-            tags.append('email')
-        if 'study' in text_lower:
-            tags.append('study')
-        if 'work' in text_lower:
-            tags.append('work')
+        priority = Priority(tags.priority) if tags.priority else Priority.OPTIONAL
+        due = AITaskParser.date_parser.parse(text, today)
+        due_date = due.isoformat() if due else None
         
         return Task(
             id=None,
-            title=title,
-            description=description,
+            title=text.strip(),
+            description="",
             due_date=due_date,
             priority=priority,
             status=TaskStatus.PENDING,
-            tags=tags,
-            created_at=now,
-            updated_at=now
+            tags=tags.tags,
+            created_at=timestamp,
+            updated_at=timestamp
         )
@@ -8,6 +8,82 @@ import sys
 import traceback
 from datetime import datetime
 
+# A stand-in for the llama.cpp and whisper.cpp servers, run as a real child process
+STUB_ENGINE_SERVER = r'''
+import io, json, os, sys, threading, time, wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if "--help" in sys.argv:
+    print("usage: server [options]\n  --slot-save-path PATH  save slot states")
+    sys.exit(0)
+port = int(sys.argv[sys.argv.index("--port") + 1])
+served = [0]
+lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.reply({"status": "ok"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/inference":
+            # The WAV part runs to the closing boundary; wave ignores what follows its data
+            with wave.open(io.BytesIO(body[body.index(b"RIFF"):])) as wav_file:
+                seconds = wav_file.getnframes() / wav_file.getframerate()
+                return self.reply({"text": f" {seconds:.1f} seconds at {wav_file.getframerate()} Hz "})
+        if not self.path.startswith("/completion"):
+            return self.reply({})
+        payload = json.loads(body)
+        prompt = payload["prompt"]
+        if "CRASH" in prompt:
+            os._exit(1)
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in ["Once", " upon", " a", " time"]:
+                self.wfile.write(f"data: {json.dumps({'content': word, 'stop': False})}\n\n".encode())
+                self.wfile.flush()
+                if "MIDSTREAM" in prompt:
+                    os._exit(1)
+            self.wfile.write(f"data: {json.dumps({'content': '', 'stop': True})}\n\n".encode())
+            return
+        if "SLOW" in prompt:
+            time.sleep(3)
+        if "PAUSE" in prompt:
+            time.sleep(0.6)
+        with lock:
+            served[0] += 1
+            number = served[0]
+        self.reply({"content": f"{number}:{os.getpid()}:{prompt}"})
+
+
+ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+'''
+
+
+def stub_engine_server(directory):
+    """Write the stub server to `directory` as an executable and return its path"""
+    import os
+    path = os.path.join(directory, "stub_server")
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\n" + STUB_ENGINE_SERVER)
+    os.chmod(path, 0o755)
+    return path
+
+
 def test_imports():
     """Test if all modules can be imported"""
     print("🧪 Testing imports...")
@@ -105,6 +181,1051 @@ def test_task_manager():
         return False
 
 
+def test_batch_task_operations():
+    """Test batch task mutations share a single transaction"""
+    print("\n📦 Testing batch task operations...")
+    
+    try:
+        import os
+        import tempfile
+        from task_manager import Task, Priority, TaskStatus, TaskManager
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "batch_test.db")
+        task_manager = TaskManager(db_path)
+        now = datetime.now().isoformat()
+        
+        tasks = [
+            Task(id=None, title=f"Batch task {i}", description="", due_date=None,
+                 priority=Priority.OPTIONAL, status=TaskStatus.PENDING, tags=["batch"],
+                 created_at=now, updated_at=now)
+            for i in range(50)
+        ]
+        
+        task_ids = task_manager.add_tasks(tasks)
+        if len(task_ids) != 50 or len(task_manager.get_all_tasks()) != 50:
+            print("   ❌ Batch insert failed")
+            return False
+        print("   ✅ Batch insert working")
+        
+        task_manager.bulk_set_priority(task_ids[:10], Priority.URGENT_IMPORTANT)
+        task_manager.bulk_set_status(task_ids[:5], TaskStatus.COMPLETED)
+        if len(task_manager.get_tasks_by_priority(Priority.URGENT_IMPORTANT)) != 10 or \
+                len(task_manager.get_tasks_by_status(TaskStatus.COMPLETED)) != 5:
+            print("   ❌ Bulk priority/status update failed")
+            return False
+        print("   ✅ Bulk priority/status update working")
+        
+        renamed = task_manager.get_task(task_ids[0])
+        renamed.title = "Renamed batch task"
+        if task_manager.update_tasks([renamed]) != 1 or task_manager.get_task(task_ids[0]).title != renamed.title:
+            print("   ❌ Batch update failed")
+            return False
+        print("   ✅ Batch update working")
+        
+        task_manager.delete_tasks(task_ids[:25])
+        if len(task_manager.get_all_tasks()) != 25:
+            print("   ❌ Batch delete failed")
+            return False
+        print("   ✅ Batch delete working")
+        
+        task_manager.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Batch task operations test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_prioritization_engine():
+    """Test incremental re-prioritization only rewrites changed tasks"""
+    print("\n🎯 Testing prioritization engine...")
+    
+    try:
+        import os
+        import tempfile
+        from datetime import timedelta
+        from task_manager import Task, Priority, TaskStatus, TaskManager
+        from prioritizer import PrioritizationEngine
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "prioritizer_test.db")
+        task_manager = TaskManager(db_path)
+        now = datetime.now().isoformat()
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        def make_task(title, due_date=None):
+            return Task(id=None, title=title, description="", due_date=due_date,
+                        priority=Priority.OPTIONAL, status=TaskStatus.PENDING, tags=[],
+                        created_at=now, updated_at=now)
+        
+        urgent_id, important_id, due_id, plain_id, key_id, keyboard_id, monkey_id = task_manager.add_tasks([
+            make_task("Fix the server ASAP"),
+            make_task("Important report"),
+            make_task("Pay rent", due_date=tomorrow),
+            make_task("Water the plants"),
+            make_task("Hand over the key, today"),
+            make_task("Buy a new keyboard"),
+            make_task("Feed the monkey"),
+        ])
+        
+        engine = PrioritizationEngine(task_manager)
+        report = engine.run()
+        if not report.full_scan or report.changed != 4:
+            print(f"   ❌ Full scan changed {report.changed} tasks, expected 4")
+            return False
+        
+        expected = {
+            urgent_id: Priority.URGENT_IMPORTANT,
+            important_id: Priority.IMPORTANT_NOT_URGENT,
+            due_id: Priority.URGENT_IMPORTANT,
+            plain_id: Priority.OPTIONAL,
+            key_id: Priority.IMPORTANT_NOT_URGENT,
+            # Keywords match whole words only
+            keyboard_id: Priority.OPTIONAL,
+            monkey_id: Priority.OPTIONAL,
+        }
+        if any(task_manager.get_task(task_id).priority != priority for task_id, priority in expected.items()):
+            print("   ❌ Rules assigned the wrong priorities")
+            return False
+        print("   ✅ Rules combine keywords and due dates")
+        
+        report = engine.run()
+        if report.full_scan or report.changed != 0 or report.scanned != 1:
+            print(f"   ❌ Incremental run scanned {report.scanned} and changed {report.changed}")
+            return False
+        print("   ✅ Incremental run only re-scores time-sensitive tasks")
+        
+        task_manager.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Prioritization engine test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_productivity_log():
+    """Test productivity counters are maintained from task events"""
+    print("\n📈 Testing productivity log...")
+    
+    try:
+        import os
+        import tempfile
+        from task_manager import Task, Priority, TaskStatus, TaskManager
+        from productivity_log import ProductivityLog
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "productivity_test.db")
+        task_manager = TaskManager(db_path)
+        productivity_log = ProductivityLog(db_path)
+        productivity_log.attach(task_manager)
+        now = datetime.now().isoformat()
+        
+        task_ids = task_manager.add_tasks([
+            Task(id=None, title=f"Log task {i}", description="", due_date=None,
+                 priority=Priority.OPTIONAL, status=TaskStatus.PENDING, tags=[],
+                 created_at=now, updated_at=now)
+            for i in range(4)
+        ])
+        
+        task = task_manager.get_task(task_ids[0])
+        task.status = TaskStatus.COMPLETED
+        task_manager.update_task(task)
+        task_manager.update_task(task)  # Repeated saves must not double count
+        task_manager.bulk_set_status(task_ids[1:2], TaskStatus.COMPLETED)
+        
+        stats = productivity_log.get_stats()
+        if stats["tasks_created"] != 4 or stats["tasks_completed"] != 2 or stats["current_streak"] != 1:
+            print(f"   ❌ Unexpected counters: {stats}")
+            return False
+        print("   ✅ Task counters and streak working")
+        
+        reopened = ProductivityLog(db_path)  # Counters survive a restart
+        if reopened.get_stats() != stats or len(reopened.get_events(event_type="task_completed")) != 2:
+            print("   ❌ Counters were not persisted")
+            return False
+        print("   ✅ Counters persisted across restarts")
+        
+        # A bulk insert of N tasks is logged as N events in one connection and one commit
+        connections, statements = [], []
+        open_connection = productivity_log._get_connection
+        
+        def traced_connection():
+            conn = open_connection()
+            conn.set_trace_callback(statements.append)
+            connections.append(conn)
+            return conn
+        
+        productivity_log._get_connection = traced_connection
+        events_before = len(productivity_log.get_events(event_type="task_created"))
+        connections.clear()
+        statements.clear()
+        task_manager.add_tasks([
+            Task(id=None, title=f"Bulk log task {i}", description="", due_date=None,
+                 priority=Priority.OPTIONAL, status=TaskStatus.PENDING, tags=[],
+                 created_at=now, updated_at=now)
+            for i in range(25)
+        ])
+        commits = [sql for sql in statements if sql.strip().upper() == "COMMIT"]
+        connection_count = len(connections)
+        created = len(productivity_log.get_events(event_type="task_created")) - events_before
+        if created != 25 or connection_count != 1 or len(commits) != 1:
+            print(f"   ❌ {created} events in {connection_count} connections / {len(commits)} commits")
+            return False
+        print("   ✅ Bulk insert of 25 tasks logged as 25 events in one transaction")
+        
+        task_manager.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Productivity log test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_change_feed():
+    """Test task and memory writes are recorded in the change feed"""
+    print("\n🔁 Testing change feed...")
+    
+    try:
+        import os
+        import tempfile
+        from task_manager import Task, Priority, TaskStatus, TaskManager
+        from memory_store import MemoryStore
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "change_feed_test.db")
+        task_manager = TaskManager(db_path)
+        memory_store = MemoryStore(db_path)
+        start_seq = task_manager.change_feed.latest_seq()
+        now = datetime.now().isoformat()
+        
+        task_id = task_manager.add_task(Task(
+            id=None, title="Feed task", description="", due_date=None,
+            priority=Priority.OPTIONAL, status=TaskStatus.PENDING, tags=[],
+            created_at=now, updated_at=now
+        ))
+        memory_id = memory_store.add_memory("Feed memory")
+        task_manager.bulk_set_status([task_id], TaskStatus.COMPLETED)
+        task_manager.delete_task(task_id)
+        
+        task_ops = [(c.entity_id, c.op) for c in task_manager.changes_since(start_seq)]
+        if task_ops != [(task_id, "insert"), (task_id, "update"), (task_id, "delete")]:
+            print(f"   ❌ Unexpected task changes: {task_ops}")
+            return False
+        print("   ✅ Task changes recorded")
+        
+        memory_changes = memory_store.changes_since(start_seq)
+        if [(c.entity_id, c.op) for c in memory_changes] != [(memory_id, "insert")]:
+            print("   ❌ Memory changes not recorded")
+            return False
+        
+        all_seqs = [c.seq for c in task_manager.change_feed.changes_since(start_seq)]
+        if all_seqs != sorted(all_seqs) or len(all_seqs) != 4:
+            print("   ❌ Sequence numbers are not monotonic")
+            return False
+        print("   ✅ Memory changes recorded with monotonic sequence numbers")
+        
+        task_manager.close()
+        
+        import change_feed
+        retention = change_feed.CHANGE_LOG_RETENTION
+        change_feed.CHANGE_LOG_RETENTION = 2
+        try:
+            # Opening a TaskManager trims the log to the newest entries
+            task_manager = TaskManager(db_path)
+        finally:
+            change_feed.CHANGE_LOG_RETENTION = retention
+        latest_seq = task_manager.change_feed.latest_seq()
+        if [c.seq for c in task_manager.change_feed.changes_since(0)] != [latest_seq - 1, latest_seq]:
+            print("   ❌ Change log not trimmed on open")
+            return False
+        if task_manager.change_feed.covers(start_seq) or not task_manager.change_feed.covers(latest_seq - 2):
+            print("   ❌ Consumers behind the trim point are not told to reload")
+            return False
+        print("   ✅ Change log trimmed on open; consumers behind it reload")
+        
+        task_manager.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Change feed test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_scheduler():
+    """Test deadlines fire in order, can be cancelled and moved, and reminders fire once"""
+    print("\n⏰ Testing scheduler...")
+    
+    try:
+        import os
+        import tempfile
+        import threading
+        import time
+        from dataclasses import replace
+        from scheduler import DeadlineScheduler, ReminderScheduler
+        from task_manager import Task, Priority, TaskStatus, TaskManager
+        
+        scheduler = DeadlineScheduler("test-scheduler")
+        fired = []
+        start = time.time()
+        for key, delay in (("c", 0.3), ("a", 0.1), ("b", 0.2), ("cancelled", 0.15), ("moved", 5), ("later", 0.05)):
+            scheduler.schedule(key, start + delay, lambda key=key: fired.append(key))
+        scheduler.cancel("cancelled")
+        scheduler.schedule("moved", start + 0.25, lambda: fired.append("moved"))
+        scheduler.schedule("later", start + 30, lambda: fired.append("later"))
+        scheduler.start()
+        time.sleep(0.6)
+        if fired != ["a", "b", "moved", "c"]:
+            print(f"   ❌ Deadlines fired out of order: {fired}")
+            return False
+        if scheduler.keys() != ["later"] or abs(scheduler.deadline("later") - (start + 30)) > 1e-6:
+            print("   ❌ Rescheduled deadline not kept")
+            return False
+        print("   ✅ Deadlines fire in order, cancelled and moved ones respected")
+        
+        task_manager = TaskManager(os.path.join(tempfile.mkdtemp(), "scheduler_test.db"))
+        reminded = []
+        reminders = ReminderScheduler(task_manager, hooks=[reminded.append], default_time="00:00",
+                                      scheduler=scheduler)
+        reminders.start()
+        now = datetime.now()
+        make_task = lambda title, due: Task(
+            id=None, title=title, description="", due_date=due, priority=Priority.OPTIONAL,
+            status=TaskStatus.PENDING, tags=[], created_at=now.isoformat(), updated_at=now.isoformat())
+        today_id = task_manager.add_task(make_task("Water plants", now.strftime('%Y-%m-%d')))
+        task_manager.add_task(make_task("Renew passport", "2999-01-01"))
+        scheduler.schedule(('focus', 1), time.time() + 60, lambda: None)
+        deadline = time.time() + 2
+        while not reminded and time.time() < deadline:
+            time.sleep(0.01)
+        if [r.task_id for r in reminded] != [today_id]:
+            print("   ❌ Date-only task due today was not reminded after its default time")
+            return False
+        task_manager.update_task(replace(task_manager.get_task(today_id), description="on the balcony"))
+        time.sleep(0.1)
+        if len(reminded) != 1 or reminders.upcoming_count() != 1:
+            print(f"   ❌ Reminder repeated or focus timer counted: {len(reminded)}, {reminders.upcoming_count()}")
+            return False
+        print("   ✅ Missed default time reminded once, only task reminders counted")
+        
+        reminders.stop()
+        # A restart must not announce the same reminder again
+        restarted = ReminderScheduler(task_manager, hooks=[reminded.append], default_time="00:00",
+                                      scheduler=scheduler)
+        restarted.start()
+        time.sleep(0.2)
+        if len(reminded) != 1 or ('task', today_id) in scheduler.keys():
+            print("   ❌ Reminder repeated after a restart")
+            return False
+        print("   ✅ Fired reminders survive a restart")
+        
+        restarted.stop()
+        scheduler.stop()
+        task_manager.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Scheduler test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_focus_timers():
+    """Test focus timers start, pause, resume, snooze and survive a restart"""
+    print("\n🍅 Testing focus timers...")
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from focus_timer import FocusTimerService
+        
+        db_path = os.path.join(tempfile.mkdtemp(), "focus_test.db")
+        announced = []
+        timers = FocusTimerService(db_path, announce=lambda session, message: announced.append((session.id, message)))
+        timers.start()
+        
+        pomodoro = timers.start_pomodoro("Write report")
+        if pomodoro.state != "running" or not 1499 < pomodoro.seconds_left() <= 1500:
+            print("   ❌ Pomodoro not started for 25 minutes")
+            return False
+        if not timers.pause(pomodoro.id) or timers.pause(pomodoro.id):
+            print("   ❌ Pause did not apply exactly once")
+            return False
+        paused = timers.get_session(pomodoro.id)
+        time.sleep(0.2)
+        if paused.state != "paused" or paused.seconds_left() != timers.get_session(pomodoro.id).seconds_left():
+            print("   ❌ Paused timer kept counting down")
+            return False
+        if not timers.resume(pomodoro.id) or timers.get_session(pomodoro.id).state != "running":
+            print("   ❌ Resume failed")
+            return False
+        print("   ✅ Start, pause and resume")
+        
+        snooze = timers.snooze_task("Call the bank", task_id=7, minutes=0.005)
+        deadline = time.time() + 3
+        while not announced and time.time() < deadline:
+            time.sleep(0.02)
+        if announced != [(snooze.id, "Snooze is over. Time to get back to Call the bank.")] or \
+                timers.get_session(snooze.id).state != "completed":
+            print(f"   ❌ Snooze did not complete and announce: {announced}")
+            return False
+        print("   ✅ Snooze fires and announces the task")
+        
+        timers.pause(pomodoro.id)
+        remaining = timers.get_session(pomodoro.id).remaining_seconds
+        short = timers.start_session("break", 0.005)
+        timers.stop()
+        
+        restarted = FocusTimerService(db_path, announce=lambda session, message: announced.append((session.id, message)))
+        restarted.start()
+        if [s.id for s in restarted.active_sessions()] != [pomodoro.id, short.id] or \
+                restarted.get_session(pomodoro.id).remaining_seconds != remaining:
+            print("   ❌ Sessions not restored after restart")
+            return False
+        deadline = time.time() + 3
+        while len(announced) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        if [session_id for session_id, _ in announced] != [snooze.id, short.id]:
+            print("   ❌ Running timer not re-armed after restart")
+            return False
+        restarted.stop()
+        print("   ✅ Paused and running sessions persisted across a restart")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Focus timer test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_intent_classifier():
+    """Test the compiled intent classifier on the labeled utterances"""
+    print("\n🧭 Testing intent classifier...")
+    
+    try:
+        from intent_classifier import IntentClassifier, LABELED_EXAMPLES
+        
+        classifier = IntentClassifier()
+        misses = [(text, label, classifier.classify(text))
+                  for text, label in LABELED_EXAMPLES if classifier.classify(text) != label]
+        if misses:
+            print(f"   ❌ Misclassified: {misses}")
+            return False
+        print(f"   ✅ {len(LABELED_EXAMPLES)} labeled utterances classified correctly")
+        
+        # Word boundaries: "address" must not count as "add", "this" not as "hi"
+        if classifier.classify("This is the address") != "general_chat":
+            print("   ❌ Keywords matched inside other words")
+            return False
+        
+        if classifier.classify("Delete the task I need to finish") != "delete_task":
+            print("   ❌ A command verb before an add-task phrase lost to it")
+            return False
+        print("   ✅ Add-task openers win over command verbs that follow them")
+        
+        custom = IntentClassifier(rules=[("weather", 1.0, ["forecast", "rain"])])
+        if custom.classify("Will it rain today") != "weather" or custom.classify("add task") != "general_chat":
+            print("   ❌ Custom rule table not honoured")
+            return False
+        print("   ✅ Word boundaries and custom rules work")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Intent classifier test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_semantic_intents():
+    """Test prototype persistence, threshold fallback and the embedding LRU"""
+    print("\n🧠 Testing semantic intent classifier...")
+    
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        from semantic_intent import SemanticIntentClassifier
+        
+        vocabulary = ["buy", "milk", "groceries", "list", "show", "agenda", "hello", "hi"]
+        encoded = []
+        
+        def encoder(texts):
+            # Bag-of-words stand-in for a sentence model
+            encoded.extend(texts)
+            return np.array([[float(word in text.split()) for word in vocabulary] for text in texts])
+        
+        examples = [("buy milk", "add_task"), ("buy groceries", "add_task"),
+                    ("show agenda", "list_tasks"), ("list agenda", "list_tasks"),
+                    ("hello", "greeting"), ("hi", "greeting")]
+        prototype_path = os.path.join(tempfile.mkdtemp(), "prototypes.npz")
+        classifier = SemanticIntentClassifier(examples=examples, prototype_path=prototype_path,
+                                              threshold=0.6, encoder=encoder)
+        
+        if classifier.classify("Buy   milk") != "add_task" or classifier.classify("show the agenda") != "list_tasks":
+            print("   ❌ Nearest prototype not chosen")
+            return False
+        if classifier.classify("delete task 2") != "delete_task":
+            print("   ❌ Low-confidence input did not fall back to keyword rules")
+            return False
+        print("   ✅ Nearest prototype with keyword fallback")
+        
+        encoded.clear()
+        classifier.classify("buy milk")
+        if encoded or classifier.cache_hits != 1:
+            print("   ❌ Repeated input was re-encoded")
+            return False
+        
+        reloaded = SemanticIntentClassifier(examples=examples, prototype_path=prototype_path,
+                                            threshold=0.6, encoder=encoder)
+        if reloaded.classify("hello") != "greeting" or encoded != ["hello"]:
+            print("   ❌ Prototypes were not loaded from disk")
+            return False
+        print("   ✅ Embedding cache and persisted prototypes work")
+        
+        import re
+        import zlib
+        from intent_classifier import LABELED_EXAMPLES, PROTOTYPE_EXAMPLES
+        
+        def hashed_words(texts):
+            # Hashed words and word pairs: a deterministic encoder with no model download
+            vectors = np.zeros((len(texts), 512))
+            for row, text in enumerate(texts):
+                words = re.findall(r"[a-z']+", text.lower())
+                for gram in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                    vectors[row, zlib.crc32(gram.encode()) % 512] += 1
+            return vectors
+        
+        held_out = {text.lower() for text, _ in LABELED_EXAMPLES}
+        if any(text.lower() in held_out for text, _ in PROTOTYPE_EXAMPLES):
+            print("   ❌ Evaluation utterances used as prototypes")
+            return False
+        for threshold, minimum in ((0.0, 0.7), (0.55, 0.95)):
+            semantic = SemanticIntentClassifier(prototype_path=os.path.join(tempfile.mkdtemp(), "held_out.npz"),
+                                                threshold=threshold, encoder=hashed_words)
+            accuracy = sum(semantic.classify(text) == label for text, label in LABELED_EXAMPLES) / len(LABELED_EXAMPLES)
+            if accuracy < minimum:
+                print(f"   ❌ Held-out accuracy {accuracy:.0%} at threshold {threshold} (expected {minimum:.0%})")
+                return False
+            print(f"   ✅ Held-out accuracy {accuracy:.0%} at threshold {threshold}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Semantic intent test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_keyword_tagger():
+    """Test the compiled tagger behind AITaskParser"""
+    print("\n🏷️  Testing keyword tagger...")
+    
+    try:
+        from keyword_tagger import KeywordTagger
+        from task_manager import AITaskParser, Priority
+        
+        tagger = KeywordTagger()
+        tags = tagger.tag("Important: call the team at work about the meeting, ASAP, tomorrow")
+        if tags.priority != "urgent_important" or tags.tags != ["call", "work", "meeting"]:
+            print(f"   ❌ Unexpected tags: {tags}")
+            return False
+        
+        # Word boundaries: no "call" in "recall", no "work" in "homework", no "key" in "keys"
+        tags = tagger.tag("Recall the homework keys")
+        if tags.tags or tags.priority:
+            print("   ❌ Tags matched inside other words")
+            return False
+        if tagger.tag("Ring the client about the report, check mail and sync photos").tags:
+            print("   ❌ Words outside the keyword set tagged")
+            return False
+        print("   ✅ Priority and tags found in one scan")
+        
+        tagger.add_terms("tag", "health", ["doctor", "dentist"])
+        if tagger.tag("Book the Dentist").tags != ["health"]:
+            print("   ❌ User terms not picked up")
+            return False
+        
+        tasks = AITaskParser.parse_many(["Urgent report today", "Buy milk"])
+        if [t.priority for t in tasks] != [Priority.URGENT_IMPORTANT, Priority.OPTIONAL] or tasks[1].due_date:
+            print("   ❌ parse_many produced unexpected tasks")
+            return False
+        print("   ✅ User vocabulary and batch parsing work")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Keyword tagger test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_due_date_parser():
+    """Test natural-language due dates relative to a fixed day"""
+    print("\n📅 Testing due-date parser...")
+    
+    try:
+        from datetime import date
+        from date_parser import DueDateParser
+        
+        parser = DueDateParser()
+        monday = date(2026, 10, 19)
+        expected = {
+            "Finish the report by Friday": "2026-10-23",
+            "Call mom tomorrow at 5pm": "2026-10-20T17:00",
+            "Renew passport in 3 weeks": "2026-11-09",
+            "Pay rent end of month": "2026-10-31",
+            "Dentist on 14/3 at 10:30": "2027-03-14T10:30",
+            "Submit taxes April 15th 2027": "2027-04-15",
+            "Standup next friday": "2026-10-30",
+            "Lunch at noon": "2026-10-19T12:00",
+            "Call the bank at 3": "2026-10-19T15:00",
+            "Call the bank at 3:30": "2026-10-19T15:30",
+            "Gym tomorrow 07:30": "2026-10-20T07:30",
+            "Standup at 9:15 am": "2026-10-19T09:15",
+            "I may call on May 5th": "2027-05-05",
+            "Flight on 3 March": "2027-03-03",
+        }
+        for text, due in expected.items():
+            parsed = parser.parse(text, monday)
+            if not parsed or parsed.isoformat() != due:
+                print(f"   ❌ '{text}' parsed as {parsed.isoformat() if parsed else None}, expected {due}")
+                return False
+        if (parser.parse("Buy milk", monday) or parser.parse("Submit 31/02", monday)
+                or parser.parse("The 2 may be late", monday) or parser.parse("We may go", monday)):
+            print("   ❌ Found a date where there is none")
+            return False
+        print(f"   ✅ {len(expected)} date expressions parsed")
+        
+        parser.parse("Finish the report by Friday", monday)
+        if parser.cache_info().hits != 1:
+            print("   ❌ Repeated phrase was not served from the cache")
+            return False
+        print("   ✅ Repeated phrases are memoized")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Due-date parser test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_task_references():
+    """Test "task N" follows the list the user last saw, and falls back to list order"""
+    print("\n🔢 Testing task references...")
+    
+    try:
+        import os
+        import tempfile
+        from ai_assistant import MemoryMateAssistant
+        from task_manager import Task, Priority, TaskStatus
+        
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "references_test.db"))
+        now = datetime.now().isoformat()
+        for title, priority, due in (("Pay rent", Priority.OPTIONAL, "2030-01-01"),
+                                     ("Fix the leak", Priority.URGENT_IMPORTANT, "2030-01-03"),
+                                     ("Book flights", Priority.OPTIONAL, None),
+                                     ("Call the bank", Priority.URGENT_IMPORTANT, "2030-01-02")):
+            assistant.task_manager.add_task(Task(
+                id=None, title=title, description="", due_date=due, priority=priority,
+                status=TaskStatus.PENDING, tags=[], created_at=now, updated_at=now))
+        
+        all_tasks = assistant.task_manager.get_all_tasks()
+        positions = [assistant.task_manager.get_task_by_position(i) for i in range(len(all_tasks))]
+        if [t.id for t in positions] != [t.id for t in all_tasks] or \
+                assistant.task_manager.get_task_by_position(len(all_tasks)) is not None or \
+                assistant.task_manager.get_task_by_position(-1) is not None:
+            print("   ❌ get_task_by_position does not follow get_all_tasks order")
+            return False
+        if assistant._resolve_task("task 2").id != all_tasks[1].id:
+            print("   ❌ Unlisted numbers do not fall back to list order")
+            return False
+        print("   ✅ Positions follow the full task list")
+        
+        assistant.process_input("Find book")
+        if assistant._resolve_task("task 1").title != "Book flights":
+            print("   ❌ Numbers do not follow the last list shown")
+            return False
+        for command in ("Find xyzzy", "Show important tasks"):
+            assistant.process_input("Find book")
+            assistant.process_input(command)
+            if assistant.last_listed_task_ids or assistant._resolve_task("task 1").id != all_tasks[0].id:
+                print(f"   ❌ Stale numbering kept after '{command}' found nothing")
+                return False
+        print("   ✅ Numbers follow the last list, and an empty result clears it")
+        
+        assistant.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Task reference test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_fuzzy_index():
+    """Test fuzzy title matching resolves misheard task references and tracks task writes"""
+    print("\n🔤 Testing fuzzy title index...")
+    
+    try:
+        import os
+        import tempfile
+        from dataclasses import replace
+        from ai_assistant import MemoryMateAssistant
+        from fuzzy_index import TrigramIndex
+        from task_manager import Task, Priority, TaskStatus
+        
+        index = TrigramIndex()
+        index.add(1, "Submit the quarterly report")
+        index.add(2, "Call the dentist")
+        index.add(1, "Water the plants")
+        if index.search("quarterly report") or [doc for doc, _ in index.search("watr the plnts")] != [1]:
+            print("   ❌ Re-adding a document did not replace its text")
+            return False
+        index.remove(2)
+        if index.search("dentist") or len(index) != 1:
+            print("   ❌ Removed document still matched")
+            return False
+        print("   ✅ Misspelled queries match, replaced and removed titles do not")
+        
+        # Past max_candidates, only documents sharing the query's rarer words are scored
+        crowded = TrigramIndex(max_candidates=8)
+        titles = [f"{verb} the {who} about the {topic}" for verb in ("Call", "Email", "Visit")
+                  for who in ("bank", "plumber", "landlord") for topic in ("leak", "bill", "lease")] * 10
+        for doc_id, title in enumerate(titles):
+            crowded.add(doc_id, title)
+        if [titles[doc] for doc, _ in crowded.search("cal the plumbr about the leak", k=1)] != ["Call the plumber about the leak"]:
+            print("   ❌ Bounded candidate search missed the best match")
+            return False
+        print("   ✅ Lookups on common trigrams stay bounded and find the best match")
+        
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "fuzzy_test.db"))
+        now = datetime.now().isoformat()
+        add = lambda title: assistant.task_manager.add_task(Task(
+            id=None, title=title, description="", due_date=None, priority=Priority.OPTIONAL,
+            status=TaskStatus.PENDING, tags=[], created_at=now, updated_at=now))
+        report_id, dentist_id = add("Submit the quarterly report"), add("Call the dentist")
+        
+        response = assistant.process_input("Mark the quartely reprot as done")
+        if assistant.task_manager.get_task(report_id).status != TaskStatus.COMPLETED:
+            print(f"   ❌ Misheard title not completed: {response}")
+            return False
+        response = assistant.process_input("Delete the dentsit call")
+        if assistant.task_manager.get_task(dentist_id) is not None:
+            print(f"   ❌ Misheard title not deleted: {response}")
+            return False
+        print("   ✅ Complete and delete fall back to fuzzy title matches")
+        
+        chapter_id = add("Read chapter 7 of the book")
+        add("Call mom")
+        add("Call dad")
+        assistant.process_input("Show my tasks")
+        response = assistant.process_input("Delete task 7")
+        if assistant.task_manager.get_task(chapter_id) is None:
+            print(f"   ❌ Out-of-range task number deleted a title containing it: {response}")
+            return False
+        response = assistant.process_input("Delete the call")
+        if len(assistant.task_manager.get_tasks_by_title("Call mom") + assistant.task_manager.get_tasks_by_title("Call dad")) != 2:
+            print(f"   ❌ Ambiguous fuzzy match deleted a task: {response}")
+            return False
+        print("   ✅ Unresolved numbers and ambiguous titles change nothing")
+        
+        plants_id = add("Water the plants")
+        if "Water the plants" not in assistant.process_input("Find watr plnts"):
+            print("   ❌ Search not topped up with a task added after the index was built")
+            return False
+        assistant.task_manager.update_task(replace(assistant.task_manager.get_task(plants_id), title="Repot the cactus"))
+        if "Water the plants" in assistant.process_input("Find watr plnts") or \
+                "Repot the cactus" not in assistant.process_input("Find repot cactsu"):
+            print("   ❌ Renamed task not reindexed")
+            return False
+        assistant.task_manager.delete_task(plants_id)
+        if plants_id in assistant.title_index or dentist_id in assistant.title_index:
+            print("   ❌ Deleted tasks left in the index")
+            return False
+        print("   ✅ Index follows inserts, renames and deletes")
+        
+        assistant.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Fuzzy title index test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_conversation_context():
+    """Test the bounded history and the token-budgeted prompt"""
+    print("\n🪟 Testing conversation context...")
+    
+    try:
+        import os
+        import tempfile
+        from conversation import ConversationHistory, ContextBuilder
+        from memory_store import MemoryStore
+        
+        history = ConversationHistory(max_turns=4)
+        for i in range(10):
+            history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"})
+        if len(history) != 4 or history[0]["content"] != "message 6":
+            print("   ❌ History is not bounded to the last turns")
+            return False
+        print("   ✅ History keeps only the last turns")
+        
+        store = MemoryStore(os.path.join(tempfile.mkdtemp(), "context_test.db"))
+        store.add_memory("User: I promised Rohan the slides by Monday")
+        store.add_memory("User: The dentist is on Friday")
+        recalled = [m["text"] for m in store.recall_memories("What about the slides for Rohan?")]
+        if recalled[:1] != ["User: I promised Rohan the slides by Monday"]:
+            print(f"   ❌ Unexpected recall: {recalled}")
+            return False
+        for i in range(5):
+            store.add_memory(f"User: filler note {i}")
+        if store.recall_memories("slides for Rohan", window=5):
+            print("   ❌ Recall searched memories outside its window")
+            return False
+        print("   ✅ Recall finds the best match among the newest memories")
+        
+        builder = ContextBuilder(budget_tokens=60, memory_tokens=20)
+        long_history = ConversationHistory()
+        for i in range(20):
+            long_history.append({"role": "user", "content": f"turn {i} " + "word " * 5})
+        prompt = builder.build("What about the slides?", long_history, recalled)
+        if "Rohan the slides" not in prompt or "turn 19" not in prompt or "turn 0 " in prompt:
+            print("   ❌ Prompt did not keep memories and the newest turns")
+            return False
+        for budget in range(40, 130):
+            sized = ContextBuilder(budget_tokens=budget, memory_tokens=budget // 3)
+            sized_history = ConversationHistory()
+            for i in range(12):
+                sized_history.append({"role": "user" if i % 2 == 0 else "assistant",
+                                      "content": f"turn {i}: " + "word, " * (i % 4)})
+                if i % 2 == 0:
+                    sized.build(sized_history[-1]["content"], sized_history, recalled)
+            for prompt_history in (sized_history, None):
+                sized_prompt = sized.build("What about the slides?", prompt_history, recalled)
+                if len(sized.tokenizer(sized_prompt)) > budget:
+                    print(f"   ❌ Prompt exceeds the token budget of {budget}")
+                    return False
+        print("   ✅ Prompt combines recalled memories with the newest turns within budget")
+        
+        chat = ConversationHistory()
+        chat.append({"role": "user", "content": "Hi"})
+        first, first_prefix = ContextBuilder().build_with_prefix("Hi", chat, recalled)
+        chat.append({"role": "assistant", "content": "Hello!"})
+        chat.append({"role": "user", "content": "Any plans?"})
+        second, second_prefix = ContextBuilder().build_with_prefix(
+            "Any plans?", chat, ["User: The dentist is on Friday"])
+        if not first.startswith(first_prefix) or not second.startswith(first + " Hello!\n"):
+            print("   ❌ The next prompt does not start with the previous prompt and reply")
+            return False
+        if not second.startswith(second_prefix) or "dentist" in second_prefix or "Rohan" not in second_prefix:
+            print("   ❌ Memories not kept with the turn they were shown for")
+            return False
+        print("   ✅ Each prompt starts with the previous prompt and reply, memories included")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Conversation context test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_llm_worker():
+    """Test the LLM worker against a stub server: FIFO order, crash restarts and timeouts"""
+    print("\n🦙 Testing LLM worker...")
+    
+    try:
+        import tempfile
+        import time
+        from engine_server import EngineUnavailable
+        from llm_worker import LLMWorker
+        
+        worker = LLMWorker(server_path=stub_engine_server(tempfile.mkdtemp()), session_dir=None, timeout=5)
+        try:
+            first = worker.generate("hello")
+            futures = [worker.submit(f"prompt {i}") for i in range(5)]
+            replies = [future.result(timeout=5).split(":") for future in futures]
+            served = [int(number) for number, _, _ in replies]
+            if first.split(":")[2] != "hello" or served != sorted(served) or \
+                    [prompt for _, _, prompt in replies] != [f"prompt {i}" for i in range(5)]:
+                print(f"   ❌ Requests not answered in submission order: {replies}")
+                return False
+            print("   ✅ Queued requests answered in FIFO order")
+            
+            pid = worker.server.pid
+            try:
+                worker.generate("CRASH")
+                print("   ❌ Crashing request did not fail")
+                return False
+            except EngineUnavailable:
+                pass
+            if worker.generate("after the crash").split(":")[2] != "after the crash" or worker.server.pid == pid:
+                print("   ❌ Server not restarted after a crash")
+                return False
+            print("   ✅ Crashed server restarted by the next request")
+            
+            if "".join(worker.stream("tell a story")) != "Once upon a time":
+                print("   ❌ Streamed reply incomplete")
+                return False
+            pieces = []
+            try:
+                for piece in worker.stream("MIDSTREAM story"):
+                    pieces.append(piece)
+                print("   ❌ Server dying mid-reply looked like a finished reply")
+                return False
+            except EngineUnavailable:
+                pass
+            if pieces != ["Once"]:
+                print(f"   ❌ Unexpected pieces before the crash: {pieces}")
+                return False
+            print("   ✅ Streams end on the final event, a dropped stream raises")
+            
+            for call in (lambda: worker.generate("SLOW", timeout=0.5),
+                         # Each request alone fits in the timeout, all three do not
+                         lambda: worker.generate_many(["PAUSE one", "PAUSE two", "PAUSE three"], timeout=1)):
+                started = time.monotonic()
+                try:
+                    call()
+                    print("   ❌ Slow request did not time out")
+                    return False
+                except TimeoutError:
+                    pass
+                if time.monotonic() - started > 1.5:
+                    print(f"   ❌ Timeout took {time.monotonic() - started:.1f}s")
+                    return False
+            print("   ✅ Single and batched requests time out on one deadline")
+        finally:
+            worker.stop()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ LLM worker test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_prompt_session_cache():
+    """Test the on-disk LLM session states are found by prefix and evicted LRU"""
+    print("\n💾 Testing prompt session cache...")
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from llm_worker import PromptSessionCache
+        
+        cache = PromptSessionCache(tempfile.mkdtemp(), max_files=2)
+        prefixes = ["System", "System\n\nUser: Hi\nAssistant: Hello!", "Other system"]
+        for i, prefix in enumerate(prefixes):
+            path = os.path.join(cache.directory, cache.filename(prefix))
+            with open(path, "wb") as f:
+                f.write(b"state")
+            os.utime(path, (time.time() + i, time.time() + i))
+        
+        prompt = prefixes[1] + "\n\nUser: Any plans?\nAssistant:"
+        if cache.longest_prefix(prompt) != cache.filename(prefixes[1]):
+            print("   ❌ Longest saved prefix not found")
+            return False
+        if cache.longest_prefix("Unrelated prompt") is not None:
+            print("   ❌ Matched a state for an unrelated prompt")
+            return False
+        print("   ✅ Longest saved prefix found")
+        
+        cache.evict()
+        if cache.filename(prefixes[0]) in cache or cache.filename(prefixes[2]) not in cache:
+            print("   ❌ Eviction did not drop the least recently used state")
+            return False
+        print("   ✅ Least recently used state evicted")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Prompt session cache test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_response_cache():
+    """Test cached LLM replies are keyed by normalized prompt and sampling, and bounded"""
+    print("\n🗄️ Testing response cache...")
+    
+    try:
+        import os
+        import tempfile
+        from llm_worker import SamplingParams
+        from response_cache import ResponseCache
+        
+        cache = ResponseCache(os.path.join(tempfile.mkdtemp(), "cache_test.db"), max_entries=2)
+        greedy = SamplingParams(temperature=0)
+        cache.put("User: How are you?\nAssistant:", "7B", greedy, "Great, thanks!")
+        if cache.get("user:  how are YOU?\nAssistant:", "7B", greedy) != "Great, thanks!":
+            print("   ❌ Normalized prompt did not hit")
+            return False
+        if cache.get("User: How are you?\nAssistant:", "13B", greedy) is not None:
+            print("   ❌ Hit across models")
+            return False
+        print("   ✅ Hits on normalized prompts for the same model")
+        
+        random_sampling = SamplingParams()
+        cache.put("User: Tell me a joke\nAssistant:", "7B", random_sampling, "Knock knock")
+        if cache.get("User: Tell me a joke\nAssistant:", "7B", random_sampling) is not None:
+            print("   ❌ Non-deterministic sampling was cached")
+            return False
+        print("   ✅ Bypassed for non-deterministic sampling")
+        
+        cache.put("User: Thanks\nAssistant:", "7B", greedy, "You're welcome!")
+        cache.put("User: What can you do?\nAssistant:", "7B", greedy, "Tasks and reminders.")
+        if len(cache) != 2 or cache.get("User: How are you?\nAssistant:", "7B", greedy) is not None:
+            print("   ❌ Cache not bounded to the most recently used entries")
+            return False
+        expired = ResponseCache(cache.db_path, ttl=0)
+        if expired.get("User: Thanks\nAssistant:", "7B", greedy) is not None:
+            print("   ❌ Expired entry returned")
+            return False
+        print("   ✅ Size and TTL bounds enforced")
+        
+        import response_cache
+        from ai_assistant import MemoryMateAssistant
+        from transcribe_and_respond import _response_cache
+        
+        opened = response_cache._default_cache
+        if _response_cache(random_sampling) is not None or response_cache._default_cache is not opened:
+            print("   ❌ Cache database opened for non-deterministic sampling")
+            return False
+        
+        def chat_prompt(conversation):
+            """The prompt a fresh assistant builds for the last of `conversation` (user, reply, user, ...)"""
+            assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "chat_prompt_test.db"))
+            for i, content in enumerate(conversation):
+                assistant.conversation_history.append({"role": "assistant" if i % 2 else "user", "content": content})
+            prompt = assistant._build_prompt(conversation[-1])[0]
+            assistant.close()
+            return prompt
+        
+        cache.put(chat_prompt(["How are you?"]), "7B", greedy, "Great, thanks!")
+        if cache.get(chat_prompt(["how  are you?"]), "7B", greedy) != "Great, thanks!":
+            print("   ❌ An opening turn repeated in a new conversation missed the cache")
+            return False
+        cache.put(chat_prompt(["Who wrote Hamlet?", "Shakespeare.", "Tell me more"]), "7B", greedy, "He was born in 1564.")
+        if cache.get(chat_prompt(["What is a qubit?", "A quantum bit.", "Tell me more"]), "7B", greedy) is not None:
+            print("   ❌ A follow-up hit a reply cached from a different conversation")
+            return False
+        print("   ✅ Keyed on the whole prompt: repeated openers hit, follow-ups depend on the conversation")
+        
+        cache.close()
+        expired.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Response cache test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
 def test_memory_store():
     """Test memory store functionality"""
     print("\n🧠 Testing memory store...")
@@ -208,6 +1329,477 @@ def test_ai_assistant():
         return False
 
 
+def test_process_batch():
+    """Test batch processing keeps input order and shares transactions"""
+    print("\n📦 Testing batch processing...")
+    
+    try:
+        import os
+        import tempfile
+        from ai_assistant import MemoryMateAssistant
+        from task_manager import TaskStatus
+        
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "batch_test.db"))
+        responses = assistant.process_batch([
+            "Add task: Buy milk tomorrow",
+            "Add task: Email the landlord",
+            "Show my tasks",
+            "Mark task 2 as done",
+            "Hello",
+        ])
+        
+        if len(responses) != 5 or "Buy milk" not in responses[0] or "Email the landlord" not in responses[2]:
+            print(f"   ❌ Unexpected responses: {responses}")
+            return False
+        completed = [t.title for t in assistant.task_manager.get_all_tasks() if t.status == TaskStatus.COMPLETED]
+        if len(completed) != 1 or completed[0] not in responses[3]:
+            print("   ❌ Completion did not see the batched inserts")
+            return False
+        print("   ✅ Responses returned in order, later commands see earlier tasks")
+        
+        if assistant.memory_store.get_memory_count() != 10 or len(assistant.conversation_history) != 10:
+            print("   ❌ Memory and history not recorded for every turn")
+            return False
+        stats = assistant.productivity_log.get_stats()
+        if stats["tasks_created"] != 2 or stats["tasks_completed"] != 1:
+            print(f"   ❌ Productivity counters out of step: {stats}")
+            return False
+        print("   ✅ Memories, history and productivity events recorded")
+        assistant.close()
+        
+        inputs = ["Add task: Renew the passport", "What do you remember about the passport?",
+                  "Add task: Print passport photos", "Hello", "What do you remember about the passport?"]
+        batched = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "batched.db"))
+        one_by_one = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "one_by_one.db"))
+        batch_responses = batched.process_batch(inputs)
+        if "photos" in batch_responses[1] or batch_responses != [one_by_one.process_input(x) for x in inputs]:
+            print(f"   ❌ Batch recall differs from one input at a time: {batch_responses[1]!r}")
+            return False
+        if [t.content for t in batched.conversation_history.turns()] != \
+                [t.content for t in one_by_one.conversation_history.turns()]:
+            print("   ❌ Batch history out of order")
+            return False
+        print("   ✅ Recall in a batch only sees the inputs before it")
+        batched.close()
+        one_by_one.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Batch processing test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_async_pipeline():
+    """Test concurrent turns through aprocess_input"""
+    print("\n⚡ Testing async pipeline...")
+    
+    try:
+        import asyncio
+        import os
+        import tempfile
+        from ai_assistant import MemoryMateAssistant
+        
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "async_test.db"))
+        
+        async def run_turns():
+            return await asyncio.gather(
+                assistant.aprocess_input("Add task: Book flights tomorrow"),
+                assistant.aprocess_input("Hello"),
+                assistant.aprocess_input("Add task: Pay the electricity bill"),
+            )
+        
+        responses = asyncio.run(run_turns())
+        if "Book flights" not in responses[0] or "Pay the electricity bill" not in responses[2]:
+            print(f"   ❌ Unexpected responses: {responses}")
+            return False
+        titles = [task.title for task in assistant.task_manager.get_all_tasks()]
+        if sorted(titles) != ["Add task: Book flights tomorrow", "Add task: Pay the electricity bill"]:
+            print(f"   ❌ Tasks not stored: {titles}")
+            return False
+        if assistant.memory_store.get_memory_count() != 6:
+            print("   ❌ Turns were not all logged to memory")
+            return False
+        print("   ✅ Concurrent turns answered and logged")
+        
+        assistant.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Async pipeline test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_streaming_pipeline():
+    """Test process_input_stream yields the reply and records the finished turn"""
+    print("\n🌊 Testing streaming pipeline...")
+    
+    try:
+        import os
+        import tempfile
+        from ai_assistant import MemoryMateAssistant
+        
+        assistant = MemoryMateAssistant(db_path=os.path.join(tempfile.mkdtemp(), "stream_test.db"))
+        pieces = list(assistant.process_input_stream("Add task: Water the plants"))
+        if len(pieces) != 1 or "Water the plants" not in pieces[0]:
+            print(f"   ❌ Unexpected pieces: {pieces}")
+            return False
+        if assistant.conversation_history[-1]["content"] != pieces[0].strip():
+            print("   ❌ Finished reply not added to history")
+            return False
+        print("   ✅ Non-chat intents arrive as one piece")
+        
+        # Stopping early still records what was said
+        stream = assistant.process_input_stream("Hello")
+        next(stream)
+        stream.close()
+        if assistant.memory_store.get_memory_count() != 4 or len(assistant.conversation_history) != 4:
+            print("   ❌ Closed stream did not record the turn")
+            return False
+        print("   ✅ Closed streams still log the turn")
+        
+        import llm_worker
+        from llm_worker import LLMWorker, shutdown_llm_worker
+        
+        shutdown_llm_worker()
+        llm_worker._default_worker = LLMWorker(server_path=stub_engine_server(tempfile.mkdtemp()),
+                                               session_dir=None, timeout=5)
+        try:
+            pieces = list(assistant.process_input_stream("Tell me a long story about MIDSTREAM dragons please"))
+        finally:
+            shutdown_llm_worker()
+        if pieces != ["Once", assistant.STREAM_INTERRUPTED] or \
+                assistant.conversation_history[-1]["content"] != "".join(pieces).strip():
+            print(f"   ❌ Interrupted reply not marked: {pieces}")
+            return False
+        print("   ✅ A reply cut off mid-stream ends with an error marker")
+        
+        assistant.close()
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Streaming pipeline test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_whisper_audio():
+    """Test PCM buffers are packed for the Whisper worker without touching the disk"""
+    print("\n🎧 Testing Whisper audio handling...")
+    
+    try:
+        import io
+        import numpy as np
+        from whisper_worker import Transcription, read_wav, to_int16, wav_bytes
+        
+        tone = np.sin(np.linspace(0, 200 * np.pi, 16000)).astype(np.float32) * 0.5
+        samples = to_int16(tone)
+        if samples.dtype != np.int16 or abs(int(samples.max()) - 16383) > 1:
+            print("   ❌ Float audio not converted to int16")
+            return False
+        if to_int16(samples) is not samples:
+            print("   ❌ int16 audio was copied")
+            return False
+        
+        decoded, sample_rate = read_wav(io.BytesIO(wav_bytes(tone)))
+        if sample_rate != 16000 or not np.array_equal(decoded, samples):
+            print("   ❌ In-memory WAV did not round-trip")
+            return False
+        print("   ✅ PCM packed as an in-memory WAV")
+        
+        if Transcription("hi", audio_seconds=2.0, processing_seconds=0.5).real_time_factor != 0.25:
+            print("   ❌ Wrong real-time factor")
+            return False
+        print("   ✅ Real-time factor reported")
+        
+        import tempfile
+        import wave
+        from whisper_worker import WhisperWorker, resample
+        
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(1)
+            wav_file.setframerate(16000)
+            wav_file.writeframes(bytes(160))
+        buffer.seek(0)
+        try:
+            read_wav(buffer)
+            print("   ❌ 8-bit WAV read as 16-bit samples")
+            return False
+        except ValueError as e:
+            if "8-bit" not in str(e):
+                print(f"   ❌ Unclear error for 8-bit WAV: {e}")
+                return False
+        
+        cd_quality = to_int16(np.sin(np.linspace(0, 200 * np.pi, 44100)) * 0.5)
+        if len(resample(cd_quality, 44100)) != 16000 or resample(samples, 16000) is not samples:
+            print("   ❌ Audio not resampled to 16 kHz")
+            return False
+        
+        worker = WhisperWorker(server_path=stub_engine_server(tempfile.mkdtemp()), timeout=10)
+        try:
+            result = worker.transcribe(tone)
+            if result.text != "1.0 seconds at 16000 Hz" or result.audio_seconds != 1.0:
+                print(f"   ❌ Worker sent the wrong audio: {result.text!r}")
+                return False
+            try:
+                worker.submit(cd_quality, sample_rate=44100)
+                print("   ❌ Worker accepted 44.1 kHz audio")
+                return False
+            except ValueError as e:
+                if "44100" not in str(e):
+                    print(f"   ❌ Rejected rate not named: {e}")
+                    return False
+            result = worker.transcribe(resample(cd_quality, 44100))
+            if result.text != "1.0 seconds at 16000 Hz":
+                print(f"   ❌ Resampled audio had the wrong length: {result.text!r}")
+                return False
+        finally:
+            worker.stop()
+        print("   ✅ Worker transcribes through the server, other rates resampled first")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Whisper audio test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_streaming_transcription():
+    """Test overlapping windows are sent while speaking and merged at the end"""
+    print("\n📝 Testing streaming transcription...")
+    
+    try:
+        import numpy as np
+        from concurrent.futures import Future
+        from whisper_worker import StreamingTranscriber, Transcription, merge_overlap
+        
+        if merge_overlap("please remind me to call", "to call mom tomorrow") != "please remind me to call mom tomorrow":
+            print("   ❌ Overlapping words not merged")
+            return False
+        
+        class ScriptedWorker:
+            """Answers each window with the words spoken in it (one per second of audio)"""
+            timeout = 5
+            
+            def __init__(self, words):
+                self.words = words
+                self.requests = []
+            
+            def submit(self, pcm):
+                start = int(pcm[0]) if len(pcm) else 0
+                self.requests.append((start, len(pcm)))
+                future = Future()
+                spoken = self.words[start // 16000:(start + len(pcm) + 15999) // 16000]
+                future.set_result(Transcription(" ".join(spoken), len(pcm) / 16000, 0.1))
+                return future
+        
+        words = "remind me to send the quarterly report to the finance team before friday".split()
+        # Each sample holds its own index, so the worker can tell which seconds it was given
+        audio = np.arange(len(words) * 16000, dtype=np.int64)
+        worker = ScriptedWorker(words)
+        partials = []
+        transcriber = StreamingTranscriber(worker, window_seconds=4, overlap_seconds=1,
+                                           partial_interval=1, on_partial=partials.append)
+        for end in range(8000, len(audio) + 1, 8000):
+            transcriber.update(audio[:end])
+        windows_while_speaking = len(worker.requests)
+        text = transcriber.finish(audio)
+        
+        if text != " ".join(words):
+            print(f"   ❌ Final transcript wrong: {text}")
+            return False
+        if not partials or not " ".join(words).startswith(partials[0]):
+            print(f"   ❌ No usable partial hypotheses: {partials[:2]}")
+            return False
+        if max(length for _, length in worker.requests) > 4 * 16000 or windows_while_speaking < 3:
+            print("   ❌ Audio not sent in bounded windows while speaking")
+            return False
+        print(f"   ✅ {len(partials)} partial hypotheses, final transcript merged across windows")
+        
+        worker.requests.clear()
+        transcriber.update(audio[:3 * 16000])
+        requests_while_speaking = len(worker.requests)
+        text = transcriber.finish(audio[:3 * 16000])
+        if text != " ".join(words[:3]) or len(worker.requests) != requests_while_speaking:
+            print("   ❌ Final window sent again although the last partial covered it")
+            return False
+        if transcriber.last_latency is None or transcriber.last_latency < 0:
+            print("   ❌ Finish latency not measured")
+            return False
+        print(f"   ✅ Last partial reused as the final window ({transcriber.last_latency * 1000:.2f} ms to transcript)")
+        
+        class SlowWorker(ScriptedWorker):
+            """Leaves requests for the first two seconds in flight, as if the server were busy"""
+            def submit(self, pcm):
+                if len(pcm) > 2 * 16000:
+                    return super().submit(pcm)
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self.in_flight = (future, pcm)
+                return future
+        
+        slow = SlowWorker(words)
+        late = []
+        transcriber = StreamingTranscriber(slow, window_seconds=4, overlap_seconds=1,
+                                           partial_interval=1, on_partial=late.append)
+        transcriber.update(audio[:2 * 16000])
+        transcriber.finish(audio[:3 * 16000])
+        future, pcm = slow.in_flight
+        future.set_result(Transcription(" ".join(words[:2]), len(pcm) / 16000, 0.1))
+        if late:
+            print(f"   ❌ Partial reported after finish(): {late}")
+            return False
+        print("   ✅ No partial hypotheses after the final transcript")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Streaming transcription test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_engine_runner():
+    """Test engine commands run from argument lists with pipes, timeouts and exit codes"""
+    print("\n⚙️ Testing engine runner...")
+    
+    try:
+        import sys
+        from engine_runner import EngineError, EngineRunner
+        from engine_server import EngineUnavailable
+        
+        runner = EngineRunner(max_concurrent=1, timeout=10)
+        text = 'She said "don\'t" and paid $5; `ls` & exit'
+        echo = runner.run([sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"],
+                          input=text.encode())
+        if echo.text != text or echo.returncode != 0:
+            print(f"   ❌ Text did not pass through unchanged: {echo.text!r}")
+            return False
+        print("   ✅ Quotes and shell characters reach the engine unchanged")
+        
+        try:
+            runner.run([sys.executable, "-c", "import sys; sys.stderr.write('model not found'); sys.exit(3)"])
+            print("   ❌ Non-zero exit not reported")
+            return False
+        except EngineError as e:
+            if e.returncode != 3 or "model not found" not in str(e):
+                print(f"   ❌ Exit code or stderr missing: {e}")
+                return False
+        
+        for argv, expected, timeout in (
+            (["./no-such-engine"], EngineUnavailable, None),
+            ([sys.executable, "-c", "import time; time.sleep(5)"], TimeoutError, 0.5),
+        ):
+            try:
+                runner.run(argv, timeout=timeout)
+                print(f"   ❌ {expected.__name__} not raised")
+                return False
+            except expected:
+                pass
+        print("   ✅ Exit codes, missing programs and timeouts reported")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Engine runner test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_audio_ring_buffer():
+    """Test the preallocated capture buffer grows, wraps and hands out views"""
+    print("\n🎚️ Testing audio ring buffer...")
+    
+    try:
+        import numpy as np
+        from audio_buffer import AudioRingBuffer
+        
+        buffer = AudioRingBuffer(480)
+        buffer.reserve(480 * 4)
+        storage = buffer.view().base
+        for i in range(4):
+            buffer.append(np.full(480, i, dtype=np.int16))
+        samples = buffer.view()
+        if len(samples) != 1920 or samples.base is not storage or list(samples[::480]) != [0, 1, 2, 3]:
+            print("   ❌ Reserved buffer reallocated or view copied")
+            return False
+        print("   ✅ Blocks appended into preallocated storage, view shares it")
+        
+        ring = AudioRingBuffer(4, max_capacity=8)
+        expected = []
+        for i in range(5):
+            block = np.arange(i * 3, i * 3 + 3, dtype=np.int16)
+            ring.append(block)
+            expected.extend(block.tolist())
+        out = np.zeros(8, dtype=np.int16)
+        count = ring.write_into(out)
+        if ring.capacity != 8 or ring.view().tolist() != expected[-8:] or out[:count].tolist() != expected[-8:]:
+            print(f"   ❌ Ring contents wrong: {ring.view().tolist()}")
+            return False
+        print("   ✅ Grows to its limit, then keeps the newest samples")
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Audio ring buffer test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
+def test_speech_gate():
+    """Test pre-roll before speech onset and hangover after it"""
+    print("\n🗣️ Testing speech gate...")
+    
+    try:
+        import tracemalloc
+        import numpy as np
+        from audio_buffer import AudioRingBuffer, SpeechGate
+        
+        frame_size = 480
+        buffer = AudioRingBuffer(frame_size * 100)
+        gate = SpeechGate(buffer, frame_size, pre_roll_frames=3, hangover_frames=2, onset_frames=2)
+        # Frame i is filled with i; speech in frames 10-19 with a one-frame dip at 15
+        pattern = [10 <= i < 20 and i != 15 for i in range(30)]
+        frames = [np.full(frame_size, i, dtype=np.int16) for i in range(len(pattern))]
+        
+        tracemalloc.start()
+        for frame, is_speech in zip(frames[:5], pattern[:5]):
+            gate.push(frame, is_speech)
+        before = tracemalloc.get_traced_memory()[0]
+        for frame, is_speech in zip(frames[5:], pattern[5:]):
+            gate.push(frame, is_speech)
+        grown = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        
+        kept = gate.utterance()[::frame_size].tolist()
+        # Onset confirmed at frame 11: pre-roll holds 9-11; hangover keeps 20-21
+        if kept != list(range(9, 22)):
+            print(f"   ❌ Unexpected frames kept: {kept}")
+            return False
+        print("   ✅ Pre-roll prepended, dip bridged, hangover kept and trailing silence dropped")
+        
+        if grown > 4096 or gate.silent_frames != 10:
+            print(f"   ❌ push allocated {grown} bytes or miscounted silence ({gate.silent_frames})")
+            return False
+        print("   ✅ Frames gated without allocating")
+        
+        gate.reset()
+        if len(gate.utterance()) != 0 or gate.triggered:
+            print("   ❌ Reset did not clear the gate")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Speech gate test failed: {e}")
+        traceback.print_exc()
+        return False
+
+
 def test_tts():
     """Test text-to-speech functionality"""
     print("\n🔊 Testing TTS...")
@@ -228,6 +1820,34 @@ def test_tts():
         tts.change_volume(0.8)
         print("   ✅ TTS configuration working")
         
+        import threading
+        from tts import Speaker, speak_stream
+        
+        class RecordingEngine:
+            def __init__(self):
+                self.created_on = threading.current_thread()
+                self.spoken = []
+            
+            def speak(self, text):
+                self.spoken.append((text, threading.current_thread()))
+        
+        speaker = Speaker(RecordingEngine)
+        shown = []
+        text = speak_stream(iter(["Hello there, how are", " you today? I am fine. Thanks for", " asking."]),
+                            on_chunk=shown.append, speaker=speaker)
+        speak_stream(iter(["A second reply to speak."]), speaker=speaker)
+        engine = speaker.engine
+        sentences = [sentence for sentence, _ in engine.spoken]
+        if sentences != ["Hello there, how are you today?", "I am fine. Thanks for asking.",
+                         "A second reply to speak."] or text != "".join(shown):
+            print(f"   ❌ Sentences not spoken in order: {sentences}")
+            return False
+        if {thread for _, thread in engine.spoken} != {engine.created_on} or \
+                engine.created_on is threading.current_thread():
+            print("   ❌ Speech not confined to the speaker thread that owns the engine")
+            return False
+        print("   ✅ Streams spoken in order by one long-lived speaker thread")
+        
         return True
         
     except Exception as e:
@@ -244,8 +1864,32 @@ def main():
     tests = [
         ("Imports", test_imports),
         ("Task Manager", test_task_manager),
+        ("Batch Task Operations", test_batch_task_operations),
+        ("Prioritization Engine", test_prioritization_engine),
+        ("Productivity Log", test_productivity_log),
+        ("Change Feed", test_change_feed),
+        ("Scheduler", test_scheduler),
+        ("Focus Timers", test_focus_timers),
+        ("Intent Classifier", test_intent_classifier),
+        ("Semantic Intents", test_semantic_intents),
+        ("Keyword Tagger", test_keyword_tagger),
+        ("Due-Date Parser", test_due_date_parser),
+        ("Task References", test_task_references),
+        ("Fuzzy Title Index", test_fuzzy_index),
+        ("Conversation Context", test_conversation_context),
+        ("LLM Worker", test_llm_worker),
+        ("Prompt Session Cache", test_prompt_session_cache),
+        ("Response Cache", test_response_cache),
         ("Memory Store", test_memory_store),
         ("AI Assistant", test_ai_assistant),
+        ("Batch Processing", test_process_batch),
+        ("Async Pipeline", test_async_pipeline),
+        ("Streaming Pipeline", test_streaming_pipeline),
+        ("Whisper Audio", test_whisper_audio),
+        ("Streaming Transcription", test_streaming_transcription),
+        ("Engine Runner", test_engine_runner),
+        ("Audio Ring Buffer", test_audio_ring_buffer),
+        ("Speech Gate", test_speech_gate),
         ("Text-to-Speech", test_tts)
     ]
     
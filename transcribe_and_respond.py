@@ -1,29 +1,91 @@
 # transcribe_and_respond.py
-import os
+import asyncio
 
+from engine_server import EngineUnavailable
+from llm_worker import generate_with_cli, get_llm_worker
+from response_cache import get_response_cache
+from whisper_worker import WHISPER_SAMPLE_RATE, get_whisper_worker, read_wav, resample, transcribe_with_cli
 
-def transcribe_with_whisper(audio_file):
+
+def transcribe_audio(pcm, sample_rate=WHISPER_SAMPLE_RATE, timeout=None):
+    """Transcript of an int16 or float32 PCM buffer from the resident Whisper worker.
+
+    Audio at other rates is resampled to the 16 kHz Whisper expects.
+    """
     print("🧠 Transcribing with Whisper.cpp...")
-    os.system(f"./main -m models/ggml-base.en.bin -f {audio_file} -otxt")
-    text_file = f"{audio_file}.txt"
-    with open(text_file, "r") as f:
-        transcript = f.read().strip()
-    return transcript
+    pcm = resample(pcm, sample_rate)
+    try:
+        result = get_whisper_worker().transcribe(pcm, timeout=timeout)
+    except EngineUnavailable as e:
+        print(f"⚠️ Whisper server unavailable ({e}), using the whisper.cpp CLI")
+        result = transcribe_with_cli(pcm)
+    print(f"⏱️ {result.audio_seconds:.1f}s of audio in {result.processing_seconds:.2f}s "
+          f"(RTF {result.real_time_factor:.2f})")
+    return result.text
+
+
+def transcribe_with_whisper(audio_file):
+    pcm, sample_rate = read_wav(audio_file)
+    return transcribe_audio(pcm, sample_rate)
 
 
-def generate_llama_response(user_input):
+def _response_cache(sampling):
+    """The response cache, or None for sampling that is meant to vary (so the DB is never opened)"""
+    return get_response_cache() if sampling.deterministic else None
+
+
+def generate_llama_response(user_input, timeout=None, prefix=None):
+    """Generated reply from the persistent LLaMA worker (the model loads once per session).
+
+    `prefix` is the start of the prompt that the next turn's prompt will repeat;
+    the worker keeps it evaluated so follow-up turns only process new tokens.
+    With deterministic sampling, replies come from the response cache when the
+    same prompt was answered before.
+    """
+    worker = get_llm_worker()
+    sampling = worker.sampling
+    cache = _response_cache(sampling)
+    if cache is not None:
+        cached = cache.get(user_input, worker.model_path, sampling)
+        if cached is not None:
+            return cached
     print("🤖 Asking LLaMA...")
-    with open("prompt.txt", "w") as f:
-        f.write(user_input)
+    try:
+        response = worker.generate(user_input, sampling, timeout=timeout, prefix=prefix)
+    except EngineUnavailable as e:
+        print(f"⚠️ LLaMA server unavailable ({e}), using the llama.cpp CLI")
+        response = generate_with_cli(user_input, sampling, worker.model_path)
+    if cache is not None:
+        cache.put(user_input, worker.model_path, sampling, response)
+    return response
 
-    os.system("./llama/main -m ./models/7B/ggml-model-q4_0.bin -p prompt.txt -n 200")
 
-    # Assuming LLaMA writes to stdout or to a file
-    # If output goes to a file, read from it here
-    # Example:
-    # with open("llama_output.txt", "r") as f:
-    #     response = f.read().strip()
-    # return response
+def stream_llama_response(user_input, timeout=None, prefix=None):
+    """generate_llama_response as a generator of text pieces, yielded as they are generated"""
+    worker = get_llm_worker()
+    sampling = worker.sampling
+    cache = _response_cache(sampling)
+    if cache is not None:
+        cached = cache.get(user_input, worker.model_path, sampling)
+        if cached is not None:
+            yield cached
+            return
+    print("🤖 Asking LLaMA...")
+    pieces = []
+    try:
+        for piece in worker.stream(user_input, sampling, timeout=timeout, prefix=prefix):
+            pieces.append(piece)
+            yield piece
+    except EngineUnavailable as e:
+        if pieces:
+            raise
+        print(f"⚠️ LLaMA server unavailable ({e}), using the llama.cpp CLI")
+        pieces.append(generate_with_cli(user_input, sampling, worker.model_path))
+        yield pieces[0]
+    if cache is not None:
+        cache.put(user_input, worker.model_path, sampling, "".join(pieces).strip())
+
 
-    # If output appears in terminal, optionally return placeholder:
-    return "(LLaMA output shown in terminal)"
+async def agenerate_llama_response(user_input, timeout=None, prefix=None):
+    """Async generate_llama_response that leaves the event loop free while generating"""
+    return await asyncio.to_thread(generate_llama_response, user_input, timeout, prefix)
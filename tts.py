@@ -1,6 +1,36 @@
 import pyttsx3
-import os
 import platform
+import queue
+import re
+import threading
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from engine_runner import run_engine
+
+
+# System speech commands that read the text to speak from stdin
+FALLBACK_SPEAK_COMMANDS = {
+    "Darwin": ["say"],
+    "Linux": ["espeak", "--stdin"],
+    "Windows": [
+        "powershell", "-NoProfile", "-Command",
+        "Add-Type -AssemblyName System.Speech; "
+        "(New-Object System.Speech.Synthesis.SpeechSynthesizer).Speak([Console]::In.ReadToEnd())",
+    ],
+}
+FALLBACK_SPEAK_TIMEOUT = 120.0
+
+
+def fallback_speak(text: str):
+    """Fallback TTS using system commands"""
+    # The text goes in on stdin, so quotes in it cannot break the command
+    argv = FALLBACK_SPEAK_COMMANDS.get(platform.system())
+    if argv is None:
+        return
+    try:
+        run_engine(argv, input=text.encode("utf-8"), timeout=FALLBACK_SPEAK_TIMEOUT)
+    except Exception as e:
+        print(f"Fallback TTS also failed: {e}")
 
 
 class TextToSpeech:
@@ -48,17 +78,7 @@ class TextToSpeech:
             self._fallback_speak(text)
     
     def _fallback_speak(self, text: str):
-        """Fallback TTS using system commands"""
-        system = platform.system()
-        try:
-            if system == "Darwin":  # macOS
-                os.system(f'say "{text}"')
-            elif system == "Linux":
-                os.system(f'espeak "{text}"')
-            elif system == "Windows":
-                os.system(f'powershell -Command "Add-Type -AssemblyName System.Speech; (New-Object System.Speech.Synthesis.SpeechSynthesizer).Speak(\'{text}\')"')
-        except Exception as e:
-            print(f"Fallback TTS also failed: {e}")
+        fallback_speak(text)
     
     def stop(self):
         """Stop current speech"""
@@ -83,15 +103,142 @@ class TextToSpeech:
         self.engine.setProperty('volume', max(0.0, min(1.0, volume)))
 
 
-# Global TTS instance
-tts_engine = TextToSpeech()
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+MIN_SENTENCE_CHARS = 12
+
+
+def split_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed text pieces into sentences, yielding each as soon as it is complete"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            # Very short "sentences" are usually abbreviations like "Dr." or "e.g."
+            if match.end() - start >= MIN_SENTENCE_CHARS:
+                yield buffer[start:match.end()].strip()
+                start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+class Speaker:
+    """Speaks queued text in order on one long-lived thread that owns the TTS engine.
+    
+    pyttsx3 engines must be driven from the thread that created them, so all
+    speech goes through this thread rather than whichever thread wants to talk.
+    The engine is created by `engine_factory` on first use.
+    """
+    
+    def __init__(self, engine_factory: Callable[[], TextToSpeech] = TextToSpeech):
+        self.engine_factory = engine_factory
+        self.engine: Optional[TextToSpeech] = None
+        # Actions to run with the engine (None if it could not be created), each with an event set once run
+        self._queue: "queue.Queue[Tuple[Callable[[Optional[TextToSpeech]], None], threading.Event]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def say(self, text: str) -> threading.Event:
+        """Queue `text`; the returned event is set once it has been spoken (or dropped)"""
+        return self._submit(lambda engine: engine.speak(text) if engine is not None else fallback_speak(text))
+    
+    def configure(self, rate: Optional[int] = None, volume: Optional[float] = None) -> threading.Event:
+        """Change the speech rate or volume from the speaker thread, after what is already queued"""
+        def apply(engine: Optional[TextToSpeech]):
+            if engine is None:
+                return
+            if rate is not None:
+                engine.change_rate(rate)
+            if volume is not None:
+                engine.change_volume(volume)
+        return self._submit(apply)
+    
+    def _submit(self, action: Callable[[Optional[TextToSpeech]], None]) -> threading.Event:
+        done = threading.Event()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="memorymate-tts", daemon=True)
+                self._thread.start()
+            self._queue.put((action, done))
+        return done
+    
+    def clear(self):
+        """Drop everything still waiting to be spoken"""
+        while True:
+            try:
+                _, done = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            done.set()
+    
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+        except Exception as e:
+            print(f"TTS Error: {e}")
+        while True:
+            action, done = self._queue.get()
+            try:
+                action(self.engine)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+            finally:
+                done.set()
+
+
+_default_speaker: Optional[Speaker] = None
+_default_speaker_lock = threading.Lock()
+
+
+def get_speaker() -> Speaker:
+    """The process-wide speaker, whose thread starts on first use"""
+    global _default_speaker
+    with _default_speaker_lock:
+        if _default_speaker is None:
+            _default_speaker = Speaker()
+        return _default_speaker
 
 
 def speak_text(text: str, block: bool = True):
     """Global function to speak text"""
-    tts_engine.speak(text, block)
+    done = get_speaker().say(text)
+    if block:
+        done.wait()
 
 
 def stop_speech():
     """Global function to stop speech"""
-    tts_engine.stop()
+    speaker = get_speaker()
+    speaker.clear()
+    if speaker.engine is not None:
+        speaker.engine.stop()
+
+
+def speak_stream(chunks: Iterable[str], on_chunk: Optional[Callable[[str], None]] = None,
+                 speaker: Optional[Speaker] = None) -> str:
+    """Speak streamed text sentence by sentence, starting with the first complete one.
+    
+    Sentences go to the speaker thread, so the stream keeps being read (and
+    shown through `on_chunk`) while earlier sentences are spoken. Returns the
+    full text once the last sentence has been spoken.
+    """
+    speaker = speaker or get_speaker()
+    received = []
+    last_sentence: Optional[threading.Event] = None
+
+    def tee():
+        for chunk in chunks:
+            received.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+            yield chunk
+
+    try:
+        for sentence in split_sentences(tee()):
+            last_sentence = speaker.say(sentence)
+    finally:
+        if last_sentence is not None:
+            last_sentence.wait()
+    return "".join(received)
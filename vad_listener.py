@@ -1,9 +1,8 @@
 # Vad_listener.py
 import os
-from transcribe_and_respond import transcribe_with_whisper, generate_llama_response
+from transcribe_and_respond import transcribe_audio, generate_llama_response
 from tts import speak_text  # Your TTS system
-
-AUDIO_FILE = "my_voice.wav"
+from vad_module import listen_with_vad, DEBUG_AUDIO_FILE
 
 
 def main():
@@ -11,11 +10,11 @@ def main():
 
     # Step 1: Record with VAD
     print("🎤 Listening... Start speaking to activate VAD.")
-    record_with_vad(AUDIO_FILE)
-    print(f"✅ Recording saved as '{AUDIO_FILE}'\n")
+    samples = listen_with_vad(debug_wav=DEBUG_AUDIO_FILE)
+    print(f"✅ Recorded {len(samples) / 16000:.1f}s of speech\n")
 
     # Step 2: Transcribe
-    transcript = transcribe_with_whisper(AUDIO_FILE)
+    transcript = transcribe_audio(samples)
     print(f"📝 You said: {transcript}\n")
 
     # Step 3: Generate response from LLaMA
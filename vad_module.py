@@ -1,6 +1,8 @@
 # Vad_listener.py
 import os
-from transcribe_and_respond import transcribe_with_whisper, generate_llama_response
+from transcribe_and_respond import transcribe_audio, generate_llama_response
+from whisper_worker import StreamingTranscriber
+from audio_buffer import AudioRingBuffer, SpeechGate
 from tts import speak_text  # Your TTS system
 import webrtcvad
 import sounddevice as sd
@@ -8,47 +10,81 @@ import numpy as np
 import wave
 import threading
 import time
-from collections import deque
 
 
-AUDIO_FILE = "my_voice.wav"
+# Set to a filename (e.g. "my_voice.wav") to keep a copy of each utterance for debugging
+DEBUG_AUDIO_FILE = None
 
 
 class VoiceActivityDetector:
-    def __init__(self, sample_rate=16000, frame_duration_ms=30, aggressiveness=2):
+    def __init__(self, sample_rate=16000, frame_duration_ms=30, aggressiveness=2,
+                 pre_roll_ms=300, hangover_ms=300, onset_frames=2):
         self.sample_rate = sample_rate
         self.frame_duration_ms = frame_duration_ms
         self.aggressiveness = aggressiveness
         self.vad = webrtcvad.Vad(aggressiveness)
         self.frame_size = int(sample_rate * frame_duration_ms / 1000)
         self.is_recording = False
-        self.audio_buffer = deque()
+        # Preallocated for 10 s of speech; capture() reserves room for its max_duration
+        self.audio_buffer = AudioRingBuffer(sample_rate * 10)
+        self._block = np.zeros(self.frame_size, dtype=np.float32)
+        self._frame = np.zeros(self.frame_size, dtype=np.int16)
+        # webrtcvad reads the frame through this, so no bytes object is made per frame
+        self._frame_bytes = memoryview(self._frame).cast('B')
+        # Keeps ~pre_roll_ms before the onset and hangover_ms after the last speech frame
+        self.gate = SpeechGate(
+            self.audio_buffer, self.frame_size,
+            pre_roll_frames=-(-pre_roll_ms // frame_duration_ms),
+            hangover_frames=-(-hangover_ms // frame_duration_ms),
+            onset_frames=onset_frames,
+        )
         self.silence_threshold = 0.5  # seconds of silence to stop recording
         self.last_voice_time = time.time()  # Instance variable
         
     def record_with_vad(self, filename="recording.wav", max_duration=30):
         """Record audio with voice activity detection"""
+        self.capture(max_duration)
+        if self._save_audio(filename):
+            print(f"✅ Recording saved as '{filename}'")
+        else:
+            print("⚠️ No speech detected; nothing was saved")
+        return filename
+    
+    def capture(self, max_duration=30, on_audio=None, poll_interval=0.1):
+        """Record one utterance with voice activity detection and return it as int16 samples.
+        
+        `on_audio`, if given, is called every `poll_interval` seconds with the
+        samples recorded so far, off the audio callback's thread.
+        """
         print("🎤 Listening for voice activity...")
         print("💡 Speak now to start recording, stay silent to stop")
         
         self.is_recording = True
-        self.audio_buffer.clear()
+        self.gate.reset()
+        self.audio_buffer.reserve(int(max_duration * self.sample_rate) + self.gate.pre_roll.capacity
+                                  + self.frame_size)
         self.last_voice_time = time.time()  # Reset voice time
         
         # Start recording in a separate thread
         recording_thread = threading.Thread(
             target=self._record_audio,
-            args=(filename, max_duration)
+            args=(max_duration,)
         )
         recording_thread.start()
         
         # Wait for recording to complete
-        recording_thread.join()
+        while recording_thread.is_alive():
+            recording_thread.join(poll_interval)
+            if on_audio is not None and self.gate.triggered:
+                on_audio(self.get_audio())
         
-        print(f"✅ Recording saved as '{filename}'")
-        return filename
+        return self.get_audio()
+    
+    def get_audio(self):
+        """The recorded utterance as an int16 array: a view, valid until the next capture"""
+        return self.gate.utterance()
     
-    def _record_audio(self, filename, max_duration):
+    def _record_audio(self, max_duration):
         """Internal recording function"""
         start_time = time.time()
         
@@ -59,19 +95,19 @@ class VoiceActivityDetector:
             if not self.is_recording:
                 return
             
-            # Convert to 16-bit PCM
-            audio_data = (indata[:, 0] * 32767).astype(np.int16)
+            # Convert to 16-bit PCM in preallocated arrays
+            audio_data = self._to_pcm(indata[:, 0])
             
-            # Check for voice activity
-            if self._detect_voice(audio_data):
+            # Check for voice activity; the gate keeps pre-roll and hangover frames
+            is_speech = self._detect_voice(audio_data)
+            self.gate.push(audio_data, is_speech)
+            if is_speech:
                 self.last_voice_time = time.time()
-                self.audio_buffer.extend(audio_data)
-            else:
+            elif self.gate.triggered:
                 # Check if we've been silent for too long
-                if time.time() - self.last_voice_time > self.silence_threshold:
-                    if len(self.audio_buffer) > 0:
-                        self.is_recording = False
-                        return
+                if self.gate.silent_frames * self.frame_duration_ms / 1000 > self.silence_threshold:
+                    self.is_recording = False
+                    return
             
             # Check max duration
             if time.time() - start_time > max_duration:
@@ -92,14 +128,21 @@ class VoiceActivityDetector:
         except Exception as e:
             print(f"Recording error: {e}")
             self.is_recording = False
-        
-        # Save the recorded audio
-        if len(self.audio_buffer) > 0:
-            self._save_audio(filename)
+    
+    def _to_pcm(self, samples):
+        """int16 copy of a float32 block, written into the detector's frame array"""
+        if len(samples) != self.frame_size:
+            return (samples * 32767).astype(np.int16)
+        np.multiply(samples, 32767, out=self._block)
+        np.copyto(self._frame, self._block, casting='unsafe')
+        return self._frame
     
     def _detect_voice(self, audio_data):
         """Detect voice activity in audio frame"""
         try:
+            if audio_data is self._frame:
+                return self.vad.is_speech(self._frame_bytes, self.sample_rate)
+            
             # Convert to bytes for webrtcvad
             audio_bytes = audio_data.tobytes()
             
@@ -120,46 +163,73 @@ class VoiceActivityDetector:
             return np.mean(np.abs(audio_data)) > 0.01
     
     def _save_audio(self, filename):
-        """Save recorded audio to WAV file"""
-        if len(self.audio_buffer) == 0:
-            return
+        """Save recorded audio to WAV file; False if there was nothing to save"""
+        if len(self.get_audio()) == 0:
+            return False
         
-        # Convert deque to numpy array
-        audio_array = np.array(list(self.audio_buffer), dtype=np.int16)
-        
-        # Save as WAV file
-        with wave.open(filename, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(audio_array.tobytes())
+        save_wav(filename, self.get_audio(), self.sample_rate)
+        return True
     
     def stop_recording(self):
         """Stop recording manually"""
         self.is_recording = False
 
 
+def save_wav(filename, samples, sample_rate=16000):
+    """Write int16 samples as a mono 16-bit WAV file"""
+    with wave.open(filename, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+
+
 def record_with_vad(filename="my_voice.wav", duration=10):
     """Simple function to record with VAD"""
     vad = VoiceActivityDetector()
     return vad.record_with_vad(filename, duration)
 
 
-# Alternative simple recording function for when VAD is not available
-def record_simple(filename="my_voice.wav", duration=5):
-    """Simple recording without VAD"""
-    fs = 16000
+def listen_with_vad(duration=10, debug_wav=None):
+    """Record one utterance with VAD and return its int16 samples, for transcribe_audio.
+    
+    Nothing is written to disk unless `debug_wav` names a file to keep a copy in.
+    """
+    vad = VoiceActivityDetector()
+    samples = vad.capture(duration)
+    if debug_wav and len(samples) > 0:
+        save_wav(debug_wav, samples, vad.sample_rate)
+    return samples
+
+
+def listen_and_transcribe(duration=10, on_partial=None, debug_wav=None):
+    """Record one utterance with VAD, transcribing while the user is still speaking.
+    
+    `on_partial` gets the hypothesis so far as it improves; the final
+    transcript is returned as soon as the VAD hears the end of speech.
+    """
+    transcriber = StreamingTranscriber(on_partial=on_partial)
+    vad = VoiceActivityDetector()
+    samples = vad.capture(duration, on_audio=transcriber.update)
+    if debug_wav and len(samples) > 0:
+        save_wav(debug_wav, samples, vad.sample_rate)
+    transcript = transcriber.finish(samples)
+    print(f"⏱️ Transcript ready {transcriber.last_latency:.2f}s after end of speech")
+    return transcript
+
+
+# Alternative simple recording functions for when VAD is not available
+def capture_simple(duration=5, fs=16000):
+    """Simple in-memory recording without VAD, as int16 samples"""
     print(f"🎤 Recording for {duration} seconds...")
     recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
     sd.wait()
-    
-    # Save as WAV
-    with wave.open(filename, 'wb') as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(fs)
-        wav_file.writeframes((recording * 32767).astype(np.int16).tobytes())
-    
+    return (recording[:, 0] * 32767).astype(np.int16)
+
+
+def record_simple(filename="my_voice.wav", duration=5):
+    """Simple recording without VAD"""
+    save_wav(filename, capture_simple(duration))
     print(f"✅ Recording saved as '{filename}'")
     return filename
 
@@ -169,11 +239,11 @@ def main():
 
     # Step 1: Record with VAD
     print("🎤 Listening... Start speaking to activate VAD.")
-    record_with_vad(AUDIO_FILE)
-    print(f"✅ Recording saved as '{AUDIO_FILE}'\n")
+    samples = listen_with_vad(debug_wav=DEBUG_AUDIO_FILE)
+    print(f"✅ Recorded {len(samples) / 16000:.1f}s of speech\n")
 
     # Step 2: Transcribe
-    transcript = transcribe_with_whisper(AUDIO_FILE)
+    transcript = transcribe_audio(samples)
     print(f"📝 You said: {transcript}\n")
 
     # Step 3: Generate response from LLaMA
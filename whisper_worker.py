@@ -0,0 +1,292 @@
+import io
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from engine_runner import run_engine
+from engine_server import EngineUnavailable, ManagedServer
+
+
+WHISPER_SERVER = "./server"
+WHISPER_CLI = "./main"
+WHISPER_MODEL = "models/ggml-base.en.bin"
+WHISPER_SAMPLE_RATE = 16000
+
+
+@dataclass
+class Transcription:
+    text: str
+    audio_seconds: float
+    processing_seconds: float
+
+    @property
+    def real_time_factor(self) -> float:
+        """Processing time per second of audio; below 1 is faster than real time"""
+        return self.processing_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+
+def to_int16(pcm: np.ndarray) -> np.ndarray:
+    """Mono 16-bit samples from int16 or float (-1..1) audio, without copying int16 input"""
+    pcm = np.asarray(pcm)
+    if pcm.ndim > 1:
+        pcm = pcm[:, 0]
+    if pcm.dtype == np.int16:
+        return pcm
+    return (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def wav_bytes(pcm: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE) -> bytes:
+    """A mono 16-bit WAV file in memory"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(to_int16(pcm).tobytes())
+    return buffer.getvalue()
+
+
+def resample(pcm: np.ndarray, sample_rate: int, target_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """`pcm` converted to `target_rate` by linear interpolation; returned as is if already there"""
+    if sample_rate == target_rate:
+        return pcm
+    if sample_rate <= 0:
+        raise ValueError(f"Invalid sample rate: {sample_rate} Hz")
+    samples = to_int16(pcm)
+    count = int(round(len(samples) * target_rate / sample_rate))
+    positions = np.arange(count) * (sample_rate / target_rate)
+    return np.round(np.interp(positions, np.arange(len(samples)), samples)).astype(np.int16)
+
+
+def read_wav(path) -> Tuple[np.ndarray, int]:
+    """Samples (first channel, int16) and sample rate of a 16-bit WAV file or file object"""
+    with wave.open(path, "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError(f"Expected a 16-bit WAV file, got {8 * wav_file.getsampwidth()}-bit samples")
+        channels = wav_file.getnchannels()
+        sample_rate = wav_file.getframerate()
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    return samples[::channels], sample_rate
+
+
+def _multipart(fields: dict, filename: str, content: bytes) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'.encode() + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def transcribe_with_cli(pcm: np.ndarray, model_path: str = WHISPER_MODEL, cli_path: str = WHISPER_CLI,
+                        threads: int = 4, language: str = "en", timeout: float = 120.0) -> Transcription:
+    """One-shot transcription with the whisper.cpp command-line program, for when the server cannot run.
+
+    The model is loaded for every call. The WAV goes in on stdin and the text
+    comes back on stdout, so nothing is written to disk.
+    """
+    samples = to_int16(pcm)
+    result = run_engine(
+        [cli_path, "-m", model_path, "-t", str(threads), "-l", language, "-nt", "-np", "-f", "-"],
+        input=wav_bytes(samples), timeout=timeout,
+    )
+    return Transcription(" ".join(result.text.split()), len(samples) / WHISPER_SAMPLE_RATE, result.seconds)
+
+
+class WhisperWorker:
+    """A whisper.cpp server kept running with the model loaded, sent PCM audio over a local socket.
+
+    Audio never touches the disk: buffers are wrapped as WAV in memory and
+    posted to the server, which decodes with `threads` threads. Requests queue
+    in FIFO order, `parallel` in flight at a time. Every result carries its
+    real-time factor.
+    """
+
+    def __init__(self, model_path: str = WHISPER_MODEL, server_path: str = WHISPER_SERVER,
+                 threads: int = 4, parallel: int = 1, language: str = "en",
+                 timeout: float = 60.0, extra_args: Optional[List[str]] = None):
+        self.model_path = model_path
+        self.language = language
+        self.timeout = timeout
+        self.server = ManagedServer(
+            "whisper-server",
+            [server_path, "-m", model_path, "-t", str(threads), "-l", language] + (extra_args or []),
+            health_path="/",
+        )
+        self._queue = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="memorymate-whisper")
+
+    def start(self):
+        """Load the model now instead of on the first request"""
+        self.server.start()
+
+    def stop(self):
+        self._queue.shutdown(wait=False, cancel_futures=True)
+        self.server.stop()
+
+    def submit(self, pcm: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE,
+               timeout: Optional[float] = None) -> Future:
+        """Queue a transcription; the future resolves to a Transcription"""
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            raise ValueError(f"Whisper expects {WHISPER_SAMPLE_RATE} Hz audio, got {sample_rate} Hz")
+        return self._queue.submit(self._transcribe, pcm, timeout or self.timeout)
+
+    def transcribe(self, pcm: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE,
+                   timeout: Optional[float] = None) -> Transcription:
+        timeout = timeout or self.timeout
+        future = self.submit(pcm, sample_rate, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise TimeoutError(f"Transcription timed out after {timeout:.0f}s") from None
+
+    def _transcribe(self, pcm: np.ndarray, timeout: float) -> Transcription:
+        samples = to_int16(pcm)
+        body, content_type = _multipart(
+            {"response_format": "json", "temperature": "0.0", "language": self.language},
+            "audio.wav", wav_bytes(samples),
+        )
+        # A (re)start loading the model is not part of this request's real-time factor
+        self.server.start()
+        started = time.perf_counter()
+        try:
+            reply = self.server.request("/inference", data=body, content_type=content_type, timeout=timeout)
+        except TimeoutError:
+            raise TimeoutError(f"Transcription timed out after {timeout:.0f}s") from None
+        return Transcription(
+            text=reply.get("text", "").strip(),
+            audio_seconds=len(samples) / WHISPER_SAMPLE_RATE,
+            processing_seconds=time.perf_counter() - started,
+        )
+
+
+def merge_overlap(left: str, right: str, max_words: int = 8) -> str:
+    """Join transcripts of overlapping windows, dropping the words `right` repeats from the end of `left`"""
+    left_words, right_words = left.split(), right.split()
+    normalize = lambda word: word.strip(".,!?;:\"'").lower()
+    for size in range(min(max_words, len(left_words), len(right_words)), 0, -1):
+        if [normalize(w) for w in left_words[-size:]] == [normalize(w) for w in right_words[:size]]:
+            right_words = right_words[size:]
+            break
+    return " ".join(left_words + right_words)
+
+
+class StreamingTranscriber:
+    """Transcribe an utterance while it is still being spoken.
+
+    `update` is called with all the audio recorded so far. Every full
+    `window_seconds` is sent to the worker as soon as it is recorded, and the
+    next window starts `overlap_seconds` before its end so words on the seam
+    are heard whole. Every `partial_interval` seconds the open window is
+    transcribed too, and `on_partial` gets the hypothesis so far. `finish`
+    then only has to transcribe the last, partly filled window, and not even
+    that if the latest partial already covered all of it. `last_latency` is
+    the seconds `finish` took, from end of speech to final transcript.
+    """
+
+    def __init__(self, worker: Optional[WhisperWorker] = None, window_seconds: float = 8.0,
+                 overlap_seconds: float = 1.0, partial_interval: float = 1.0,
+                 on_partial: Optional[Callable[[str], None]] = None):
+        if overlap_seconds >= window_seconds:
+            raise ValueError("overlap_seconds must be shorter than window_seconds")
+        self.worker = worker or get_whisper_worker()
+        self.window = int(window_seconds * WHISPER_SAMPLE_RATE)
+        self.overlap = int(overlap_seconds * WHISPER_SAMPLE_RATE)
+        self.partial_step = int(partial_interval * WHISPER_SAMPLE_RATE)
+        self.on_partial = on_partial
+        self.last_latency: Optional[float] = None
+        self.reset()
+
+    def reset(self):
+        self._window_start = 0
+        self._windows: List[Future] = []
+        # The open-window request and the (start, end) samples it covers
+        self._partial: Optional[Future] = None
+        self._partial_span = (0, 0)
+        self._partial_at = 0
+
+    def update(self, audio: np.ndarray):
+        """Send whatever `audio` (the utterance so far) makes newly ready"""
+        total = len(audio)
+        while total - self._window_start >= self.window:
+            end = self._window_start + self.window
+            self._windows.append(self.worker.submit(np.array(audio[self._window_start:end])))
+            self._window_start = end - self.overlap
+
+        ready = self._partial is None or self._partial.done()
+        if self.on_partial and ready and total - self._partial_at >= self.partial_step:
+            self._partial_at = total
+            windows = list(self._windows)
+            partial = self.worker.submit(np.array(audio[self._window_start:total]))
+            self._partial, self._partial_span = partial, (self._window_start, total)
+            partial.add_done_callback(lambda future: self._report_partial(windows, future))
+
+    def finish(self, audio: np.ndarray) -> str:
+        """The final transcript once the speaker has stopped"""
+        started = time.perf_counter()
+        partial, span = self._partial, self._partial_span
+        # Stop hypotheses still in flight from reaching on_partial after the final transcript
+        self._partial = None
+        tail = len(audio) - self._window_start
+        if partial is not None and span == (self._window_start, len(audio)) and not partial.cancelled():
+            # Nothing was recorded since the last partial: it already is the last window
+            self._windows.append(partial)
+        else:
+            if partial is not None:
+                partial.cancel()
+            # Past the first window, a tail no longer than the overlap was already heard
+            if tail > (self.overlap if self._windows else 0):
+                self._windows.append(self.worker.submit(np.array(audio[self._window_start:])))
+        try:
+            text = ""
+            for window in self._windows:
+                text = merge_overlap(text, window.result(timeout=self.worker.timeout).text)
+        except EngineUnavailable as e:
+            print(f"⚠️ Whisper server unavailable ({e}), using the whisper.cpp CLI")
+            text = transcribe_with_cli(audio).text
+        finally:
+            self.reset()
+        self.last_latency = time.perf_counter() - started
+        return text
+
+    def _report_partial(self, windows: List[Future], partial: Future):
+        # Superseded by finish() or a newer partial
+        if partial is not self._partial or partial.cancelled() or partial.exception() is not None:
+            return
+        if not all(window.done() and window.exception() is None for window in windows):
+            return
+        text = ""
+        for future in windows + [partial]:
+            text = merge_overlap(text, future.result().text)
+        self.on_partial(text)
+
+
+_default_worker: Optional[WhisperWorker] = None
+_default_worker_lock = threading.Lock()
+
+
+def get_whisper_worker() -> WhisperWorker:
+    """The process-wide worker, created on first use"""
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is None:
+            _default_worker = WhisperWorker()
+        return _default_worker
+
+
+def shutdown_whisper_worker():
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is not None:
+            _default_worker.stop()
+            _default_worker = None